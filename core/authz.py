@@ -0,0 +1,73 @@
+# core/authz.py
+"""
+Request-scoped authorization context.
+
+`auth_context(request)` reads the role and company id of the authenticated
+user once per request and caches the result on the request. Permission
+classes (core/permissions.py) and the scoping helper below only
+compare these plain values, so checking access never loads a Company or
+runs a query of its own.
+
+List endpoints restrict their queryset with `managed_users()` instead of
+checking every object.
+"""
+from users.models import User
+
+_CACHE_ATTR = '_auth_context'
+
+
+class AuthContext:
+    """Role and company of the user behind one request."""
+
+    __slots__ = ('user_id', 'role', 'company_id', 'is_authenticated')
+
+    def __init__(self, user_id=None, role=None, company_id=None, is_authenticated=False):
+        self.user_id = user_id
+        self.role = role
+        self.company_id = company_id
+        self.is_authenticated = is_authenticated
+
+    @classmethod
+    def for_user(cls, user):
+        if not (user and user.is_authenticated):
+            return cls()
+        return cls(user.pk, user.role, user.company_id, True)
+
+    @property
+    def is_super(self):
+        return self.role == User.Role.SUPER_ADMIN
+
+    @property
+    def is_company_admin(self):
+        return self.role == User.Role.COMPANY_ADMIN
+
+    @property
+    def is_admin(self):
+        return self.is_super or self.is_company_admin
+
+    def manages_company(self, company_id):
+        """Whether this user may manage data belonging to `company_id`."""
+        if self.is_super:
+            return True
+        return self.is_company_admin and self.company_id is not None and self.company_id == company_id
+
+
+def auth_context(request):
+    """The AuthContext of `request`, computed on first use."""
+    user = getattr(request, 'user', None)
+    cached = getattr(request, _CACHE_ATTR, None)
+    # Tests (and force_authenticate) may swap the user on a live request.
+    if cached is None or cached[0] is not user:
+        cached = (user, AuthContext.for_user(user))
+        setattr(request, _CACHE_ATTR, cached)
+    return cached[1]
+
+
+def managed_users(queryset, request):
+    """The users the requester may manage: all for super admins, their company's for company admins."""
+    context = auth_context(request)
+    if context.is_super:
+        return queryset
+    if context.is_company_admin and context.company_id is not None:
+        return queryset.filter(company_id=context.company_id)
+    return queryset.none()
@@ -0,0 +1,104 @@
+# core/db_routing.py
+"""
+Primary/replica routing.
+
+When DATABASE_REPLICA_URL is set, a "replica" alias is added to DATABASES.
+The request handled by core.middleware.ReplicaRoutingMiddleware then reads
+from it when:
+
+* it is a GET/HEAD/OPTIONS request on one of REPLICA_READ_PATHS (admin
+  reports and order lists, menus, schedules), and
+* its user has not written anything in the last REPLICA_STICKY_SECONDS.
+
+Every write goes to the primary. A write also sends the rest of that
+request's reads to the primary, and pins the user to the primary for
+REPLICA_STICKY_SECONDS, so users always read their own writes (e.g. their
+new order) despite replication lag. Reads inside a transaction, and all
+reads outside requests (commands, workers), use the primary.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+
+class RoutingState:
+    """Routing decisions for the request being handled."""
+
+    __slots__ = ('use_replica', 'wrote')
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+def replica_available():
+    return REPLICA in settings.DATABASES
+
+
+def begin_request(use_replica):
+    return _state.set(RoutingState(use_replica))
+
+
+def end_request(token):
+    state = _state.get()
+    _state.reset(token)
+    return state
+
+
+@contextmanager
+def use_primary():
+    """Reads inside the block go to the primary (for code that must see the latest data)."""
+    token = _state.set(RoutingState(False))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def _pin_key(user_id):
+    return f"db-routing:pinned:{user_id}"
+
+
+def pin_to_primary(user_id):
+    cache.set(_pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return bool(cache.get(_pin_key(user_id)))
+
+
+class PrimaryReplicaRouter:
+    """DATABASE_ROUTERS entry; only reads of opted-in requests use the replica."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.use_replica and replica_available():
+            # Inside a transaction the primary is needed to see its own changes.
+            if not connections[PRIMARY].in_atomic_block:
+                return REPLICA
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+            state.use_replica = False
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        if {obj1._state.db, obj2._state.db} <= {PRIMARY, REPLICA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema through replication.
+        return db != REPLICA
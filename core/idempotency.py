@@ -0,0 +1,151 @@
+# core/idempotency.py
+"""
+Idempotency keys for retried POSTs.
+
+A client may send an `Idempotency-Key` header with a POST. The first request
+with a key claims an IdempotencyKey row, runs normally and stores its
+response there. A retry with the same key and the same request replays that
+stored response (with `Idempotent-Replayed: true`) after a single indexed
+read. It does not validate, lock or write anything again, so a deposit is
+never credited twice.
+
+* A key reused for a different request (another path or body) gets 422.
+* A retry that arrives while the first request is still running gets 409 with
+  Retry-After. So does a retry whose first request died without storing a
+  response: it may have died after its transaction committed (a deposit
+  already credited), so the key is never claimed again until it expires.
+* Raised errors (validation errors included) and 5xx responses are not
+  stored, so the request can be retried.
+
+Keys are per user and per scope and are kept for IDEMPOTENCY_KEY_TTL_HOURS.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from . import sharding
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+IN_PROGRESS = "A request with this Idempotency-Key is still in progress."
+
+
+def fingerprint(request):
+    """SHA-256 over the method, path and the request body."""
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(b'\0')
+    digest.update(request.path.encode())
+    digest.update(b'\0')
+    # Parsed data, so the same JSON with other spacing or key order matches.
+    digest.update(json.dumps(request.data, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _error(message, status_code, retry_after=None):
+    response = Response({'error': message}, status=status_code)
+    if retry_after:
+        response['Retry-After'] = str(retry_after)
+    return response
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.response_status)
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def _claim(user, scope, key, request_fingerprint):
+    """
+    Returns (record, None) when this request should run, or (None, response)
+    when it must not: a replay or an error.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    keys = IdempotencyKey.objects.filter(user=user, scope=scope, key=key)
+    record = keys.first()
+    if record is None:
+        try:
+            # Savepoint, so a clash does not break an enclosing transaction.
+            with transaction.atomic(using=sharding.current_alias()):
+                record = IdempotencyKey.objects.create(
+                    user=user, scope=scope, key=key, fingerprint=request_fingerprint, expires_at=expires_at,
+                )
+            return record, None
+        except IntegrityError:  # A concurrent request claimed it first.
+            record = keys.first()
+            if record is None:
+                return None, _error(IN_PROGRESS, status.HTTP_409_CONFLICT, 1)
+
+    if record.expires_at <= now:
+        # Take the key over only if nobody else did first.
+        taken = keys.filter(pk=record.pk, created_at=record.created_at).update(
+            fingerprint=request_fingerprint, response_status=None, response_body=None,
+            created_at=now, expires_at=expires_at,
+        )
+        if taken:
+            record.created_at = now
+            return record, None
+        return None, _error(IN_PROGRESS, status.HTTP_409_CONFLICT, 1)
+
+    if record.response_status is None:
+        return None, _error(IN_PROGRESS, status.HTTP_409_CONFLICT, 1)
+    if record.fingerprint != request_fingerprint:
+        return None, _error(
+            "This Idempotency-Key was already used for a different request.",
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return None, _replay(record)
+
+
+def idempotent(scope):
+    """
+    Decorator for APIView handlers (`post`, `create`) that honours the
+    Idempotency-Key header. Put it above any transaction decorator so the key
+    is claimed and stored outside the handler's transaction.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key or not request.user.is_authenticated:
+                return handler(view, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return _error(f"{HEADER} must be at most {MAX_KEY_LENGTH} characters.", status.HTTP_400_BAD_REQUEST)
+
+            record, response = _claim(request.user, scope, key, fingerprint(request))
+            if response is not None:
+                return response
+
+            try:
+                response = handler(view, request, *args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+            if response.status_code >= 500:
+                record.delete()
+            else:
+                # Stored as rendered JSON, so the replay is byte-for-byte the same.
+                body = json.loads(JSONRenderer().render(response.data)) if response.data is not None else None
+                IdempotencyKey.objects.filter(pk=record.pk).update(
+                    response_status=response.status_code, response_body=body,
+                )
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_expired(now=None):
+    """Deletes expired keys; returns how many."""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
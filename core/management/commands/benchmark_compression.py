@@ -0,0 +1,88 @@
+# core/management/commands/benchmark_compression.py
+
+import json
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.middleware import brotli, compress_bytes
+
+
+class Command(BaseCommand):
+    """
+    Measures CPU cost versus bytes saved for compressing a typical menu payload.
+    The payload mirrors the shape returned by /api/schedules/my-menu/.
+    """
+    help = 'Benchmarks gzip and brotli levels on a typical schedule/menu JSON payload.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Number of daily menus in the payload.')
+        parser.add_argument('--foods', type=int, default=6, help='Food items per daily menu.')
+        parser.add_argument('--repeat', type=int, default=50, help='Iterations per measurement.')
+
+    def handle(self, *args, **options):
+        payload = json.dumps(
+            self.build_payload(options['days'], options['foods']), ensure_ascii=False
+        ).encode('utf-8')
+        self.stdout.write(f"Payload size: {len(payload)} bytes ({options['days']} days x {options['foods']} foods)")
+        self.stdout.write(f"{'encoding':<10}{'level':>6}{'bytes':>10}{'ratio':>8}{'ms/op':>10}")
+
+        candidates = [('gzip', level) for level in (1, 4, 6, 9)]
+        if brotli is not None:
+            candidates += [('br', quality) for quality in (1, 4, 5, 8, 11)]
+
+        for encoding, level in candidates:
+            compress_options = {'gzip_level': level, 'brotli_quality': level}
+            start = time.perf_counter()
+            for _ in range(options['repeat']):
+                compressed = compress_bytes(payload, encoding, compress_options)
+            elapsed_ms = (time.perf_counter() - start) * 1000 / options['repeat']
+            ratio = len(compressed) / len(payload)
+            self.stdout.write(f"{encoding:<10}{level:>6}{len(compressed):>10}{ratio:>8.2f}{elapsed_ms:>10.3f}")
+
+    def build_payload(self, days, foods):
+        """Builds a synthetic schedule with Persian dish names and descriptions."""
+        dishes = [
+            ("چلوکباب کوبیده", "دو سیخ کباب کوبیده گوشت گوسفندی به همراه برنج ایرانی", "150000.00"),
+            ("قورمه سبزی", "خورشت سبزیجات معطر با گوشت گوسفندی و لوبیا قرمز به همراه برنج", "135000.00"),
+            ("جوجه کباب", "یک سیخ جوجه کباب زعفرانی به همراه برنج ایرانی", "140000.00"),
+            ("زرشک پلو با مرغ", "ران مرغ سرخ شده به همراه برنج زعفرانی و زرشک", "120000.00"),
+            ("شله زرد", "دسر سنتی ایرانی با برنج، زعفران و شکر", "35000.00"),
+        ]
+        sides = [
+            {"id": 1, "name": "سالاد شیرازی", "description": "خیار، گوجه و پیاز خرد شده با آبغوره", "price": "25000.00", "is_available": True},
+            {"id": 2, "name": "ماست و خیار", "description": "ماست چکیده به همراه خیار و نعنا خشک", "price": "20000.00", "is_available": True},
+        ]
+        start = date.today()
+        daily_menus = []
+        for day in range(days):
+            available_foods = []
+            for index in range(foods):
+                name, description, price = dishes[(day + index) % len(dishes)]
+                available_foods.append({
+                    "id": index + 1,
+                    "name": name,
+                    "description": description,
+                    "price": price,
+                    "image": f"https://example.com/media/food_images/dish_{index + 1}.jpg",
+                    "is_available": True,
+                    "category": 1,
+                    "category_name": "غذای اصلی",
+                    "created_at": "2025-10-19T09:19:00Z",
+                })
+            daily_menus.append({
+                "id": day + 1,
+                "date": (start + timedelta(days=day)).isoformat(),
+                "available_foods": available_foods,
+                "available_sides": sides,
+            })
+        return [{
+            "id": 1,
+            "name": "برنامه ماهانه",
+            "company_name": "شرکت نمونه",
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=days)).isoformat(),
+            "is_active": True,
+            "daily_menus": daily_menus,
+        }]
@@ -0,0 +1,46 @@
+# core/management/commands/import_profile.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import startup
+
+
+class Command(BaseCommand):
+    """
+    Profiles a cold start (a new interpreter importing core.wsgi, as a
+    gunicorn worker does) with `python -X importtime` and lists the modules
+    that cost the most. Use it to find imports worth making lazy.
+    """
+    help = 'Shows where a cold start of the application spends its import time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=25, help='Modules to list (default: 25).')
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative',
+                            help='Rank by time including (cumulative) or excluding (self) sub-imports.')
+        parser.add_argument('--code', default=startup.COLD_START_CODE,
+                            help=f'Python code to profile (default: "{startup.COLD_START_CODE}").')
+        parser.add_argument('--check', action='store_true',
+                            help='Fail when the cold start exceeds STARTUP_BUDGET_SECONDS.')
+
+    def handle(self, *args, **options):
+        try:
+            profile = startup.profile(options['code'])
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for row in profile.slowest(options['limit'], key=f"{options['sort']}_us"):
+            self.stdout.write(
+                f"{row['cumulative_us'] / 1000:14.1f} {row['self_us'] / 1000:9.1f}  {'  ' * row['depth']}{row['module']}"
+            )
+        self.stdout.write(
+            f"\nCold start: {profile.seconds:.2f}s wall, {profile.import_seconds:.2f}s importing "
+            f"{len(profile.imports)} modules (budget {settings.STARTUP_BUDGET_SECONDS:.2f}s)."
+        )
+        heavy = profile.loaded(startup.HEAVY_OPTIONAL_MODULES)
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"Imported at startup, should be lazy: {', '.join(heavy)}"))
+
+        if options['check'] and profile.seconds > settings.STARTUP_BUDGET_SECONDS:
+            raise CommandError(f"Cold start took {profile.seconds:.2f}s, over the {settings.STARTUP_BUDGET_SECONDS}s budget.")
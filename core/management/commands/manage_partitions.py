@@ -0,0 +1,57 @@
+# core/management/commands/manage_partitions.py
+
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core import partitioning
+
+
+class Command(BaseCommand):
+    """
+    Maintenance for the monthly partitions of orders and wallet transactions.
+    Meant to run daily (e.g. from cron); safe to run repeatedly.
+    """
+    help = 'Creates upcoming monthly partitions and optionally detaches old ones (PostgreSQL only).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table', action='append', choices=sorted(partitioning.PARTITIONED_TABLES),
+            help='Only manage this table (repeatable). Defaults to all partitioned tables.',
+        )
+        parser.add_argument('--months-ahead', type=int, default=None,
+                            help='Future months to keep created (default: DB_PARTITION_MONTHS_AHEAD).')
+        parser.add_argument('--convert', action='store_true',
+                            help='Partition tables that are still plain (when DB_PARTITIONING was enabled later) '
+                                 'or partitioned on another column.')
+        parser.add_argument('--detach-before', type=date.fromisoformat, default=None,
+                            help='Detach partitions of months ending on or before this date (YYYY-MM-DD). '
+                                 'The detached tables are kept so they can be exported and dropped. '
+                                 'For orders, only detach months that have been archived.')
+
+    def handle(self, *args, **options):
+        if not partitioning.partitioning_enabled(connection):
+            self.stdout.write("Partitioning is disabled (requires PostgreSQL and DB_PARTITIONING=True); nothing to do.")
+            return
+
+        tables = options['table'] or sorted(partitioning.PARTITIONED_TABLES)
+        for table in tables:
+            column = partitioning.PARTITIONED_TABLES[table]
+            with transaction.atomic():
+                if options['convert'] and partitioning.convert_table(connection, table, column, options['months_ahead']):
+                    self.stdout.write(f"{table}: converted to monthly partitions on {column}")
+
+                with connection.cursor() as cursor:
+                    if partitioning.partition_column(cursor, table) != column:
+                        self.stdout.write(self.style.WARNING(f"{table}: not partitioned on {column}; run with --convert."))
+                        continue
+
+                created = partitioning.ensure_future_partitions(connection, table, options['months_ahead'])
+                for name in created:
+                    self.stdout.write(f"{table}: created {name}")
+
+                if options['detach_before']:
+                    for name in partitioning.detach_partitions_before(connection, table, options['detach_before']):
+                        self.stdout.write(f"{table}: detached {name}")
+        self.stdout.write(self.style.SUCCESS("Partitions are up to date."))
@@ -0,0 +1,18 @@
+# core/management/commands/purge_idempotency_keys.py
+
+from django.core.management.base import BaseCommand
+
+from core.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    """
+    Deletes idempotency keys past IDEMPOTENCY_KEY_TTL_HOURS. Expired keys are
+    already ignored by requests; this only keeps the table small. Meant to
+    run daily (e.g. from cron).
+    """
+    help = 'Deletes expired idempotency keys.'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency key(s)."))
@@ -0,0 +1,34 @@
+# core/management/commands/run_on_shards.py
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from core import sharding
+
+
+class Command(BaseCommand):
+    """
+    Runs another management command once per database - the primary and every
+    tenant shard - with that database as the tenant context, so commands that
+    work on tenant data (rebuild_dashboard_snapshots, archive_orders, ...) cover
+    every company. Start one run_worker per alias with --shard, since it never returns.
+    """
+    help = 'Runs a management command on the primary and every tenant shard.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shard', action='append',
+                            help='Only run on this alias (repeatable). Defaults to the primary and every shard.')
+        parser.add_argument('command_name', help='The command to run.')
+        parser.add_argument('command_args', nargs='...', help='Arguments passed to the command.')
+
+    def handle(self, *args, **options):
+        aliases = options['shard'] or sharding.all_aliases()
+        unknown = set(aliases) - set(sharding.all_aliases())
+        if unknown:
+            raise CommandError(f"Not a shard in TENANT_SHARD_MAP: {', '.join(sorted(unknown))}")
+
+        for alias in aliases:
+            self.stdout.write(f"== {alias}")
+            with sharding.using_shard(alias):
+                call_command(options['command_name'], *options['command_args'],
+                             stdout=self.stdout._out, stderr=self.stderr._out)
@@ -6,7 +6,6 @@ from decimal import Decimal
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.utils import timezone
-from faker import Faker
 
 # Import all necessary models
 from companies.models import Company
@@ -26,7 +25,9 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         self.stdout.write("شروع فرآیند پر کردن پایگاه داده...")
-        # Initialize Faker for Persian locale
+        # Initialize Faker for Persian locale (imported here: it is slow to
+        # import and only this command needs it)
+        from faker import Faker
         fake = Faker('fa_IR')
 
         try:
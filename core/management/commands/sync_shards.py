@@ -0,0 +1,33 @@
+# core/management/commands/sync_shards.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import sharding
+
+
+class Command(BaseCommand):
+    """
+    Copies the reference data (companies, menus, schedules) from the primary
+    to the tenant shards, replacing what they hold. Run it after adding a
+    shard (once `migrate --database <alias>` has created its tables) and after
+    changing TENANT_SHARD_MAP. Day-to-day edits are copied as they commit.
+    """
+    help = 'Copies reference data from the primary database to every tenant shard.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shard', action='append',
+                            help='Only sync this shard alias (repeatable). Defaults to every mapped shard.')
+
+    def handle(self, *args, **options):
+        aliases = options['shard'] or sharding.shard_aliases()
+        unknown = set(aliases) - set(sharding.shard_aliases())
+        if unknown:
+            raise CommandError(f"Not a shard in TENANT_SHARD_MAP: {', '.join(sorted(unknown))}")
+        if not aliases:
+            self.stdout.write("Sharding is disabled (TENANT_SHARD_MAP is empty); nothing to do.")
+            return
+
+        for alias in aliases:
+            copied = sharding.sync_reference_data(alias)
+            summary = ', '.join(f"{label}: {rows}" for label, rows in copied.items())
+            self.stdout.write(self.style.SUCCESS(f"{alias}: {summary}"))
@@ -0,0 +1,277 @@
+# core/middleware.py
+
+import gzip
+import zlib
+from importlib import import_module
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from . import db_routing, sharding
+
+try:
+    import brotli
+except ImportError:  # whitenoise[brotli] normally pulls it in
+    brotli = None
+
+
+DEFAULT_COMPRESSION_OPTIONS = {
+    'min_size': 1024,
+    'gzip_level': 6,
+    'brotli_quality': 4,
+}
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    'application/json',
+    'text/',
+    'application/javascript',
+)
+
+
+def parse_accept_encoding(header):
+    """
+    Returns a dict of {coding: q-value} for the given Accept-Encoding header.
+    Codings explicitly refused with q=0 are kept so they can be excluded.
+    """
+    codings = {}
+    for part in header.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        codings[coding.strip().lower()] = quality
+    return codings
+
+
+def choose_encoding(header):
+    """
+    Picks the best supported encoding for the given Accept-Encoding header.
+    Brotli wins over gzip when both are acceptable and brotli is installed.
+    """
+    codings = parse_accept_encoding(header or '')
+    wildcard = codings.get('*', 0.0)
+    candidates = []
+    if brotli is not None:
+        candidates.append('br')
+    candidates.append('gzip')
+
+    best, best_quality = None, 0.0
+    for coding in candidates:
+        quality = codings.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class _StreamCompressor:
+    """Incremental compressor with a uniform process/finish interface."""
+
+    def __init__(self, encoding, options):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=options['brotli_quality'])
+        else:
+            # wbits=31 produces a gzip container rather than a raw zlib stream.
+            self._compressor = zlib.compressobj(options['gzip_level'], zlib.DEFLATED, 31)
+
+    def process(self, chunk):
+        # Flush per chunk so clients start receiving rows immediately,
+        # which is the whole point of a streaming export.
+        if self.encoding == 'br':
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+    def stream(self, chunks):
+        for chunk in chunks:
+            data = self.process(chunk)
+            if data:
+                yield data
+        yield self.finish()
+
+    async def astream(self, chunks):
+        async for chunk in chunks:
+            data = self.process(chunk)
+            if data:
+                yield data
+        yield self.finish()
+
+
+def compress_bytes(content, encoding, options):
+    if encoding == 'br':
+        return brotli.compress(content, quality=options['brotli_quality'])
+    return gzip.compress(content, compresslevel=options['gzip_level'], mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Compresses API responses with brotli or gzip, based on Accept-Encoding.
+
+    Which responses are compressed is driven by `compression_rules` in the
+    root URLconf (core/urls.py): a mapping of URL prefix to options, where the
+    longest matching prefix wins and `None` disables compression. Responses
+    smaller than the prefix's `min_size` are left alone, since the framing
+    overhead and CPU cost outweigh the bytes saved. Streaming responses are
+    compressed chunk by chunk without buffering the whole body.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._rules = None
+
+    @property
+    def rules(self):
+        if self._rules is None:
+            urlconf = import_module(settings.ROOT_URLCONF)
+            rules = getattr(urlconf, 'compression_rules', {})
+            # Longest prefix first so the most specific rule is found first.
+            self._rules = sorted(rules.items(), key=lambda item: len(item[0]), reverse=True)
+        return self._rules
+
+    def options_for_path(self, path):
+        for prefix, options in self.rules:
+            if path.startswith(prefix):
+                if options is None:
+                    return None
+                return {**DEFAULT_COMPRESSION_OPTIONS, **options}
+        return None
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        options = self.options_for_path(request.path)
+        if options is None:
+            return response
+
+        # Vary on Accept-Encoding for every candidate, compressed or not,
+        # so shared caches never serve a compressed body to the wrong client.
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if response.has_header('Content-Encoding') or response.status_code < 200 or response.status_code in (204, 304):
+            return response
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES):
+            return response
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            compressor = _StreamCompressor(encoding, options)
+            if response.is_async:
+                response.streaming_content = compressor.astream(response.streaming_content)
+            else:
+                response.streaming_content = compressor.stream(response.streaming_content)
+            response.headers.pop('Content-Length', None)
+        else:
+            if len(response.content) < options['min_size']:
+                return response
+            compressed = compress_bytes(response.content, encoding, options)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # A compressed body is no longer byte-identical to the original.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def request_token(request):
+    """
+    The request's validated JWT access token, or None. Needs no database
+    query, so routing middleware can read claims before DRF authenticates.
+    """
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return None
+
+
+class TenantShardMiddleware:
+    """
+    Runs requests of users whose company lives on a shard inside that
+    shard's context (see core/sharding.py). The company is read from the
+    JWT's company_id claim.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = request_token(request) if sharding.enabled() else None
+        alias = sharding.shard_for_company(token.get('company_id')) if token is not None else sharding.PRIMARY
+        if alias == sharding.PRIMARY:
+            return self.get_response(request)
+        with sharding.using_shard(alias):
+            return self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decides per request whether reads may use the read replica (see
+    core/db_routing.py), and pins users who wrote something to the primary.
+
+    The user is identified from the JWT without a database query, since the
+    decision has to be made before DRF authenticates the request.
+    """
+
+    READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = tuple(settings.REPLICA_READ_PATHS)
+
+    def token_user_id(self, request):
+        from rest_framework_simplejwt.settings import api_settings
+
+        token = request_token(request)
+        return token.get(api_settings.USER_ID_CLAIM) if token is not None else None
+
+    def reads_from_replica(self, request):
+        if not (db_routing.replica_available() and request.method in self.READ_METHODS
+                and request.path.startswith(self.paths)):
+            return False
+        user_id = self.token_user_id(request)
+        return user_id is None or not db_routing.is_pinned(user_id)
+
+    def __call__(self, request):
+        token = db_routing.begin_request(self.reads_from_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            state = db_routing.end_request(token)
+        if state.wrote and db_routing.replica_available():
+            # DRF sets request.user once it has authenticated the request.
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                db_routing.pin_to_primary(user.pk)
+        return response
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(help_text="Operation the key belongs to, e.g. 'orders.create'.", max_length=100)),
+                ('key', models.CharField(max_length=255)),
+                ('fingerprint', models.CharField(help_text='SHA-256 of the request method, path and body.', max_length=64)),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, help_text='Empty while the first request is still running.', null=True)),
+                ('response_body', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_keys', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='core_idempotency_expiry_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'scope', 'key'), name='core_idempotency_key_unique')],
+            },
+        ),
+    ]
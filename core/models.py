@@ -0,0 +1,34 @@
+# core/models.py
+from django.conf import settings
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client-supplied Idempotency-Key and the response first given for it
+    (see core/idempotency.py). Rows expire after IDEMPOTENCY_KEY_TTL_HOURS
+    and are removed by `manage.py purge_idempotency_keys`.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_keys'
+    )
+    scope = models.CharField(max_length=100, help_text="Operation the key belongs to, e.g. 'orders.create'.")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64, help_text="SHA-256 of the request method, path and body.")
+    response_status = models.PositiveSmallIntegerField(
+        null=True, blank=True, help_text="Empty while the first request is still running."
+    )
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='core_idempotency_key_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='core_idempotency_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key} ({self.response_status or 'pending'})"
@@ -0,0 +1,323 @@
+# core/partitioning.py
+"""
+Optional monthly range partitioning of the large append-only tables on
+PostgreSQL.
+
+Enabled with DB_PARTITIONING=True. On other databases (SQLite in local
+development), or when disabled, every function here is a no-op and the tables
+stay plain.
+
+Converting a table keeps its name, columns, indexes and outgoing foreign keys,
+but PostgreSQL requires the partition key in the primary key, so the primary
+key becomes (id, <partition column>) (a unique constraint when the column is
+nullable; rows without a value go to the DEFAULT partition). As a result,
+foreign keys that *reference* a partitioned table (e.g.
+orders_order_side_dishes.order_id) can no longer exist in the database. They
+are replaced by triggers that enforce the same rule: a referencing row must
+point at an existing row, and a referenced row cannot be deleted while rows
+still point at it. Ids still come from a single sequence, so they stay unique
+across partitions.
+
+Orders are partitioned on delivery_date, the column the report, archive and
+admin list filters are bounded on, so those queries only scan the months they
+ask for. (orders/migrations/0006 used to partition on created_at, before the
+delivery date was copied onto the order; 0011 re-partitions such tables.)
+
+Partitions are named <table>_pYYYY_MM and cover [first of month, first of next
+month). A DEFAULT partition catches rows outside the created range, so inserts
+never fail; `manage.py manage_partitions` keeps future months created ahead.
+"""
+from datetime import date, datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection as default_connection, transaction
+
+# Set (transaction-locally) while rows are moved between partitions, so the
+# reference triggers do not take the move for a delete.
+MOVING_ROWS_SETTING = 'partitioning.moving_rows'
+
+# Table -> partition column.
+PARTITIONED_TABLES = {
+    'orders_order': 'delivery_date',
+    'wallets_transaction': 'timestamp',
+}
+
+
+def partitioning_enabled(connection=None):
+    connection = connection or default_connection
+    return settings.DB_PARTITIONING and connection.vendor == 'postgresql'
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_between(first, last):
+    """Every month start from first's month up to and including last's month."""
+    month, last = month_start(first), month_start(last)
+    months = []
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(table, month):
+    return f'{table}_p{month.year:04d}_{month.month:02d}'
+
+
+def create_partition_sql(table, month):
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table, month)}" PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def partition_column(cursor, table):
+    """The column `table` is range-partitioned on, or None for a plain table."""
+    cursor.execute(
+        "SELECT pg_get_partkeydef(c.oid) FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = %s AND c.relnamespace = 'public'::regnamespace",
+        [table],
+    )
+    row = cursor.fetchone()
+    # 'RANGE (delivery_date)'
+    return row[0].partition('(')[2].rstrip(')').strip('"') if row else None
+
+
+def is_partitioned(cursor, table):
+    return partition_column(cursor, table) is not None
+
+
+def existing_partitions(cursor, table):
+    """Returns {partition name: is_default} for the attached partitions of `table`."""
+    cursor.execute(
+        "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) = 'DEFAULT' "
+        "FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = %s AND parent.relnamespace = 'public'::regnamespace",
+        [table],
+    )
+    return dict(cursor.fetchall())
+
+
+def partition_month(table, name):
+    """The month a <table>_pYYYY_MM partition covers, or None for other names."""
+    suffix = name[len(table):]
+    if not name.startswith(table) or len(suffix) != 9 or not suffix.startswith('_p'):
+        return None
+    try:
+        return date(int(suffix[2:6]), int(suffix[7:9]), 1)
+    except ValueError:
+        return None
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def referencing_columns(table):
+    """(table, column) of every foreign key in the models that points at `table`."""
+    references = []
+    for model in apps.get_models(include_auto_created=True):
+        for field in model._meta.local_fields:
+            if (field.is_relation and field.many_to_one and field.db_constraint
+                    and field.remote_field.model._meta.db_table == table):
+                references.append((model._meta.db_table, field.column))
+    return references
+
+
+def install_reference_triggers(cursor, table, referencing_table, column):
+    """
+    Stands in for the foreign key referencing_table.column -> table.id.
+    Inserts and updates are checked at commit (like Django's deferred foreign
+    keys) and lock the referenced row, so a concurrent delete waits for them.
+    Deleting a referenced row fails immediately, unless an UPDATE only moved
+    it to another partition or ensure_future_partitions() is moving it.
+    """
+    name = f'{referencing_table}_{column}_fkey'
+    cursor.execute(f'''
+        CREATE OR REPLACE FUNCTION "{name}"() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                IF current_setting('{MOVING_ROWS_SETTING}', true) = 'on' THEN
+                    RETURN NULL;
+                END IF;
+                IF EXISTS (SELECT 1 FROM "{referencing_table}" WHERE "{column}" = OLD.id)
+                        AND NOT EXISTS (SELECT 1 FROM "{table}" WHERE id = OLD.id) THEN
+                    RAISE foreign_key_violation USING MESSAGE = format(
+                        '{table} id %s is still referenced from {referencing_table}', OLD.id);
+                END IF;
+            ELSIF NEW."{column}" IS NOT NULL THEN
+                PERFORM 1 FROM "{table}" WHERE id = NEW."{column}" FOR KEY SHARE;
+                IF NOT FOUND THEN
+                    RAISE foreign_key_violation USING MESSAGE = format(
+                        '{referencing_table}.{column} %s is not present in {table}', NEW."{column}");
+                END IF;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    ''')
+    cursor.execute(f'DROP TRIGGER IF EXISTS "{name}" ON "{referencing_table}"')
+    cursor.execute(
+        f'CREATE CONSTRAINT TRIGGER "{name}" AFTER INSERT OR UPDATE OF "{column}" ON "{referencing_table}" '
+        f'DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION "{name}"()'
+    )
+    cursor.execute(f'DROP TRIGGER IF EXISTS "{name}" ON "{table}"')
+    cursor.execute(f'CREATE TRIGGER "{name}" AFTER DELETE ON "{table}" FOR EACH ROW EXECUTE FUNCTION "{name}"()')
+
+
+def convert_table(connection, table, column, months_ahead=None):
+    """
+    Rebuilds `table` as a table partitioned by month on `column`, with
+    partitions covering the existing rows and `months_ahead` future months.
+    A table partitioned on another column is re-partitioned.
+    Does nothing if partitioning is disabled or the table is already
+    partitioned on `column`.
+    """
+    if not partitioning_enabled(connection):
+        return False
+    months_ahead = settings.DB_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    legacy = f'{table}_unpartitioned'
+    sequence = f'{table}_part_id_seq'
+
+    with connection.cursor() as cursor:
+        current = partition_column(cursor, table)
+        if current == column:
+            return False
+
+        # Remember the indexes and outgoing foreign keys before the rename.
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE tablename = %s AND schemaname = 'public' AND indexname <> ALL(%s)",
+            [table, [f'{table}_pkey', f'{table}_id_{current}_key']],
+        )
+        # Indexes of a partitioned table are defined ON ONLY the parent.
+        indexes = [(name, definition.replace(' ON ONLY ', ' ON ', 1)) for name, definition in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT MIN("{column}"), MAX("{column}"), MAX(id) FROM "{table}"')
+        first, last, max_id = cursor.fetchone()
+        cursor.execute(
+            "SELECT NOT attnotnull FROM pg_attribute WHERE attrelid = %s::regclass AND attname = %s",
+            [table, column],
+        )
+        nullable, = cursor.fetchone()
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [sequence])
+        has_sequence, = cursor.fetchone()
+
+        if current:
+            # Free the partition names for the new layout.
+            for name in existing_partitions(cursor, table):
+                cursor.execute(f'ALTER TABLE "{name}" RENAME TO "{name}_old"')
+        cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+        cursor.execute(f'ALTER INDEX IF EXISTS "{table}_pkey" RENAME TO "{legacy}_pkey"')
+        cursor.execute(
+            f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING STORAGE) '
+            f'PARTITION BY RANGE ("{column}")'
+        )
+        if has_sequence:
+            # Already ours (re-partitioning); keep it when the old table is dropped.
+            cursor.execute(f'ALTER SEQUENCE "{sequence}" OWNED BY "{table}".id')
+        else:
+            cursor.execute(f'CREATE SEQUENCE "{sequence}" OWNED BY "{table}".id')
+            cursor.execute(f'ALTER TABLE "{table}" ALTER COLUMN id SET DEFAULT nextval(\'"{sequence}"\')')
+            cursor.execute(f'SELECT setval(\'"{sequence}"\', %s, false)', [(max_id or 0) + 1])
+        if nullable:
+            cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_id_{column}_key" UNIQUE (id, "{column}")')
+        else:
+            cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY (id, "{column}")')
+
+        this_month = month_start(date.today())
+        first_month = month_start(_as_date(first)) if first else this_month
+        last_month = max(month_start(_as_date(last)) if last else this_month, this_month)
+        for month in months_between(first_month, add_months(last_month, months_ahead)):
+            cursor.execute(create_partition_sql(table, month))
+        cursor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"')
+        # CASCADE drops the foreign keys and triggers that referenced the old table.
+        cursor.execute(f'DROP TABLE "{legacy}" CASCADE')
+
+        # The definitions were read before the rename, so they name the new table.
+        for name, definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+        for referencing_table, referencing_column in referencing_columns(table):
+            install_reference_triggers(cursor, table, referencing_table, referencing_column)
+    return True
+
+
+def ensure_future_partitions(connection, table, months_ahead=None, today=None):
+    """Creates any missing partitions from this month to `months_ahead` months out."""
+    if not partitioning_enabled(connection):
+        return []
+    months_ahead = settings.DB_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    this_month = month_start(today or date.today())
+    created = []
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            return []
+        existing = existing_partitions(cursor, table)
+        for month in months_between(this_month, add_months(this_month, months_ahead)):
+            if partition_name(table, month) not in existing:
+                # Rows for this month may already sit in the default partition.
+                # Move them out first, otherwise PostgreSQL refuses the new partition.
+                column = PARTITIONED_TABLES[table]
+                bounds = [month, add_months(month, 1)]
+                cursor.execute(
+                    f'SELECT 1 FROM "{table}_default" WHERE "{column}" >= %s AND "{column}" < %s LIMIT 1',
+                    bounds,
+                )
+                if cursor.fetchone():
+                    # All or nothing: a failure must not strand the rows in the temp table.
+                    with transaction.atomic(using=connection.alias):
+                        cursor.execute(f'CREATE TEMP TABLE "partition_move" (LIKE "{table}") ON COMMIT DROP')
+                        cursor.execute(f"SET LOCAL {MOVING_ROWS_SETTING} = 'on'")
+                        cursor.execute(
+                            f'WITH moved AS (DELETE FROM "{table}_default" '
+                            f'WHERE "{column}" >= %s AND "{column}" < %s RETURNING *) '
+                            f'INSERT INTO "partition_move" SELECT * FROM moved',
+                            bounds,
+                        )
+                        cursor.execute(f"SET LOCAL {MOVING_ROWS_SETTING} = 'off'")
+                        cursor.execute(create_partition_sql(table, month))
+                        cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "partition_move"')
+                        cursor.execute('DROP TABLE "partition_move"')
+                else:
+                    cursor.execute(create_partition_sql(table, month))
+                created.append(partition_name(table, month))
+    return created
+
+
+def detach_partitions_before(connection, table, cutoff):
+    """
+    Detaches (but keeps, as standalone tables) every monthly partition that
+    ends on or before `cutoff`. Returns the detached table names.
+    """
+    if not partitioning_enabled(connection):
+        return []
+    detached = []
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            return []
+        for name, is_default in sorted(existing_partitions(cursor, table).items()):
+            month = partition_month(table, name)
+            if is_default or month is None or add_months(month, 1) > cutoff:
+                continue
+            cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+            detached.append(name)
+    return detached
@@ -2,10 +2,10 @@
 # core/permissions.py
 
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.conf import settings
-from users.models import User
+
+from .authz import auth_context
 
 
 def is_authenticated_user(user):
@@ -13,19 +13,22 @@ def is_authenticated_user(user):
     return user and user.is_authenticated
 
 
+# All role and company checks below read the request's AuthContext
+# (core/authz.py), which is computed once per request and never queries.
+
 class IsSuperAdmin(BasePermission):
     """
     Allows access only to users with the 'SUPER_ADMIN' role.
     """
     def has_permission(self, request, view):
-        return is_authenticated_user(request.user) and request.user.role == User.Role.SUPER_ADMIN
+        return auth_context(request).is_super
 
 class IsAdmin(BasePermission):
     """
     Allows access only to users with 'SUPER_ADMIN' or 'COMPANY_ADMIN' roles.
     """
     def has_permission(self, request, view):
-        return is_authenticated_user(request.user) and request.user.role in [User.Role.SUPER_ADMIN, User.Role.COMPANY_ADMIN]
+        return auth_context(request).is_admin
 
 
 class IsCompanyAdmin(BasePermission):
@@ -33,7 +36,7 @@ class IsCompanyAdmin(BasePermission):
     Allows access only to users with the 'COMPANY_ADMIN' role.
     """
     def has_permission(self, request, view):
-        return is_authenticated_user(request.user) and request.user.role == User.Role.COMPANY_ADMIN
+        return auth_context(request).is_company_admin
 
 
 class IsSuperAdminOrReadOnly(BasePermission):
@@ -42,9 +45,10 @@ class IsSuperAdminOrReadOnly(BasePermission):
     but write access (create, update, delete) only to Super Admins.
     """
     def has_permission(self, request, view):
+        context = auth_context(request)
         if request.method in SAFE_METHODS:
-            return is_authenticated_user(request.user)
-        return is_authenticated_user(request.user) and request.user.role == User.Role.SUPER_ADMIN
+            return context.is_authenticated
+        return context.is_super
 
 
 class CanManageUsers(BasePermission):
@@ -52,42 +56,35 @@ class CanManageUsers(BasePermission):
     Custom permission for the UserViewSet:
     - Super Admins can perform any action on any user.
     - Company Admins can manage users within their own company.
+    List endpoints are scoped with core.authz.managed_users().
     """
     def has_permission(self, request, view):
-        return is_authenticated_user(request.user) and request.user.role in [User.Role.SUPER_ADMIN, User.Role.COMPANY_ADMIN]
+        return auth_context(request).is_admin
 
     def has_object_permission(self, request, view, obj):
-        if not is_authenticated_user(request.user):
-            return False
-
-        if request.user.role == User.Role.SUPER_ADMIN:
-            return True
-
-        if request.user.role == User.Role.COMPANY_ADMIN:
-            return obj.company == request.user.company
-
-        return False
+        return auth_context(request).manages_company(obj.company_id)
 
 
 class IsCompanyAdminOfTargetUser(BasePermission):
     """
     Allows access only if the request user is a COMPANY_ADMIN
     and belongs to the same company as the target user specified in the URL.
+
+    The view loads the target user anyway, so the company comparison is done
+    on that object: call `self.check_object_permissions(request, target_user)`.
     """
     def has_permission(self, request, view):
-        if not (is_authenticated_user(request.user) and request.user.role == User.Role.COMPANY_ADMIN):
-            return False
-
-        target_user_id = view.kwargs.get('user_id')
-        if not target_user_id:
+        if not auth_context(request).is_company_admin:
             return False
-
         try:
-            target_user = get_object_or_404(User, pk=int(target_user_id))
-        except (ValueError, User.DoesNotExist):
+            int(view.kwargs.get('user_id'))
+        except (TypeError, ValueError):
             return False
+        return True
 
-        return request.user.company == target_user.company
+    def has_object_permission(self, request, view, obj):
+        context = auth_context(request)
+        return context.is_company_admin and context.company_id is not None and obj.company_id == context.company_id
 
 
 class CanModifyOrder(BasePermission):
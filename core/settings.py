@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     'orders',
     'wallets',
     'contracts',
+    'jobs',
 ]
 
 # ==================== Middleware ====================
@@ -55,12 +56,18 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     # Place CorsMiddleware as high as possible
     'corsheaders.middleware.CorsMiddleware',
+    # Compress API JSON; per-prefix rules live in core/urls.py
+    'core.middleware.CompressionMiddleware',
     # Whitenoise for serving static files
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Runs tenants' requests on their company's shard (core/sharding.py)
+    'core.middleware.TenantShardMiddleware',
+    # Sends opted-in reads to the read replica (core/db_routing.py)
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -104,9 +111,9 @@ DB_PORT = os.environ.get('DB_PORT')
 # Option 2: Check for a single DATABASE_URL variable
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
-# Logic to choose the database configuration
+# Logic to choose the database configuration (nothing is printed: every
+# process, worker and management command imports these settings)
 if DB_HOST and DB_NAME and DB_USER and DB_PASS and DB_PORT:
-    print("Connecting to PostgreSQL via individual DB environment variables.")
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.postgresql',
@@ -118,12 +125,10 @@ if DB_HOST and DB_NAME and DB_USER and DB_PASS and DB_PORT:
         }
     }
 elif DATABASE_URL:
-    print("Connecting to PostgreSQL database via DATABASE_URL.")
     DATABASES = {
         'default': dj_database_url.config(default=DATABASE_URL, conn_max_age=600, ssl_require=False)
     }
 else:
-    print("No production database environment variables found. Falling back to SQLite for local development.")
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
@@ -132,6 +137,70 @@ else:
     }
 
 
+# Monthly range partitioning of orders_order and wallets_transaction
+# (PostgreSQL only, see core/partitioning.py and `manage.py manage_partitions`)
+DB_PARTITIONING = os.environ.get('DB_PARTITIONING', 'False') == 'True'
+DB_PARTITION_MONTHS_AHEAD = 3
+
+# Read replica for report, order list and menu reads (see core/db_routing.py).
+# To try it locally: copy db.sqlite3 to replica.sqlite3 and set
+# DATABASE_REPLICA_URL=sqlite:///replica.sqlite3
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_REPLICA_URL, conn_max_age=600)
+    # Tests create only the primary; the replica alias points at it.
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+REPLICA_READ_PATHS = [
+    path.strip() for path in os.environ.get(
+        'REPLICA_READ_PATHS',
+        '/api/admin/orders/,/api/admin/reports/,/api/admin/dashboard-stats/,/api/menu/,/api/schedules/',
+    ).split(',') if path.strip()
+]
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))  # primary-only reads after a user's write
+
+# Tenant shards (see core/sharding.py, `manage.py sync_shards` and `run_on_shards`).
+# TENANT_SHARDS="shard_a=postgres://...,shard_b=sqlite:///shard_b.sqlite3" adds
+# the aliases; TENANT_SHARD_MAP="12=shard_a,15=shard_b" maps company ids to them.
+for shard in filter(None, os.environ.get('TENANT_SHARDS', '').split(',')):
+    shard_alias, _, shard_url = shard.strip().partition('=')
+    DATABASES[shard_alias] = dj_database_url.parse(shard_url, conn_max_age=600)
+TENANT_SHARD_MAP = {
+    int(company_id): shard_alias.strip()
+    for company_id, _, shard_alias in (
+        entry.strip().partition('=') for entry in os.environ.get('TENANT_SHARD_MAP', '').split(',') if entry.strip()
+    )
+}
+
+# Shards first: a tenant's queries never go to the replica.
+DATABASE_ROUTERS = ['core.sharding.TenantShardRouter', 'core.db_routing.PrimaryReplicaRouter']
+
+# ==================== Cache ====================
+# Production needs REDIS_URL: cached reports (their invalidation tokens and
+# single-flight locks), rate limits and admission counts are only shared by
+# all gunicorn workers and cron commands through a shared cache. Without it
+# each process has its own memory cache (fine for development).
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHE_SHARED = bool(REDIS_URL)
+# Web worker processes (gunicorn reads the same variable, see Dockerfile).
+# Without a shared cache the rate limits and admission limits below are
+# divided between them, since each one counts on its own.
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 3))
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # --- PRODUCTION SECURITY SETTINGS ---
 if not DEBUG:
     SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
@@ -153,6 +222,20 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    # Token buckets per "<throttle_scope>.<user|company|ip>" (see core/throttling.py),
+    # totals across all workers
+    'DEFAULT_THROTTLE_RATES': {
+        'login.ip': os.environ.get('THROTTLE_LOGIN_IP', '10/min'),
+        'orders.user': os.environ.get('THROTTLE_ORDERS_USER', '60/min'),
+        'orders.company': os.environ.get('THROTTLE_ORDERS_COMPANY', '1200/min'),
+    },
+    # Concurrent unsafe requests per throttle_scope across all workers; more get 429
+    'ADMISSION_LIMITS': {
+        'login': int(os.environ.get('ADMISSION_LIMIT_LOGIN', 8)),
+        'orders': int(os.environ.get('ADMISSION_LIMIT_ORDERS', 32)),
+    },
+    'ADMISSION_RETRY_AFTER': 1,  # seconds
+    'ADMISSION_SLOT_TIMEOUT': 60,  # seconds before leaked in-flight slots are freed
 }
 
 # ==================== Simple JWT ====================
@@ -191,6 +274,46 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # ==================== Custom Settings ====================
 RESERVATION_LEAD_DAYS = 2
 
+# Background jobs (see jobs/queue.py and `manage.py run_worker`)
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BASE_DELAY = 10  # seconds, doubled after every failed attempt
+JOBS_LOCK_TIMEOUT = 15 * 60  # seconds before a RUNNING job is considered abandoned
+# Run jobs in-process after commit instead of queueing them (local dev without a worker)
+JOBS_RUN_EAGERLY = os.environ.get('JOBS_RUN_EAGERLY', 'False') == 'True'
+
+# Order archival (see orders/archive.py and `manage.py archive_orders`)
+ORDER_ARCHIVE_AFTER_DAYS = 365
+ORDER_ARCHIVE_DIR = os.environ.get('ORDER_ARCHIVE_DIR', str(BASE_DIR / 'archive'))
+
+# Admin report result cache (see orders/report_cache.py)
+REPORT_CACHE_ALIAS = 'default'
+REPORT_CACHE_LIVE_TTL = 60  # seconds, for ranges that include today
+REPORT_CACHE_HISTORICAL_TTL = 6 * 60 * 60  # seconds, for ranges entirely in the past (with CACHE_SHARED only)
+REPORT_CACHE_MAX_DAYS = 400  # longer ranges are computed on every request
+REPORT_CACHE_LOCK_TIMEOUT = 10  # seconds a concurrent request waits for the first one's result
+
+# Menu recommendations (see orders/recommendations.py and `manage.py compute_food_preferences`)
+RECOMMENDATION_TOP_K = 20  # foods kept per user/company
+RECOMMENDATION_WINDOW_DAYS = 180  # order history considered
+RECOMMENDATION_RECENT_DAYS = 30  # orders this recent count twice
+
+# Kitchen demand forecasts (see orders/forecasting.py and `manage.py forecast_demand`)
+FORECAST_HORIZON_DAYS = 14  # how far ahead menus are forecast
+FORECAST_HISTORY_DAYS = 365  # order history the forecast learns from
+
+# Idempotency keys for retried POSTs (see core/idempotency.py and `manage.py purge_idempotency_keys`)
+IDEMPOTENCY_KEY_TTL_HOURS = 24  # how long a stored response can be replayed
+
+# Food catalog search (see menu/search.py)
+FOOD_SEARCH_PRICE_BANDS = (50000, 100000, 150000)  # upper bounds of the facet price bands
+FOOD_SEARCH_PAGE_SIZE = 50
+
+# Wallet ledger reconciliation (see wallets/reconciliation.py and `manage.py reconcile_ledger`)
+LEDGER_CHECKPOINT_LAG_SECONDS = 15 * 60  # entries younger than this stay out of the checkpoints
+
+# Cold-start budget of a worker process (see core/startup.py and `manage.py import_profile`)
+STARTUP_BUDGET_SECONDS = float(os.environ.get('STARTUP_BUDGET_SECONDS', 3))
+
 # ==================== Logging ====================
 LOGGING = {
     'version': 1,
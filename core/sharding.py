@@ -0,0 +1,244 @@
+# core/sharding.py
+"""
+Optional sharding of tenant data by company.
+
+TENANT_SHARDS adds database aliases ("shards") and TENANT_SHARD_MAP assigns
+companies to them; companies that are not mapped stay on the primary
+("default"). Each shard holds the full schema (`migrate --database <alias>`):
+
+* tenant data - users, orders, wallets and the ledger, rollups and every
+  other per-company table - lives only on the company's shard;
+* reference data - companies, menu items, schedules and daily menus - is
+  always written to the primary and copied to every shard when that commits
+  (by core/signals.py, or by copy_to_shards() after writes that send no
+  signals), so a shard can join its orders with the menus they belong to.
+  `manage.py sync_shards` copies it in full, for new shards and after
+  changes made outside the app.
+
+Routing follows the tenant context. Requests carry the company in their JWT
+and core.middleware.TenantShardMiddleware runs them inside
+`for_company(company_id)`; `TenantShardRouter` then sends every query to that
+shard, and `current_alias()` gives transaction.atomic() the same alias
+(`on_commit()` below also keeps the context for the callback). Rows read
+from a shard are saved back to it; reference data is always written to the
+primary.
+
+Outside a tenant context queries use the primary. Super-admin views that act
+on one company (deposits, adding employees) enter `for_company()` themselves;
+super-admin reports run once per shard with `fan_out()` and merge the
+results. `manage.py run_on_shards <command>` runs a maintenance command on
+every shard.
+
+User, order and other tenant ids are only unique within a shard, and
+usernames are not checked for uniqueness across shards.
+"""
+import contextvars
+import copy
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+PRIMARY = 'default'
+
+# Written to the primary and copied to every shard (see core/signals.py), parents first.
+REFERENCE_MODELS = (
+    'menu.FoodCategory',
+    'menu.FoodItem',
+    'menu.SideDish',
+    'companies.Company',
+    'schedules.Schedule',
+    'schedules.DailyMenu',
+)
+
+_tenant = contextvars.ContextVar('tenant_shard', default=None)
+
+
+def shard_map():
+    return getattr(settings, 'TENANT_SHARD_MAP', {})
+
+
+def enabled():
+    return bool(shard_map())
+
+
+def shard_for_company(company_id):
+    """The alias holding `company_id`'s tenant data."""
+    if company_id is None:
+        return PRIMARY
+    return shard_map().get(int(company_id), PRIMARY)
+
+
+def shard_aliases():
+    """Every alias other than the primary that has companies mapped to it."""
+    return sorted(set(shard_map().values()) - {PRIMARY})
+
+
+def all_aliases():
+    return [PRIMARY, *shard_aliases()]
+
+
+def current_alias():
+    """The alias of the active tenant context, for transaction.atomic(using=...)."""
+    return _tenant.get() or PRIMARY
+
+
+@contextmanager
+def using_shard(alias):
+    """Runs the block with every query (and transaction) on `alias`."""
+    token = _tenant.set(alias)
+    try:
+        yield alias
+    finally:
+        _tenant.reset(token)
+
+
+def for_company(company_id):
+    return using_shard(shard_for_company(company_id))
+
+
+def on_commit(function):
+    """
+    transaction.on_commit() for the current alias's transaction; `function`
+    runs in the same tenant context, even when the commit happens outside it.
+    """
+    alias = current_alias()
+
+    def run():
+        with using_shard(alias):
+            function()
+    transaction.on_commit(run, using=alias)
+
+
+def fan_out(function):
+    """Calls `function()` once per alias inside its context; returns the results."""
+    if not enabled():
+        return [function()]
+    results = []
+    for alias in all_aliases():
+        with using_shard(alias):
+            results.append(function())
+    return results
+
+
+def locate_user(**lookup):
+    """(alias, user) for the first alias with a user matching `lookup`, or (PRIMARY, None)."""
+    from users.models import User
+
+    for alias in all_aliases():
+        user = User.objects.using(alias).filter(**lookup).first()
+        if user is not None:
+            return alias, user
+    return PRIMARY, None
+
+
+def is_reference(model):
+    if model._meta.auto_created:  # M2M through tables follow their owner
+        model = model._meta.auto_created
+    return model._meta.label in REFERENCE_MODELS
+
+
+def reference_models():
+    return [apps.get_model(label) for label in REFERENCE_MODELS]
+
+
+def _m2m_through_models(model):
+    return [field.remote_field.through for field in model._meta.local_many_to_many]
+
+
+def upsert_rows(alias, model, rows):
+    """Inserts or updates copies of `rows` (same pk) on `alias`. Sends no signals."""
+    if not rows:
+        return
+    model._base_manager.using(alias).bulk_create(
+        [copy.copy(row) for row in rows],
+        update_conflicts=True,
+        unique_fields=[model._meta.pk.name],
+        update_fields=[field.name for field in model._meta.concrete_fields if not field.primary_key],
+    )
+
+
+def copy_to_shards(model, **lookup):
+    """
+    Once the primary commits, copies the reference rows matching `lookup`,
+    with their M2M through rows, to every shard. For writes that send no
+    signals: bulk_create(), queryset update(), raw SQL.
+    """
+    if not enabled():
+        return
+
+    def copy_rows():
+        rows = list(model._base_manager.using(PRIMARY).filter(**lookup))
+        pks = [row.pk for row in rows]
+        links = {}
+        for through in _m2m_through_models(model):
+            owner = next(field.attname for field in through._meta.concrete_fields if field.related_model is model)
+            links[through] = (owner, list(through._base_manager.using(PRIMARY).filter(**{f'{owner}__in': pks})))
+        for alias in shard_aliases():
+            with transaction.atomic(using=alias):
+                upsert_rows(alias, model, rows)
+                for through, (owner, link_rows) in links.items():
+                    through._base_manager.using(alias).filter(**{f'{owner}__in': pks}).delete()
+                    through._base_manager.using(alias).bulk_create(copy.copy(row) for row in link_rows)
+    transaction.on_commit(copy_rows, using=PRIMARY)
+
+
+def sync_reference_data(alias):
+    """
+    Makes the reference tables of `alias` a copy of the primary's, in one
+    transaction, and gives its companies a wallet. Returns {label: rows}.
+    """
+    from wallets.models import Wallet
+
+    copied = {}
+    models = reference_models()
+    with using_shard(alias), transaction.atomic(using=alias):
+        # Children first, so removed rows are deleted before their parents.
+        for model in reversed(models):
+            primary_pks = model._base_manager.using(PRIMARY).values_list('pk', flat=True)
+            model._base_manager.using(alias).exclude(pk__in=list(primary_pks)).delete()
+        for model in models:
+            rows = list(model._base_manager.using(PRIMARY).all())
+            upsert_rows(alias, model, rows)
+            copied[model._meta.label] = len(rows)
+        for model in models:
+            for through in _m2m_through_models(model):
+                through._base_manager.using(alias).all().delete()
+                through._base_manager.using(alias).bulk_create(
+                    copy.copy(row) for row in through._base_manager.using(PRIMARY).all()
+                )
+        for company_id, shard in shard_map().items():
+            if shard == alias:
+                Wallet.objects.using(alias).get_or_create(company_id=company_id)
+    return copied
+
+
+class TenantShardRouter:
+    """
+    DATABASE_ROUTERS entry, listed before the replica router. Returns None
+    (letting the next router decide) when sharding does not apply.
+    """
+
+    def _route(self, model, hints):
+        alias = _tenant.get()
+        if alias is None and enabled():
+            instance = hints.get('instance')
+            if instance is not None and instance._state.db in shard_map().values():
+                alias = instance._state.db
+        # The primary is left to the replica router.
+        return alias if alias != PRIMARY else None
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints)
+
+    def db_for_write(self, model, **hints):
+        if is_reference(model):
+            return None  # Edited on the primary only, then copied to the shards.
+        return self._route(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Reference rows exist on every shard.
+        if is_reference(type(obj1)) or is_reference(type(obj2)):
+            return True
+        return None
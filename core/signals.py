@@ -0,0 +1,61 @@
+# core/signals.py
+"""
+Copies reference data (core.sharding.REFERENCE_MODELS) written on the
+primary to every tenant shard once the write commits. Does nothing while
+sharding is disabled.
+"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from . import sharding
+
+
+def _on_primary_commit(using, function):
+    if using == sharding.PRIMARY and sharding.enabled():
+        transaction.on_commit(function, using=sharding.PRIMARY)
+
+
+def copy_saved_row(sender, instance, using, raw=False, **kwargs):
+    if raw:  # loaddata
+        return
+
+    def copy():
+        for alias in sharding.shard_aliases():
+            sharding.upsert_rows(alias, sender, [instance])
+    _on_primary_commit(using, copy)
+
+
+def delete_row(sender, instance, using, **kwargs):
+    pk = instance.pk
+
+    def delete():
+        for alias in sharding.shard_aliases():
+            # Cascades to the shard's tenant rows, as it did on the primary.
+            with sharding.using_shard(alias):
+                sender._base_manager.using(alias).filter(pk=pk).delete()
+    _on_primary_commit(using, delete)
+
+
+def copy_m2m_rows(sender, instance, action, using, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # The through table's foreign key to the side that changed.
+    field = next(field for field in sender._meta.concrete_fields
+                 if field.is_relation and isinstance(instance, field.related_model))
+    lookup = {field.attname: instance.pk}
+
+    def copy():
+        rows = list(sender._base_manager.using(sharding.PRIMARY).filter(**lookup))
+        for alias in sharding.shard_aliases():
+            with transaction.atomic(using=alias):
+                sender._base_manager.using(alias).filter(**lookup).delete()
+                sender._base_manager.using(alias).bulk_create(rows)
+    _on_primary_commit(using, copy)
+
+
+for model in sharding.reference_models():
+    post_save.connect(copy_saved_row, sender=model, dispatch_uid=f'shard-copy-{model._meta.label}')
+    post_delete.connect(delete_row, sender=model, dispatch_uid=f'shard-delete-{model._meta.label}')
+    for field in model._meta.local_many_to_many:
+        m2m_changed.connect(copy_m2m_rows, sender=field.remote_field.through,
+                            dispatch_uid=f'shard-copy-{field.remote_field.through._meta.label}')
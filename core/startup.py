@@ -0,0 +1,87 @@
+# core/startup.py
+"""
+Process startup: what a gunicorn worker (or a `manage.py` run) pays before
+it can serve its first request.
+
+core/wsgi.py calls warm_up() so that, with `gunicorn --preload`, the URLconf
+and every view module are imported once in the master and shared by the
+forked workers (copy-on-write) instead of on each worker's first request.
+Heavy optional dependencies (HEAVY_OPTIONAL_MODULES) are imported inside
+the functions that need them, never at module level.
+
+profile() measures a cold start in a fresh interpreter with `-X importtime`;
+it backs `manage.py import_profile` (whose --check enforces
+STARTUP_BUDGET_SECONDS) and the startup tests.
+"""
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+
+# What a worker imports before serving: settings, apps, the WSGI stack and
+# (through warm_up) the URLconf.
+COLD_START_CODE = "import core.wsgi"
+
+# Only needed by seed_data (faker) and the image variant task (PIL).
+HEAVY_OPTIONAL_MODULES = ('faker', 'PIL')
+
+
+class StartupProfile:
+    """
+    Wall time of a cold start and `-X importtime` rows as dicts with module,
+    self_us, cumulative_us and depth (0 for modules imported directly).
+    """
+
+    def __init__(self, seconds, imports):
+        self.seconds = seconds
+        self.imports = imports
+
+    @property
+    def import_seconds(self):
+        return sum(row['cumulative_us'] for row in self.imports if row['depth'] == 0) / 1e6
+
+    def slowest(self, limit, key='cumulative_us'):
+        return sorted(self.imports, key=lambda row: row[key], reverse=True)[:limit]
+
+    def loaded(self, packages):
+        """The given top-level packages that were imported."""
+        roots = {row['module'].partition('.')[0] for row in self.imports}
+        return [package for package in packages if package in roots]
+
+
+def warm_up():
+    """Imports the URLconf, and with it every view, serializer and permission module."""
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+
+
+def _parse_importtime(stderr):
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or line.endswith('imported package'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append({
+            'module': name.strip(),
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return imports
+
+
+def profile(code=COLD_START_CODE):
+    """Runs `code` in a new interpreter; returns its wall time and per-module import times."""
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')}
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=settings.BASE_DIR, capture_output=True, text=True, env=env, check=False,
+    )
+    seconds = time.perf_counter() - started
+    if result.returncode:
+        raise RuntimeError(f"Startup failed:\n{result.stderr}")
+    return StartupProfile(seconds, _parse_importtime(result.stderr))
@@ -0,0 +1,59 @@
+# core/tests/test_authz.py
+
+from decimal import Decimal
+
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from companies.models import Company
+from core.authz import auth_context
+from core.permissions import CanManageUsers, IsAdmin, IsCompanyAdminOfTargetUser, IsSuperAdmin
+from users.models import User
+
+
+class AuthContextTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Company")
+        self.other = Company.objects.create(name="Other")
+        self.admin = User.objects.create_user(
+            username='admin', password='password123', role=User.Role.COMPANY_ADMIN, company=self.company
+        )
+        self.employee = User.objects.create_user(username='emp', password='password123', company=self.company)
+        self.outsider = User.objects.create_user(username='out', password='password123', company=self.other)
+
+    def request_for(self, user):
+        request = RequestFactory().get('/')
+        request.user = User.objects.get(pk=user.pk)
+        return request
+
+    def test_permission_checks_run_no_queries(self):
+        request = self.request_for(self.admin)
+        view = type('View', (), {'kwargs': {'user_id': str(self.employee.pk)}})()
+        employee, outsider = User.objects.get(pk=self.employee.pk), User.objects.get(pk=self.outsider.pk)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(IsSuperAdmin().has_permission(request, view))
+            self.assertTrue(IsAdmin().has_permission(request, view))
+            self.assertTrue(CanManageUsers().has_object_permission(request, view, employee))
+            self.assertFalse(CanManageUsers().has_object_permission(request, view, outsider))
+            self.assertTrue(IsCompanyAdminOfTargetUser().has_permission(request, view))
+            self.assertFalse(IsCompanyAdminOfTargetUser().has_object_permission(request, view, outsider))
+        self.assertIs(auth_context(request), auth_context(request))
+
+    def test_user_list_is_scoped_to_the_admins_company(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('user-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(row['username'] for row in response.data), ['admin', 'emp'])
+        self.assertEqual(self.client.get(reverse('user-detail', args=[self.outsider.pk])).status_code, 404)
+
+    def test_budget_allocation_to_another_company_is_forbidden(self):
+        self.company.wallet.balance = Decimal('100')
+        self.company.wallet.save()
+        self.client.force_authenticate(user=self.admin)
+
+        url = reverse('admin-allocate-budget', args=[self.outsider.pk])
+        self.assertEqual(self.client.post(url, {'amount': '10.00'}, format='json').status_code, 403)
+        url = reverse('admin-allocate-budget', args=[self.employee.pk])
+        self.assertEqual(self.client.post(url, {'amount': '10.00'}, format='json').status_code, 200)
@@ -0,0 +1,50 @@
+# core/tests/test_compression.py
+
+import gzip
+import json
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from core.middleware import CompressionMiddleware, brotli, choose_encoding
+
+
+def json_response(size):
+    body = json.dumps({'items': ['x' * 10] * (size // 14)})
+    return HttpResponse(body, content_type='application/json')
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def run_middleware(self, path, response, accept='gzip, br'):
+        request = self.factory.get(path, HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda req: response)(request)
+
+    def test_negotiation_prefers_brotli_and_respects_q_zero(self):
+        expected = 'br' if brotli is not None else 'gzip'
+        self.assertEqual(choose_encoding('gzip, deflate, br'), expected)
+        self.assertEqual(choose_encoding('br;q=0, gzip'), 'gzip')
+        self.assertIsNone(choose_encoding('identity'))
+
+    def test_large_api_response_is_gzipped(self):
+        response = self.run_middleware('/api/schedules/my-menu/', json_response(5000), accept='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn(b'items', gzip.decompress(response.content))
+
+    def test_small_response_below_threshold_is_untouched(self):
+        response = self.run_middleware('/api/schedules/my-menu/', json_response(200))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_excluded_prefix_is_untouched(self):
+        response = self.run_middleware('/api/token/', json_response(5000))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response_is_compressed_incrementally(self):
+        rows = [b'{"row": %d}\n' % i for i in range(500)]
+        streaming = StreamingHttpResponse(iter(rows), content_type='application/json')
+        response = self.run_middleware('/api/admin/reports/', streaming, accept='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(rows))
@@ -0,0 +1,77 @@
+# core/tests/test_db_routing.py
+
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import db_routing
+from core.middleware import ReplicaRoutingMiddleware
+from orders import report_cache
+from orders.models import Order
+from users.models import User
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(db_routing, 'replica_available', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = db_routing.PrimaryReplicaRouter()
+        self.user = User(pk=7, username='emp')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def handle(self, method, path, write=False):
+        """Runs a request through the middleware; returns the alias its reads used."""
+        request = getattr(RequestFactory(), method)(path, **self.auth)
+        used = []
+
+        def view(request):
+            used.append(self.router.db_for_read(Order))
+            if write:
+                self.router.db_for_write(Order)
+                used.append(self.router.db_for_read(Order))
+            request.user = self.user
+            return mock.Mock()
+
+        ReplicaRoutingMiddleware(view)(request)
+        return used
+
+    def test_reads_on_listed_paths_use_the_replica(self):
+        self.assertEqual(self.handle('get', '/api/admin/reports/'), ['replica'])
+        self.assertEqual(self.handle('get', '/api/orders/'), ['default'])
+        self.assertEqual(self.handle('post', '/api/admin/reports/'), ['default'])
+
+    def test_writes_pin_the_user_to_the_primary(self):
+        self.assertEqual(self.handle('post', '/api/orders/', write=True), ['default', 'default'])
+        self.assertEqual(self.handle('get', '/api/admin/reports/'), ['default'])
+
+        self.auth = {}  # Anonymous requests are never pinned.
+        self.assertEqual(self.handle('get', '/api/menu/items/'), ['replica'])
+
+    def test_write_inside_a_replica_request_switches_to_the_primary(self):
+        self.assertEqual(self.handle('get', '/api/schedules/', write=True), ['replica', 'default'])
+
+    def test_everything_uses_the_primary_outside_requests(self):
+        self.assertEqual(self.router.db_for_read(Order), 'default')
+        with db_routing.use_primary():
+            self.assertEqual(self.router.db_for_read(Order), 'default')
+
+    def test_cached_reports_are_built_from_the_primary(self):
+        today = timezone.now().date()
+        token = db_routing.begin_request(True)
+        try:
+            cached = report_cache.cached_report('r', today, today, lambda: self.router.db_for_read(Order), today=today)
+            too_long = today - timedelta(days=settings.REPORT_CACHE_MAX_DAYS)
+            uncached = report_cache.cached_report('r', too_long, today, lambda: self.router.db_for_read(Order),
+                                                  today=today)
+        finally:
+            db_routing.end_request(token)
+        # Replica lag must not be cached under the new invalidation token.
+        self.assertEqual((cached, uncached), ('default', 'replica'))
+
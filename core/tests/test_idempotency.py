@@ -0,0 +1,86 @@
+# core/tests/test_idempotency.py
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from companies.models import Company
+from core.models import IdempotencyKey
+from menu.models import FoodItem
+from orders.models import Order
+from schedules.models import DailyMenu, Schedule
+from users.models import User
+from wallets.models import Transaction, Wallet
+
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Company")
+        self.super_admin = User.objects.create_user(username='super', password='password123', role=User.Role.SUPER_ADMIN)
+        self.deposit_url = reverse('wallet-deposit', args=[self.company.pk])
+
+    def deposit(self, amount, key):
+        self.client.force_authenticate(user=self.super_admin)
+        return self.client.post(self.deposit_url, {'amount': amount}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retried_deposit_is_credited_once(self):
+        first = self.deposit('100.00', 'abc')
+        with self.assertNumQueries(1):
+            retry = self.deposit('100.00', 'abc')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual((retry.status_code, retry.content), (first.status_code, first.content))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Wallet.objects.get(company=self.company).balance, Decimal('100.00'))
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_key_reused_for_another_request_is_rejected(self):
+        self.deposit('100.00', 'abc')
+        self.assertEqual(self.deposit('250.00', 'abc').status_code, 422)
+        self.assertEqual(self.deposit('250.00', 'def').status_code, 200)
+        self.assertEqual(Wallet.objects.get(company=self.company).balance, Decimal('350.00'))
+
+    def test_in_progress_and_expired_keys(self):
+        record = IdempotencyKey.objects.create(
+            user=self.super_admin, scope='wallets.deposit', key='abc', fingerprint='x',
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        response = self.deposit('100.00', 'abc')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+
+        # The request that claimed it may have committed before dying.
+        IdempotencyKey.objects.filter(pk=record.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.deposit('100.00', 'abc').status_code, 409)
+        self.assertEqual(Transaction.objects.count(), 0)
+
+        IdempotencyKey.objects.filter(pk=record.pk).update(expires_at=timezone.now())
+        self.assertEqual(self.deposit('100.00', 'abc').status_code, 200)
+        self.assertEqual(IdempotencyKey.objects.get(pk=record.pk).response_status, 200)
+
+    def test_failed_validation_is_not_stored(self):
+        self.assertEqual(self.deposit('-5', 'abc').status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_retried_order_is_created_once(self):
+        today = timezone.now().date()
+        schedule = Schedule.objects.create(name="Schedule", company=self.company,
+                                           start_date=today, end_date=today + timedelta(days=30))
+        self.company.active_schedule = schedule
+        self.company.save()
+        food = FoodItem.objects.create(name="Kebab", description="", price=Decimal('100.00'))
+        menu = DailyMenu.objects.create(schedule=schedule, date=today + timedelta(days=5))
+        menu.available_foods.set([food])
+        employee = User.objects.create_user(username='emp', password='password123', company=self.company,
+                                            budget=Decimal('500.00'))
+
+        self.client.force_authenticate(user=employee)
+        for _ in range(2):
+            response = self.client.post(reverse('order-list'), {'daily_menu': menu.pk, 'food_item': food.pk},
+                                        format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(User.objects.get(pk=employee.pk).budget, Decimal('400.00'))
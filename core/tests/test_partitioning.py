@@ -0,0 +1,110 @@
+# core/tests/test_partitioning.py
+
+import unittest
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+
+from core import partitioning
+from menu.models import FoodItem, SideDish
+from orders.models import Order
+from schedules.models import DailyMenu, Schedule
+from users.models import User
+
+
+class PartitionHelperTests(TestCase):
+    def test_month_arithmetic(self):
+        self.assertEqual(partitioning.add_months(date(2025, 11, 1), 3), date(2026, 2, 1))
+        self.assertEqual(partitioning.add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(
+            partitioning.months_between(date(2025, 12, 15), date(2026, 2, 3)),
+            [date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1)],
+        )
+
+    def test_partition_names_round_trip(self):
+        name = partitioning.partition_name('orders_order', date(2026, 3, 1))
+        self.assertEqual(name, 'orders_order_p2026_03')
+        self.assertEqual(partitioning.partition_month('orders_order', name), date(2026, 3, 1))
+        self.assertIsNone(partitioning.partition_month('orders_order', 'orders_order_default'))
+
+    def test_partition_bounds(self):
+        self.assertEqual(
+            partitioning.create_partition_sql('wallets_transaction', date(2026, 12, 1)),
+            'CREATE TABLE IF NOT EXISTS "wallets_transaction_p2026_12" PARTITION OF "wallets_transaction" '
+            "FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')",
+        )
+
+    @override_settings(DB_PARTITIONING=True)
+    def test_everything_is_a_noop_without_postgres(self):
+        if connection.vendor == 'postgresql':
+            self.skipTest("Only meaningful on databases without partitioning support.")
+        self.assertFalse(partitioning.convert_table(connection, 'orders_order', 'created_at'))
+        self.assertEqual(partitioning.ensure_future_partitions(connection, 'orders_order'), [])
+        out = StringIO()
+        call_command('manage_partitions', stdout=out)
+        self.assertIn("disabled", out.getvalue())
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "Partitioning requires PostgreSQL.")
+@override_settings(DB_PARTITIONING=True)
+class PartitionedOrdersTests(TestCase):
+    def setUp(self):
+        with connection.cursor() as cursor:
+            # Renaming a table fails while it has deferred constraint checks queued.
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        self.this_month = partitioning.month_start(date.today())
+        self.earlier = partitioning.add_months(self.this_month, -2)
+        user = User.objects.create_user(username='emp', password='password123')
+        food = FoodItem.objects.create(name="Kebab", description="", price=100)
+        self.salad = SideDish.objects.create(name="Salad", price=10)
+        schedule = Schedule.objects.create(name="Schedule", start_date=self.earlier, end_date=self.this_month)
+        self.old_order = Order.objects.create(
+            user=user, food_item=food, daily_menu=DailyMenu.objects.create(schedule=schedule, date=self.earlier),
+        )
+        self.order = Order.objects.create(
+            user=user, food_item=food, daily_menu=DailyMenu.objects.create(schedule=schedule, date=self.this_month),
+        )
+        self.user, self.food, self.schedule = user, food, schedule
+        self.order.side_dishes.add(self.salad)
+        self.assertTrue(partitioning.convert_table(connection, 'orders_order', 'delivery_date'))
+
+    def test_delivery_date_filters_only_scan_their_months(self):
+        plan = Order.objects.filter(
+            delivery_date__gte=self.this_month, delivery_date__lt=partitioning.add_months(self.this_month, 1),
+        ).explain()
+        self.assertIn(partitioning.partition_name('orders_order', self.this_month), plan)
+        self.assertNotIn(partitioning.partition_name('orders_order', self.earlier), plan)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).side_dishes.get(), self.salad)
+
+    def test_side_dishes_cannot_point_at_missing_orders(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Order.side_dishes.through.objects.create(order_id=self.order.pk + 1000, sidedish=self.salad)
+            with connection.cursor() as cursor:
+                cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+    def test_orders_with_side_dishes_cannot_be_deleted_in_sql(self):
+        with self.assertRaises(IntegrityError), transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('DELETE FROM orders_order WHERE id = %s', [self.order.pk])
+
+    def test_orders_can_still_be_deleted_and_moved(self):
+        Order.objects.filter(pk=self.order.pk).update(delivery_date=self.earlier)
+        self.assertEqual(self.order.side_dishes.count(), 1)
+        self.order.delete()
+        self.assertFalse(Order.side_dishes.through.objects.exists())
+
+    def test_new_partitions_take_rows_with_side_dishes_from_the_default(self):
+        later = partitioning.add_months(self.this_month, 5)
+        order = Order.objects.create(
+            user=self.user, food_item=self.food, daily_menu=DailyMenu.objects.create(schedule=self.schedule, date=later),
+        )
+        order.side_dishes.add(self.salad)
+
+        created = partitioning.ensure_future_partitions(connection, 'orders_order', months_ahead=5)
+        self.assertIn(partitioning.partition_name('orders_order', later), created)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM orders_order WHERE id = %s', [order.pk])
+            self.assertEqual(cursor.fetchone()[0], partitioning.partition_name('orders_order', later))
+        self.assertEqual(order.side_dishes.get(), self.salad)
@@ -0,0 +1,262 @@
+# core/tests/test_sharding.py
+
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from companies.models import Company
+from core import sharding
+from core.middleware import TenantShardMiddleware
+from menu.models import FoodItem
+from orders.models import Order
+from orders.reports import merge_admin_reports
+from orders.rollups import merge_dashboard_stats
+from schedules import capacity
+from schedules.models import DailyMenu, MenuItemCapacity, Schedule
+from users.models import User
+from wallets.models import Wallet
+
+SHARD = 'shard_a'
+
+
+@override_settings(TENANT_SHARD_MAP={2: SHARD})
+class TenantShardRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = sharding.TenantShardRouter()
+
+    def test_queries_follow_the_tenant_context(self):
+        self.assertIsNone(self.router.db_for_read(Order))
+        with sharding.for_company(2):
+            self.assertEqual(self.router.db_for_read(Order), SHARD)
+            self.assertEqual(self.router.db_for_write(Order), SHARD)
+            # Reference data is read from the shard's copy but written to the primary.
+            self.assertEqual(self.router.db_for_read(FoodItem), SHARD)
+            self.assertIsNone(self.router.db_for_write(FoodItem))
+            self.assertIsNone(self.router.db_for_write(DailyMenu.available_foods.through))
+        with sharding.for_company(1):
+            self.assertIsNone(self.router.db_for_read(Order))  # Left to the replica router.
+
+    def test_rows_read_from_a_shard_are_saved_back_to_it(self):
+        order = Order()
+        order._state.db = SHARD
+        self.assertEqual(self.router.db_for_write(Order, instance=order), SHARD)
+        order._state.db = 'replica'
+        self.assertIsNone(self.router.db_for_write(Order, instance=order))
+
+    def test_middleware_enters_the_company_shard(self):
+        seen = []
+
+        def view(request):
+            seen.append(sharding.current_alias())
+            return mock.Mock()
+
+        for company_id in (2, 1, None):
+            token = AccessToken.for_user(User(pk=7))
+            token['company_id'] = company_id
+            request = RequestFactory().get('/api/orders/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            TenantShardMiddleware(view)(request)
+        TenantShardMiddleware(view)(RequestFactory().get('/api/orders/'))
+        self.assertEqual(seen, [SHARD, 'default', 'default', 'default'])
+
+    def test_fan_out_runs_once_per_alias(self):
+        self.assertEqual(sharding.fan_out(sharding.current_alias), ['default', SHARD])
+        with override_settings(TENANT_SHARD_MAP={}):
+            self.assertEqual(sharding.fan_out(sharding.current_alias), ['default'])
+
+
+class MergeTests(SimpleTestCase):
+    def test_admin_reports_are_summed(self):
+        def report(orders, food_orders, users):
+            return {
+                'summary': {'orders_today': orders, 'pending_orders_total': orders, 'total_sales_today': Decimal('10.00')},
+                'top_items': [{'foodId': 1, 'name': 'Kebab', 'ordered': food_orders}],
+                'sales_by_date': [{'date': '2026-01-01', 'orders': orders, 'revenue': Decimal('10.00')}],
+                'company_stats': [{'id': 1, 'name': 'A', 'active_users': users, 'orders': orders}],
+                'user_stats': {'total_users': users, 'active_last_30_days': 0},
+            }
+
+        merged = merge_admin_reports([report(1, 2, 3), report(4, 5, 6)])
+        self.assertEqual(merged['summary'], {'orders_today': 5, 'pending_orders_total': 5,
+                                             'total_sales_today': Decimal('20.00')})
+        self.assertEqual(merged['top_items'], [{'foodId': 1, 'name': 'Kebab', 'ordered': 7}])
+        self.assertEqual(merged['sales_by_date'], [{'date': '2026-01-01', 'orders': 5, 'revenue': Decimal('20.00')}])
+        self.assertEqual(merged['company_stats'], [{'id': 1, 'name': 'A', 'active_users': 9, 'orders': 5}])
+        self.assertEqual(merged['user_stats'], {'total_users': 9, 'active_last_30_days': 0})
+
+    def test_dashboard_top_foods_are_ranked_over_all_shards(self):
+        now = timezone.now()
+        merged = merge_dashboard_stats([
+            {'orders_today': 1, 'pending_orders_total': 2, 'snapshot_at': now,
+             'top_5_foods': [{'name': 'Kebab', 'count': 3}, {'name': 'Pasta', 'count': 2}]},
+            {'orders_today': 4, 'pending_orders_total': 5, 'snapshot_at': None,
+             'top_5_foods': [{'name': 'Pasta', 'count': 2}]},
+        ], top_foods_limit=1)
+        self.assertEqual(merged, {'orders_today': 5, 'pending_orders_total': 7, 'snapshot_at': now,
+                                  'top_5_foods': [{'name': 'Pasta', 'count': 4}]})
+
+
+@unittest.skipUnless(SHARD in settings.DATABASES, f"set TENANT_SHARDS={SHARD}=sqlite:///{SHARD}.sqlite3 to run")
+class ShardedApiTests(APITestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        today = timezone.now().date()
+        self.food = FoodItem.objects.create(name="Kebab", price=Decimal('100.00'))
+        self.menus = {}
+        for name in ('A', 'B'):
+            company = Company.objects.create(name=f"Company {name}")
+            company.active_schedule = Schedule.objects.create(
+                name=name, company=company, start_date=today, end_date=today + timedelta(days=30),
+            )
+            company.save()
+            menu = DailyMenu.objects.create(schedule=company.active_schedule, date=today + timedelta(days=5))
+            menu.available_foods.set([self.food])
+            self.menus[company] = menu
+        self.company_a, self.company_b = self.menus
+
+        settings_override = override_settings(TENANT_SHARD_MAP={self.company_b.pk: SHARD})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        sharding.sync_reference_data(SHARD)
+
+        self.super_admin = User.objects.create_user(username='super', password='password123',
+                                                    role=User.Role.SUPER_ADMIN)
+        self.employee_a = User.objects.create_user(username='emp_a', password='password123',
+                                                   company=self.company_a, budget=Decimal('500.00'))
+        with sharding.for_company(self.company_b.pk):
+            self.employee_b = User.objects.create_user(username='emp_b', password='password123',
+                                                       company=self.company_b, budget=Decimal('500.00'))
+
+    def login(self, username):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': username, 'password': 'password123'})
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return response.data
+
+    def order(self, username, company):
+        self.login(username)
+        # The rollups are updated once the order commits on its shard.
+        with self.captureOnCommitCallbacks(using=sharding.shard_for_company(company.pk), execute=True):
+            response = self.client.post(reverse('order-list'),
+                                        {'daily_menu': self.menus[company].pk, 'food_item': self.food.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_orders_and_users_live_on_the_company_shard(self):
+        self.assertEqual(User.objects.using(SHARD).get().username, 'emp_b')
+        tokens = self.login('emp_b')
+        refreshed = self.client.post(reverse('token_refresh'), {'refresh': tokens['refresh']})
+        self.assertEqual(refreshed.status_code, 200)
+
+        self.order('emp_b', self.company_b)
+        self.assertEqual(Order.objects.using(SHARD).count(), 1)
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(User.objects.using(SHARD).get().budget, Decimal('400.00'))
+
+    def test_super_admin_reports_merge_every_shard(self):
+        self.order('emp_a', self.company_a)
+        self.order('emp_b', self.company_b)
+
+        self.login('super')
+        end = (timezone.now().date() + timedelta(days=10)).isoformat()
+        report = self.client.get(reverse('admin-reports'), {'to': end}).data
+        self.assertEqual(report['summary']['pending_orders_total'], 2)
+        self.assertEqual(report['top_items'][0]['ordered'], 2)
+        self.assertEqual({row['name']: row['orders'] for row in report['company_stats']},
+                         {'Company A': 1, 'Company B': 1})
+        self.assertEqual(report['user_stats']['total_users'], 3)
+
+        only_b = self.client.get(reverse('admin-reports'), {'to': end, 'companyId': self.company_b.pk}).data
+        self.assertEqual(only_b['summary']['pending_orders_total'], 1)
+        stats = self.client.get(reverse('dashboard-stats')).data
+        self.assertEqual(stats['pending_orders_total'], 2)
+
+    def test_deposit_credits_the_shard_wallet(self):
+        self.login('super')
+        response = self.client.post(reverse('wallet-deposit', args=[self.company_b.pk]), {'amount': '50.00'},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Wallet.objects.using(SHARD).get(company=self.company_b).balance, Decimal('50.00'))
+        self.assertEqual(Wallet.objects.get(company=self.company_b).balance, Decimal('0.00'))
+
+    def test_portion_caps_are_enforced_on_the_shard(self):
+        menu = self.menus[self.company_b]
+        self.login('super')
+        response = self.client.put(
+            reverse('schedule-daily-menus-capacities', kwargs={'schedule_pk': menu.schedule_id, 'pk': menu.pk}),
+            {'limits': {str(self.food.pk): 1}}, format='json',
+        )
+        self.assertEqual(response.data['remaining_portions'], {str(self.food.pk): 1})
+        self.order('emp_b', self.company_b)
+
+        with sharding.for_company(self.company_b.pk):
+            User.objects.create_user(username='emp_b2', password='password123', company=self.company_b,
+                                     budget=Decimal('500.00'))
+        self.login('emp_b2')
+        response = self.client.post(reverse('order-list'), {'daily_menu': menu.pk, 'food_item': self.food.pk},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("sold out", str(response.data))
+        self.assertEqual(Order.objects.using(SHARD).count(), 1)
+
+    def test_default_schedule_menus_cannot_be_capped(self):
+        schedule = Schedule.objects.create(name="Default", start_date=timezone.now().date(),
+                                           end_date=timezone.now().date() + timedelta(days=30))
+        menu = DailyMenu.objects.create(schedule=schedule, date=timezone.now().date() + timedelta(days=5))
+        menu.available_foods.set([self.food])
+        self.login('super')
+        response = self.client.put(
+            reverse('schedule-daily-menus-capacities', kwargs={'schedule_pk': schedule.pk, 'pk': menu.pk}),
+            {'limits': {str(self.food.pk): 1}}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("default schedule", str(response.data))
+        self.assertFalse(MenuItemCapacity.objects.exists())
+        with self.assertRaises(capacity.LimitsNotSupported):
+            capacity.set_limits(menu, {self.food.pk: 1})
+
+    def test_bulk_and_cloned_menus_are_copied_to_the_shards(self):
+        schedule = self.company_b.active_schedule
+        day = (timezone.now().date() + timedelta(days=6)).isoformat()
+        self.login('super')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('schedule-daily-menus-bulk', kwargs={'schedule_pk': schedule.pk}),
+                {'menus': [{'date': day, 'available_foods': [self.food.pk], 'available_sides': []}]}, format='json',
+            )
+        self.assertEqual(response.status_code, 201, response.data)
+        menu = DailyMenu.objects.using(SHARD).get(schedule=schedule, date=day)
+        self.assertEqual(list(menu.available_foods.values_list('pk', flat=True)), [self.food.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('schedule-clone', kwargs={'pk': schedule.pk}), {
+                'company_ids': [self.company_b.pk], 'start_date': '2030-07-01', 'activate': True,
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        clone = Company.objects.using(SHARD).get(pk=self.company_b.pk).active_schedule
+        self.assertEqual(clone.pk, response.data[0]['id'])
+        self.assertEqual(DailyMenu.objects.using(SHARD).filter(schedule=clone).count(), 2)
+        self.assertEqual(DailyMenu.available_foods.through.objects.using(SHARD)
+                         .filter(dailymenu__schedule=clone).count(), 2)
+
+    def test_reference_edits_are_copied_to_the_shards(self):
+        menu = self.menus[self.company_b]
+        with self.captureOnCommitCallbacks(execute=True):
+            pasta = FoodItem.objects.create(name="Pasta", price=Decimal('80.00'))
+            menu.available_foods.add(pasta)
+        self.assertEqual(FoodItem.objects.using(SHARD).get(pk=pasta.pk).name, "Pasta")
+        self.assertEqual(set(DailyMenu.objects.using(SHARD).get(pk=menu.pk).available_foods.values_list('name', flat=True)),
+                         {"Kebab", "Pasta"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pasta.delete()
+        self.assertFalse(FoodItem.objects.using(SHARD).filter(pk=pasta.pk).exists())
@@ -0,0 +1,25 @@
+# core/tests/test_startup.py
+
+from django.test import SimpleTestCase
+
+from core import startup
+
+
+# Wall-clock time is left to `manage.py import_profile --check`.
+class ColdStartTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # A fresh interpreter importing the app the way a gunicorn worker does.
+        cls.profile = startup.profile(
+            startup.COLD_START_CODE + "\n"
+            "from django.db import connections\n"
+            "assert all(connection.connection is None for connection in connections.all()), 'query at import'\n"
+        )
+
+    def test_heavy_optional_dependencies_are_not_imported(self):
+        self.assertEqual(self.profile.loaded(startup.HEAVY_OPTIONAL_MODULES), [])
+
+    def test_views_are_loaded_for_preloading(self):
+        modules = {row['module'] for row in self.profile.imports}
+        self.assertTrue({'orders.views', 'orders.views_admin', 'users.auth_views'} <= modules)
@@ -0,0 +1,102 @@
+# core/tests/test_throttling.py
+
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core import throttling
+from core.throttling import IPRateBucket
+
+
+def rest_framework(**overrides):
+    return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, **overrides})
+
+
+class View:
+    throttle_scope = 'test'
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+
+    def allowed(self):
+        bucket = IPRateBucket()
+        return bucket.allow_request(self.request, View()), bucket.wait()
+
+    @rest_framework(DEFAULT_THROTTLE_RATES={'test.ip': '2/min'})
+    @override_settings(CACHE_SHARED=True)
+    def test_burst_then_wait(self):
+        self.assertEqual(self.allowed(), (True, None))
+        self.assertEqual(self.allowed(), (True, None))
+        allowed, wait = self.allowed()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 30, delta=1)
+
+    @rest_framework(DEFAULT_THROTTLE_RATES={'test.ip': '6/min'})
+    @override_settings(CACHE_SHARED=False, WEB_CONCURRENCY=3)
+    def test_process_local_buckets_get_their_share_of_the_rate(self):
+        self.assertEqual(self.allowed(), (True, None))
+        self.assertEqual(self.allowed(), (True, None))
+        allowed, wait = self.allowed()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 30, delta=1)
+
+    @rest_framework(DEFAULT_THROTTLE_RATES={})
+    def test_unconfigured_scope_is_not_throttled(self):
+        for _ in range(5):
+            self.assertEqual(self.allowed(), (True, None))
+
+    @rest_framework(DEFAULT_THROTTLE_RATES={'test.ip': '1/min'})
+    def test_falls_back_to_local_buckets_without_cache(self):
+        with mock.patch.object(throttling, 'cache') as broken:
+            broken.get.side_effect = ConnectionError
+            with self.assertLogs('core.throttling', 'WARNING'):
+                self.assertEqual(self.allowed(), (True, None))
+                self.assertFalse(self.allowed()[0])
+
+
+class AdmissionControlTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    @rest_framework(ADMISSION_LIMITS={'login': 1}, ADMISSION_RETRY_AFTER=2)
+    def test_sheds_requests_over_the_limit(self):
+        cache.set('admission:login', 1)
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'x', 'password': 'y'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(cache.get('admission:login'), 1)
+
+    @rest_framework(ADMISSION_LIMITS={'login': 4})
+    @override_settings(CACHE_SHARED=False, WEB_CONCURRENCY=2)
+    def test_process_local_counters_get_their_share_of_the_limit(self):
+        cache.set('admission:login', 2)
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'x', 'password': 'y'})
+        self.assertEqual(response.status_code, 429)
+
+    @rest_framework(ADMISSION_LIMITS={'login': 1})
+    def test_slot_is_released_after_the_request(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'x', 'password': 'y'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(cache.get('admission:login'), 0)
+
+    def test_counter_never_goes_below_zero(self):
+        # The counter expired while two requests were in flight; a third re-created it.
+        self.assertEqual(throttling._adjust_in_flight('admission:test', 1), 1)
+        for _ in range(3):
+            throttling._adjust_in_flight('admission:test', -1)
+        self.assertEqual(cache.get('admission:test'), 0)
+        self.assertEqual(throttling._adjust_in_flight('admission:test', 1), 1)
+
+    @rest_framework(ADMISSION_SLOT_TIMEOUT=60)
+    def test_admitting_a_request_refreshes_the_counter(self):
+        with mock.patch.object(cache, 'touch', wraps=cache.touch) as touch:
+            throttling._adjust_in_flight('admission:test', 1)
+            throttling._adjust_in_flight('admission:test', -1)
+        touch.assert_called_once_with('admission:test', 60)
@@ -0,0 +1,225 @@
+# core/throttling.py
+"""
+Rate limiting and admission control for expensive endpoints.
+
+Token buckets
+-------------
+`UserRateBucket`, `CompanyRateBucket` and `IPRateBucket` are DRF throttle
+classes keyed by the requesting user, their company and the client IP. A view
+opts in with `throttle_scope` and lists the buckets in `throttle_classes`;
+each bucket reads its rate from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] under
+"<scope>.<kind>" (e.g. "orders.user": "60/min") and is skipped when no rate is
+configured. A rate of N per period allows bursts of N requests and refills
+continuously at N per period.
+
+Buckets are stored as a single timestamp per key (the generic cell rate
+algorithm, equivalent to a token bucket) in the default cache. With a shared
+cache (settings.CACHE_SHARED, i.e. Redis) all workers share them. With the
+per-process memory cache every worker keeps its own buckets, so the rates are
+divided by settings.WEB_CONCURRENCY to keep the configured totals. If the cache
+is unreachable the buckets fall back to this process's memory rather than
+failing or letting everything through.
+
+Admission control
+-----------------
+`AdmissionControlMixin` caps the number of concurrent unsafe requests per
+scope across all workers, from REST_FRAMEWORK['ADMISSION_LIMITS'] (divided
+between the workers, like the rates, without a shared cache). Over the cap a
+request is answered 429 with Retry-After straight away, before the view takes
+any row locks or hashes any password.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import Throttled
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from .authz import auth_context
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'60/min' -> (60, 60.0). Returns None for a missing rate."""
+    if not rate:
+        return None
+    count, _, period = rate.partition('/')
+    return int(count), float(PERIODS[period.strip().lower()])
+
+
+def rest_setting(name, default=None):
+    return getattr(settings, 'REST_FRAMEWORK', {}).get(name, default)
+
+
+def per_process(limit):
+    """This process's share of a limit meant for all workers together."""
+    if settings.CACHE_SHARED:
+        return limit
+    return max(limit // settings.WEB_CONCURRENCY, 1)
+
+
+class _LocalStore:
+    """In-process stand-in for the cache, used while the cache is down."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, function, timeout):
+        with self._lock:
+            now = time.monotonic()
+            value, expires = self._values.get(key, (None, 0))
+            if expires <= now:
+                value = None
+            result, value = function(value)
+            self._values[key] = (value, now + timeout)
+            return result
+
+
+_local = _LocalStore()
+
+
+def _cache_update(key, function, timeout):
+    """
+    Applies `function(old value) -> (result, new value)` to a cache key.
+    The read-modify-write is not atomic across workers; a race lets at most
+    one extra request through, which is fine for load shedding.
+    """
+    try:
+        result, value = function(cache.get(key))
+        cache.set(key, value, timeout)
+        return result
+    except Exception:  # Cache backend unavailable
+        logger.warning("Throttle cache unavailable, using process-local buckets", exc_info=True)
+        return _local.update(key, function, timeout)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base class; subclasses set `kind` and implement `get_ident_key()`."""
+
+    kind = None
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self._wait = None
+        scope = getattr(view, 'throttle_scope', None)
+        rate = parse_rate(rest_setting('DEFAULT_THROTTLE_RATES', {}).get(f"{scope}.{self.kind}")) if scope else None
+        ident = self.get_ident_key(request) if rate else None
+        if ident is None:
+            return True
+
+        count, period = rate
+        count = per_process(count)
+        interval = period / count
+        tolerance = period - interval
+
+        def take(arrival):
+            now = time.time()
+            arrival = max(arrival or now, now)
+            if arrival - now > tolerance:
+                return arrival - now - tolerance, arrival
+            return None, arrival + interval
+
+        self._wait = _cache_update(f"throttle:{scope}.{self.kind}:{ident}", take, int(period) + 1)
+        return self._wait is None
+
+    def wait(self):
+        return self._wait
+
+
+class UserRateBucket(TokenBucketThrottle):
+    kind = 'user'
+
+    def get_ident_key(self, request):
+        return auth_context(request).user_id
+
+
+class CompanyRateBucket(TokenBucketThrottle):
+    kind = 'company'
+
+    def get_ident_key(self, request):
+        return auth_context(request).company_id
+
+
+class IPRateBucket(TokenBucketThrottle):
+    kind = 'ip'
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+class _LocalCounter:
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, delta):
+        with self._lock:
+            self._counts[key] = max(self._counts.get(key, 0) + delta, 0)
+            return self._counts[key]
+
+
+_local_counter = _LocalCounter()
+
+
+def _adjust_in_flight(key, delta):
+    """
+    Adds `delta` to a shared in-flight counter and returns the new value.
+
+    The counter expires ADMISSION_SLOT_TIMEOUT seconds after the last request
+    was admitted, so slots leaked by a worker killed mid-request are freed
+    once traffic pauses. Releases never take it below zero: a request that
+    outlived an expired counter must not hand a slot to someone else.
+    """
+    timeout = rest_setting('ADMISSION_SLOT_TIMEOUT', 60)
+    try:
+        try:
+            value = cache.incr(key, delta)
+        except ValueError:  # No counter yet (or it just expired)
+            if delta < 0:
+                return 0
+            cache.add(key, 0, timeout)
+            value = cache.incr(key, delta)
+        if value < 0:
+            # Add back only the deficit, keeping concurrent increments.
+            cache.incr(key, -value)
+            return 0
+        if delta > 0:
+            cache.touch(key, timeout)
+        return value
+    except Exception:
+        logger.warning("Admission cache unavailable, counting in-flight requests per process", exc_info=True)
+        return _local_counter.add(key, delta)
+
+
+class AdmissionControlMixin:
+    """
+    Sheds unsafe requests with 429 once REST_FRAMEWORK['ADMISSION_LIMITS'][scope]
+    of them are in flight. The scope is the view's `throttle_scope`.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self._admission_key = None
+        limit = rest_setting('ADMISSION_LIMITS', {}).get(getattr(self, 'throttle_scope', None))
+        if limit and request.method not in SAFE_METHODS:
+            key = f"admission:{self.throttle_scope}"
+            if _adjust_in_flight(key, 1) > per_process(limit):
+                _adjust_in_flight(key, -1)
+                raise Throttled(wait=rest_setting('ADMISSION_RETRY_AFTER', 1))
+            self._admission_key = key
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        key = getattr(self, '_admission_key', None)
+        if key:
+            self._admission_key = None
+            _adjust_in_flight(key, -1)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -2,15 +2,28 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 
 # JWT imports
-from rest_framework_simplejwt.views import TokenRefreshView
-from users.auth_views import MyTokenObtainPairView  # Custom JWT login
+from users.auth_views import MyTokenObtainPairView, MyTokenRefreshView  # Custom JWT login
 
 # Local imports
 from . import urls_admin
-from .views import welcome
+from .views import welcome, serve_media
+
+# Response compression rules, read by core.middleware.CompressionMiddleware.
+# Keys are URL prefixes; the longest matching prefix wins and `None` turns
+# compression off. Token endpoints are excluded so secrets never share a
+# compressed body with attacker-influenced input (BREACH).
+compression_rules = {
+    '/api/': {'min_size': 1024},
+    '/api/token/': None,
+    '/api/auth/': None,
+    '/api/schedules/': {'min_size': 512},
+    '/api/menu/': {'min_size': 512},
+    '/api/admin/reports/': {'min_size': 512, 'brotli_quality': 5},
+    '/api/admin/wallets/': {'min_size': 512},
+}
 
 urlpatterns = [
     # Root welcome
@@ -25,7 +38,7 @@ urlpatterns = [
     # API Authentication
     path('api/auth/', include('rest_framework.urls')),  # browsable API login
     path('api/token/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/refresh/', MyTokenRefreshView.as_view(), name='token_refresh'),
 
     # App-specific endpoints
     path('api/users/', include('users.urls')),
@@ -33,6 +46,7 @@ urlpatterns = [
     path('api/menu/', include('menu.urls')),
     path('api/schedules/', include('schedules.urls')),
     path('api/orders/', include('orders.urls')),
+    path('api/wallets/', include('wallets.urls_user')),
 ]
 
 # [FIXED] Serve static and media files in both development and production.
@@ -41,4 +55,11 @@ urlpatterns = [
 # requests for these files and serve them from STATIC_ROOT and MEDIA_ROOT.
 # The `if settings.DEBUG:` check has been removed.
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+
+# Media is served through our own view rather than `static()`: `static()` is a
+# no-op when DEBUG is off, and WhiteNoise only indexes MEDIA_ROOT at startup, so
+# image variants generated after boot would otherwise 404. The view also sets
+# long-lived cache headers on content-hashed variants.
+urlpatterns += [
+    re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
+]
\ No newline at end of file
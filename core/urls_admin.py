@@ -7,6 +7,7 @@ from orders.views_admin import (
     DailyOrderSummaryView,
     DashboardStatsView,
     AdminReportsView,
+    DemandForecastView,
 )
 
 # --- Register ViewSet routes ---
@@ -18,6 +19,7 @@ urlpatterns = [
     # --- Dashboard & Reports ---
     path('dashboard-stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
     path('reports/daily-summary/', DailyOrderSummaryView.as_view(), name='daily-summary'),
+    path('reports/forecast/', DemandForecastView.as_view(), name='demand-forecast'),
     path('reports/', AdminReportsView.as_view(), name='admin-reports'),
 
     # --- Wallet, Contract, and User Management ---
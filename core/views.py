@@ -1,9 +1,14 @@
 # start of core/views.py
 # core/views.py
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from menu.images import is_hashed_variant
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -17,4 +22,17 @@ def welcome(request):
         'admin_panel': request.build_absolute_uri('admin/'),
     })
 
+
+def serve_media(request, path):
+    """
+    Serves uploaded media. Content-hashed image variants never change, so they
+    are marked immutable for a year; everything else is revalidated daily.
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if is_hashed_variant(path):
+        patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=86400)
+    return response
+
 # end of core/views.py
\ No newline at end of file
@@ -11,7 +11,15 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 # Get the base Django application
 application = get_wsgi_application()
 
+from menu.images import is_hashed_variant  # noqa: E402 (needs the app registry)
+from core.startup import warm_up  # noqa: E402
+
+# Load every view now: with `gunicorn --preload` this happens once in the
+# master and the forked workers share the imported modules.
+warm_up()
+
 # [MODIFIED] Wrap the application with WhiteNoise and add the MEDIA_ROOT
 # This tells WhiteNoise to serve files from your MEDIA_ROOT at the MEDIA_URL prefix
-application = WhiteNoise(application, root=settings.MEDIA_ROOT)
+# Content-hashed image variants are immutable and get far-future cache headers.
+application = WhiteNoise(application, root=settings.MEDIA_ROOT, immutable_file_test=is_hashed_variant)
 application.add_files(settings.STATIC_ROOT, prefix=settings.STATIC_URL.lstrip('/'))
\ No newline at end of file
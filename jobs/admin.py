@@ -0,0 +1,17 @@
+# jobs/admin.py
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_after', 'updated_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'last_error')
+    readonly_fields = ('created_at', 'updated_at', 'locked_at', 'locked_by', 'last_error')
+    actions = ['retry_now']
+
+    @admin.action(description='Retry selected jobs now')
+    def retry_now(self, request, queryset):
+        queryset.update(status=Job.Status.QUEUED, run_after=timezone.now(), attempts=0, locked_at=None, locked_by='')
@@ -0,0 +1,13 @@
+# jobs/apps.py
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+
+    def ready(self):
+        # Import every installed app's `tasks` module so their @task handlers
+        # are registered before the worker starts claiming jobs.
+        autodiscover_modules('tasks')
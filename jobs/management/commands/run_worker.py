@@ -0,0 +1,48 @@
+# jobs/management/commands/run_worker.py
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.queue import default_worker_id, requeue_stale_jobs, run_pending
+
+
+class Command(BaseCommand):
+    """
+    Runs background jobs from the database queue. No external broker is
+    needed; start one or more of these next to the web workers.
+    """
+    help = 'Processes queued background jobs from the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty.')
+
+    def handle(self, *args, **options):
+        worker_id = default_worker_id()
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        self.stdout.write(f"Worker {worker_id} started.")
+        while not self._stopping:
+            close_old_connections()
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale job(s)."))
+
+            # Run one job at a time so a stop request is honoured between jobs.
+            processed = run_pending(worker_id, limit=1)
+            if processed:
+                continue
+            if options['burst']:
+                break
+            time.sleep(options['sleep'])
+
+        self.stdout.write(f"Worker {worker_id} stopped.")
+
+    def _request_stop(self, signum, frame):
+        # Finish the current job, then exit the loop.
+        self._stopping = True
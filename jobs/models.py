@@ -0,0 +1,37 @@
+# jobs/models.py
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    A unit of deferred work, stored in the database and executed by
+    `manage.py run_worker`. Jobs are created in the same transaction as the
+    change that caused them, so a rolled-back request never leaves work behind.
+    """
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        FAILED = "FAILED", "Failed"
+
+    name = models.CharField(max_length=255, help_text="Registered task name, e.g. 'menu.generate_image_variants'.")
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=255, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            # The worker's claim query: next queued job that is due.
+            models.Index(fields=['status', 'run_after'], name='jobs_job_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
@@ -0,0 +1,156 @@
+# jobs/queue.py
+
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core import sharding
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(name):
+    """
+    Registers the decorated function as a background task under `name`.
+    The function receives the job payload as keyword arguments.
+    """
+    def decorator(func):
+        if name in _registry and _registry[name] is not func:
+            raise ValueError(f"A task named '{name}' is already registered.")
+        _registry[name] = func
+        func.task_name = name
+        return func
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"No task registered under '{name}'.") from None
+
+
+def enqueue(name, payload=None, delay=None, max_attempts=None):
+    """
+    Queues a task for the worker. The job row is written in the caller's
+    transaction, so it only becomes visible to the worker once that commits.
+
+    With JOBS_RUN_EAGERLY enabled (handy for local development without a
+    worker), the task instead runs in-process right after the commit.
+    """
+    get_task(name)  # Fail fast on typos instead of at execution time.
+    payload = payload or {}
+
+    if getattr(settings, 'JOBS_RUN_EAGERLY', False):
+        sharding.on_commit(lambda: get_task(name)(**payload))
+        return None
+
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        run_after=timezone.now() + (delay or timedelta()),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_job(worker_id):
+    """
+    Atomically marks the next due job as RUNNING and returns it, or None.
+    Uses SKIP LOCKED where supported so several workers never contend on the
+    same row; elsewhere (SQLite) the conditional UPDATE decides the winner.
+    """
+    now = timezone.now()
+    alias = sharding.current_alias()
+    with transaction.atomic(using=alias):
+        due = Job.objects.filter(status=Job.Status.QUEUED, run_after__lte=now).order_by('run_after', 'id')
+        if connections[alias].features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        job = due.first()
+        if job is None:
+            return None
+        claimed = Job.objects.filter(pk=job.pk, status=Job.Status.QUEUED).update(
+            status=Job.Status.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_at=now,
+            locked_by=worker_id,
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def run_job(job):
+    """
+    Executes a claimed job. Successful jobs are deleted; failures are retried
+    with exponential backoff until max_attempts is reached, then kept as FAILED.
+    """
+    try:
+        get_task(job.name)(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = settings.JOBS_RETRY_BASE_DELAY * (2 ** (job.attempts - 1))
+            logger.warning("Job %s failed (attempt %s/%s), retrying in %ss.", job, job.attempts, job.max_attempts, delay)
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.Status.QUEUED,
+                run_after=timezone.now() + timedelta(seconds=delay),
+                locked_at=None,
+                locked_by='',
+                last_error=error,
+            )
+        else:
+            logger.error("Job %s failed permanently after %s attempts.", job, job.attempts)
+            Job.objects.filter(pk=job.pk).update(status=Job.Status.FAILED, locked_at=None, last_error=error)
+        return False
+
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def requeue_stale_jobs():
+    """
+    Puts RUNNING jobs whose worker disappeared (crash, OOM, deploy) back in
+    the queue. A job that has used up its max_attempts is marked FAILED
+    instead, like one that raised, so a job that keeps killing its worker
+    does not cycle forever. Returns the number of jobs requeued.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    stale = Job.objects.filter(status=Job.Status.RUNNING, locked_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.Status.FAILED, locked_at=None,
+        last_error="The worker running this job stopped before it finished.",
+    )
+    if failed:
+        logger.error("%s stale job(s) failed permanently after their last attempt.", failed)
+    return stale.update(status=Job.Status.QUEUED, locked_at=None, locked_by='')
+
+
+def run_pending(worker_id=None, limit=None):
+    """
+    Runs due jobs until the queue is empty (or `limit` jobs have run).
+    Returns the number of jobs processed.
+    """
+    worker_id = worker_id or default_worker_id()
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job(worker_id)
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
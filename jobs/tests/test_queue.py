@@ -0,0 +1,75 @@
+# jobs/tests/test_queue.py
+
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import enqueue, requeue_stale_jobs, run_pending, task
+
+calls = []
+
+
+@task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task('tests.explode')
+def explode():
+    raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_successful_job_runs_once_and_is_removed(self):
+        enqueue('tests.record', {'value': 42})
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [42])
+        self.assertFalse(Job.objects.exists())
+
+    def test_delayed_job_is_not_run_early(self):
+        enqueue('tests.record', {'value': 1}, delay=timedelta(minutes=5))
+        self.assertEqual(run_pending(), 0)
+        self.assertEqual(calls, [])
+
+    @override_settings(JOBS_RETRY_BASE_DELAY=0)
+    def test_failing_job_is_retried_then_marked_failed(self):
+        job = enqueue('tests.explode', max_attempts=2)
+        self.assertEqual(run_pending(), 2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('RuntimeError: boom', job.last_error)
+
+    def test_unknown_task_is_rejected_at_enqueue_time(self):
+        with self.assertRaises(LookupError):
+            enqueue('tests.missing')
+
+    def test_stale_running_job_is_requeued(self):
+        job = enqueue('tests.record', {'value': 7})
+        Job.objects.filter(pk=job.pk).update(status=Job.Status.RUNNING, locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        run_pending()
+        self.assertEqual(calls, [7])
+
+    def test_stale_job_out_of_attempts_is_failed(self):
+        job = enqueue('tests.record', {'value': 7}, max_attempts=2)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.Status.RUNNING, attempts=2, locked_at=timezone.now() - timedelta(hours=1),
+        )
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertEqual(requeue_stale_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertIn("stopped", job.last_error)
+        self.assertEqual(run_pending(), 0)
+
+    def test_food_image_upload_enqueues_variant_job(self):
+        from menu.models import FoodItem
+
+        FoodItem.objects.create(name="Kebab", description="", price=100, image='food_images/kebab.jpg')
+        self.assertTrue(Job.objects.filter(name='menu.generate_image_variants').exists())
@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class MenuConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'menu'
\ No newline at end of file
+    name = 'menu'
+
+    def ready(self):
+        # Register the signals that keep image variants in sync with uploads.
+        import menu.signals
\ No newline at end of file
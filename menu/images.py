@@ -0,0 +1,118 @@
+# menu/images.py
+
+import hashlib
+import io
+import posixpath
+import re
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from core import sharding
+
+# Widths (in pixels) of the resized variants generated for every food image.
+VARIANT_WIDTHS = (160, 320, 640, 1024)
+
+# Output formats: WebP for modern clients, JPEG as the srcset fallback.
+VARIANT_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+VARIANT_DIR = 'food_images/variants'
+
+# e.g. food_images/variants/kebab-320w.3f2a9c1b0d4e.webp
+HASHED_VARIANT_RE = re.compile(r'-\d+w\.[0-9a-f]{12}\.(webp|jpg)$')
+
+
+def is_hashed_variant(path, url=None):
+    """
+    True for content-hashed variant files, which never change once written
+    and can therefore be served with far-future cache headers.
+    """
+    return bool(HASHED_VARIANT_RE.search(path))
+
+
+def _render_variant(image, width, options):
+    """Resizes `image` to `width` and encodes it with the given options."""
+    from PIL import Image
+
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.Resampling.LANCZOS)
+    if options['format'] == 'JPEG' and resized.mode not in ('RGB', 'L'):
+        resized = resized.convert('RGB')
+    buffer = io.BytesIO()
+    resized.save(buffer, **options)
+    return buffer.getvalue()
+
+
+def build_variants(food_item):
+    """
+    Generates the resized WebP/JPEG variants for a food item's image and
+    stores them under MEDIA_ROOT/food_images/variants/.
+
+    Returns a mapping of {format: {width: storage_name}}, plus the name of the
+    source image under the 'source' key so stale variants can be detected.
+    """
+    from PIL import Image, ImageOps
+
+    if not food_item.image:
+        return {}
+
+    with food_item.image.open('rb') as source:
+        image = Image.open(source)
+        image.load()
+    # Respect camera orientation before resizing.
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    stem = posixpath.splitext(posixpath.basename(food_item.image.name))[0]
+    # Never upscale: the largest variant is capped at the original width.
+    widths = sorted({min(width, image.width) for width in VARIANT_WIDTHS})
+
+    variants = {'source': food_item.image.name}
+    for fmt, options in VARIANT_FORMATS.items():
+        extension = 'jpg' if fmt == 'jpeg' else fmt
+        variants[fmt] = {}
+        for width in widths:
+            content = _render_variant(image, width, options)
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            name = f"{VARIANT_DIR}/{stem}-{width}w.{digest}.{extension}"
+            # Content-hashed names make identical re-renders a no-op.
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(content))
+            variants[fmt][str(width)] = name
+    return variants
+
+
+def generate_variants(food_item_id):
+    """
+    Builds variants for the given food item and records them on the row.
+    Uses a queryset update so no post_save signal is re-triggered.
+    Errors propagate so the job queue can retry them.
+    """
+    from .models import FoodItem
+
+    food_item = FoodItem.objects.filter(pk=food_item_id).first()
+    if food_item is None:
+        return
+    variants = build_variants(food_item)
+    # Only store the result if the image was not replaced in the meantime.
+    FoodItem.objects.filter(pk=food_item_id, image=food_item.image.name or '').update(image_variants=variants)
+    sharding.copy_to_shards(FoodItem, pk=food_item_id)
+
+
+def schedule_variant_generation(food_item_id):
+    """
+    Queues variant generation as a background job, off the request thread.
+    """
+    from jobs.queue import enqueue
+
+    enqueue('menu.generate_image_variants', {'food_item_id': food_item_id})
+
+
+def variants_are_stale(food_item):
+    """True if the stored variants were not generated from the current image."""
+    current = food_item.image.name if food_item.image else None
+    return (food_item.image_variants or {}).get('source') != current
@@ -0,0 +1,44 @@
+from django.db import migrations, models
+
+from menu.search import normalize
+
+
+def fill_search_text(apps, schema_editor):
+    FoodItem = apps.get_model('menu', 'FoodItem')
+    foods = list(FoodItem.objects.only('name', 'description'))
+    for food in foods:
+        food.search_text = normalize(f"{food.name} {food.description}")
+    FoodItem.objects.bulk_update(foods, ['search_text'], batch_size=500)
+
+
+def create_trigram_index(apps, schema_editor):
+    """Trigram GIN index for substring search (PostgreSQL only)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS menu_fooditem_search_trgm "
+        "ON menu_fooditem USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS menu_fooditem_search_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0002_fooditem_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooditem',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
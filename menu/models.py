@@ -16,6 +16,8 @@ class FoodItem(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     # The 'upload_to' path will be relative to the MEDIA_ROOT
     image = models.ImageField(upload_to='food_images/', blank=True, null=True)
+    # Resized/WebP variants generated from `image`, see menu/images.py
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     category = models.ForeignKey(
         FoodCategory,
         related_name='food_items',
@@ -25,6 +27,17 @@ class FoodItem(models.Model):
     )
     is_available = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Normalized name and description for search, see menu/search.py
+    search_text = models.TextField(blank=True, default='', editable=False)
+
+    def save(self, *args, **kwargs):
+        from .search import search_text_for
+
+        self.search_text = search_text_for(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'name', 'description'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'search_text'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -0,0 +1,174 @@
+# menu/search.py
+"""
+Search and facet counts over the food catalog.
+
+Food names and descriptions are stored normalized in FoodItem.search_text
+(see `normalize()`): Arabic yeh/kaf become their Persian forms, ZWNJ and
+diacritics are removed, digits become ASCII and text is case-folded. Queries
+are normalized the same way, so "كباب" finds "کباب" and "نیمرو" finds
+"نیم‌رو".
+
+On PostgreSQL every query token must occur in search_text (served by the
+trigram GIN index from migration 0003) and results are ranked by trigram
+similarity. Other databases use a per-process inverted index of token
+prefixes that is rebuilt after any food item changes.
+"""
+import bisect
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q
+
+from .models import FoodItem
+
+_CHARACTERS = str.maketrans({
+    '\u064a': '\u06cc',  # Arabic yeh -> Persian yeh
+    '\u0649': '\u06cc',  # Alef maksura -> Persian yeh
+    '\u0643': '\u06a9',  # Arabic kaf -> Persian kaf
+    '\u0629': '\u0647',  # Teh marbuta -> heh
+    '\u200c': None,  # ZWNJ
+    '\u200d': None,  # ZWJ
+    '\u0640': None,  # Tatweel
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)},  # Persian digits
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic digits
+})
+# Harakat, tanwin, shadda, sukun and superscript alef
+_DIACRITICS = re.compile('[\u064b-\u065f\u0670]')
+_TOKEN = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Normalized, case-folded form of `text` used for indexing and queries."""
+    text = _DIACRITICS.sub('', (text or '').translate(_CHARACTERS)).casefold()
+    return ' '.join(_TOKEN.findall(text))
+
+
+def search_text_for(food):
+    return normalize(f"{food.name} {food.description}")
+
+
+def tokens(query):
+    return normalize(query).split()
+
+
+# --- In-process inverted index (non-PostgreSQL databases) ---
+
+class InvertedIndex:
+    """Sorted token list with the food ids containing each token."""
+
+    def __init__(self, rows):
+        postings = defaultdict(set)
+        for pk, text in rows:
+            for token in (text or '').split():
+                postings[token].add(pk)
+        self.tokens = sorted(postings)
+        self.postings = postings
+
+    def matching(self, prefix):
+        """Ids of the foods with a token starting with `prefix`."""
+        ids = set()
+        position = bisect.bisect_left(self.tokens, prefix)
+        while position < len(self.tokens) and self.tokens[position].startswith(prefix):
+            ids |= self.postings[self.tokens[position]]
+            position += 1
+        return ids
+
+    def search(self, query_tokens):
+        ids = None
+        for token in query_tokens:
+            ids = self.matching(token) if ids is None else ids & self.matching(token)
+            if not ids:
+                return set()
+        return ids or set()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def invalidate_index():
+    """Drops the in-process index; the next search rebuilds it."""
+    global _index
+    _index = None
+
+
+def get_index():
+    global _index
+    index = _index
+    if index is None:
+        with _index_lock:
+            if _index is None:
+                _index = InvertedIndex(FoodItem.objects.values_list('pk', 'search_text').iterator())
+            index = _index
+    return index
+
+
+# --- Search and facets ---
+
+def uses_trigram_index():
+    return connection.vendor == 'postgresql'
+
+
+def search(queryset, query):
+    """Filters (and on PostgreSQL ranks) `queryset` by a free-text query."""
+    query_tokens = tokens(query)
+    if not query_tokens:
+        return queryset
+    if uses_trigram_index():
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        for token in query_tokens:
+            queryset = queryset.filter(search_text__contains=token)
+        return queryset.annotate(rank=TrigramSimilarity('search_text', ' '.join(query_tokens))).order_by('-rank', 'name')
+    return queryset.filter(pk__in=get_index().search(query_tokens))
+
+
+def price_bands():
+    """[(label, low, high)] from FOOD_SEARCH_PRICE_BANDS; `high` is None for the last band."""
+    bounds = [0, *settings.FOOD_SEARCH_PRICE_BANDS]
+    bands = []
+    for low, high in zip(bounds, [*bounds[1:], None]):
+        label = f"{low}-{high}" if high is not None else f"{low}+"
+        bands.append((label, low, high))
+    return bands
+
+
+def price_band_filter(label):
+    for band_label, low, high in price_bands():
+        if band_label == label:
+            return Q(price__gte=low) if high is None else Q(price__gte=low, price__lt=high)
+    return None
+
+
+def facets(queryset, category_filter=None, price_filter=None):
+    """
+    Counts per category and per price band. Each facet applies the other
+    facet's filter but not its own, so a selected value keeps showing its
+    alternatives.
+    """
+    by_price = queryset.filter(price_filter) if price_filter is not None else queryset
+    by_category = queryset.filter(category_filter) if category_filter is not None else queryset
+
+    categories = (
+        by_price.order_by()
+        .values('category_id', 'category__name')
+        .annotate(count=Count('pk'))
+        .order_by('category__name')
+    )
+    bands = by_category.aggregate(**{
+        f'band_{position}': Count('pk', filter=Q(price__gte=low) if high is None else Q(price__gte=low, price__lt=high))
+        for position, (_, low, high) in enumerate(price_bands())
+    })
+    return {
+        'categories': [
+            {'id': row['category_id'], 'name': row['category__name'], 'count': row['count']}
+            for row in categories
+        ],
+        'price_bands': [
+            {'band': label, 'count': bands[f'band_{position}']}
+            for position, (label, _, _) in enumerate(price_bands())
+        ],
+    }
@@ -1,4 +1,5 @@
 # back/menu/serializers.py
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from .models import FoodCategory, FoodItem, SideDish
 
@@ -16,17 +17,39 @@ class FoodItemSerializer(serializers.ModelSerializer):
     """
     category_name = serializers.CharField(source='category.name', read_only=True)
     image = serializers.ImageField(required=False, allow_null=True, use_url=True)
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = FoodItem
         fields = [
-            'id', 'name', 'description', 'price', 'image', 'is_available',
+            'id', 'name', 'description', 'price', 'image', 'image_srcset', 'is_available',
             'category', 'category_name', 'created_at'
         ]
         extra_kwargs = {
             'created_at': {'read_only': True},
         }
 
+    def get_image_srcset(self, obj):
+        """
+        Returns srcset strings per format, e.g. {"webp": "<url> 160w, <url> 320w"}.
+        None until the background variant generation has finished.
+        """
+        variants = obj.image_variants or {}
+        if not obj.image or variants.get('source') != obj.image.name:
+            return None
+        request = self.context.get('request')
+        srcset = {}
+        for fmt in ('webp', 'jpeg'):
+            entries = []
+            for width, name in sorted(variants.get(fmt, {}).items(), key=lambda item: int(item[0])):
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                entries.append(f"{url} {width}w")
+            if entries:
+                srcset[fmt] = ', '.join(entries)
+        return srcset or None
+
 class SideDishSerializer(serializers.ModelSerializer):
     """
     Serializer for the SideDish model.
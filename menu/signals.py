@@ -0,0 +1,32 @@
+# menu/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import FoodItem
+from .images import schedule_variant_generation, variants_are_stale
+from . import search
+from core import sharding
+
+
+@receiver(post_save, sender=FoodItem)
+def refresh_food_image_variants(sender, instance, **kwargs):
+    """
+    Regenerates the resized image variants whenever a food item's image changes.
+    """
+    if not variants_are_stale(instance):
+        return
+    if not instance.image:
+        # The image was cleared; drop the variants that pointed at it.
+        FoodItem.objects.filter(pk=instance.pk).update(image_variants={})
+        sharding.copy_to_shards(FoodItem, pk=instance.pk)
+        return
+    schedule_variant_generation(instance.pk)
+
+
+@receiver(post_save, sender=FoodItem)
+@receiver(post_delete, sender=FoodItem)
+def invalidate_food_search_index(sender, **kwargs):
+    """
+    Drops the in-process search index (used when not on PostgreSQL) so the
+    next search sees the change.
+    """
+    search.invalidate_index()
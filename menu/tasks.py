@@ -0,0 +1,9 @@
+# menu/tasks.py
+from jobs.queue import task
+from .images import generate_variants
+
+
+@task('menu.generate_image_variants')
+def generate_image_variants(food_item_id):
+    """Background job: builds the resized/WebP variants for a food image."""
+    generate_variants(food_item_id)
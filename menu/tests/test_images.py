@@ -0,0 +1,52 @@
+# menu/tests/test_images.py
+
+import io
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from menu.images import build_variants, generate_variants, is_hashed_variant
+from menu.models import FoodItem
+from menu.serializers import FoodItemSerializer
+
+
+def make_upload(width=800, height=600, name='kebab.jpg'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 120, 40)).save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class FoodImageVariantTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_variants_are_resized_hashed_and_never_upscaled(self):
+        item = FoodItem.objects.create(name="Kebab", description="", price=100, image=make_upload())
+        variants = build_variants(item)
+
+        self.assertEqual(variants['source'], item.image.name)
+        self.assertEqual(sorted(variants['webp'], key=int), ['160', '320', '640', '800'])
+        for name in variants['webp'].values():
+            self.assertTrue(is_hashed_variant(name))
+        with Image.open(f"{self.media_root}/{variants['webp']['320']}") as thumb:
+            self.assertEqual(thumb.size, (320, 240))
+            self.assertEqual(thumb.format, 'WEBP')
+
+    def test_serializer_exposes_srcset_once_generated(self):
+        item = FoodItem.objects.create(name="Kebab", description="", price=100, image=make_upload())
+        self.assertIsNone(FoodItemSerializer(item).data['image_srcset'])
+
+        generate_variants(item.pk)
+        item.refresh_from_db()
+        srcset = FoodItemSerializer(item).data['image_srcset']
+        self.assertIn('160w', srcset['webp'])
+        self.assertIn('.jpg 640w', srcset['jpeg'])
@@ -0,0 +1,66 @@
+# menu/tests/test_search.py
+
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from menu import search
+from menu.models import FoodCategory, FoodItem
+from users.models import User
+
+
+class NormalizeTests(TestCase):
+    def test_unifies_arabic_letters_zwnj_and_digits(self):
+        self.assertEqual(search.normalize("كباب كوبيده"), search.normalize("کباب کوبیده"))
+        self.assertEqual(search.normalize("نیم‌رو"), "نیمرو")
+        self.assertEqual(search.normalize("سوپ ۲ نفره"), "سوپ 2 نفره")
+        self.assertEqual(search.normalize("Kebab, SALAD!"), "kebab salad")
+
+    def test_search_text_follows_name_updates(self):
+        food = FoodItem.objects.create(name="قورمه سبزي", description="خورشت", price=Decimal('100'))
+        self.assertEqual(food.search_text, "قورمه سبزی خورشت")
+        food.name = "قیمه"
+        food.save(update_fields=['name'])
+        food.refresh_from_db()
+        self.assertEqual(food.search_text, "قیمه خورشت")
+
+
+class FoodSearchAPITests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='emp', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.main = FoodCategory.objects.create(name="Main")
+        self.dessert = FoodCategory.objects.create(name="Dessert")
+        FoodItem.objects.create(name="چلوکباب کوبیده", description="دو سیخ کباب", price=Decimal('150000'), category=self.main)
+        FoodItem.objects.create(name="جوجه کباب", description="زعفرانی", price=Decimal('140000'), category=self.main)
+        FoodItem.objects.create(name="شله زرد", description="دسر با زعفران", price=Decimal('35000'), category=self.dessert)
+        FoodItem.objects.create(name="کباب ترش", description="", price=Decimal('160000'), category=self.main,
+                                is_available=False)
+        self.url = reverse('fooditem-search')
+
+    def names(self, response):
+        return sorted(row['name'] for row in response.data['results'])
+
+    def test_matches_arabic_spelling_and_prefixes(self):
+        response = self.client.get(self.url, {'q': 'كباب', 'is_available': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(response), ["جوجه کباب", "چلوکباب کوبیده"])
+
+        response = self.client.get(self.url, {'q': 'زعفر'})
+        self.assertEqual(self.names(response), ["جوجه کباب", "شله زرد"])
+
+    def test_facets_ignore_their_own_filter(self):
+        response = self.client.get(self.url, {'q': 'زعفران', 'category': self.dessert.pk})
+        self.assertEqual(self.names(response), ["شله زرد"])
+        self.assertEqual(
+            {row['name']: row['count'] for row in response.data['facets']['categories']},
+            {"Main": 1, "Dessert": 1},
+        )
+        bands = {row['band']: row['count'] for row in response.data['facets']['price_bands']}
+        self.assertEqual(bands, {'0-50000': 1, '50000-100000': 0, '100000-150000': 0, '150000+': 0})
+
+        response = self.client.get(self.url, {'price_band': '150000+'})
+        self.assertEqual(self.names(response), ["چلوکباب کوبیده", "کباب ترش"])
+        self.assertEqual(self.client.get(self.url, {'price_band': 'cheap'}).status_code, 400)
@@ -1,10 +1,23 @@
 # menu/views.py
+from django.conf import settings
+from django.db.models import Q
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
 # [NEW] Import the necessary parsers for file uploads
 from rest_framework.parsers import MultiPartParser, FormParser
 from .models import FoodCategory, FoodItem, SideDish
 from .serializers import FoodCategorySerializer, FoodItemSerializer, SideDishSerializer
 from core.permissions import IsSuperAdminOrReadOnly
+from . import search as catalog_search
+
+
+class FoodSearchPagination(PageNumberPagination):
+    page_size = settings.FOOD_SEARCH_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
 
 class FoodCategoryViewSet(viewsets.ModelViewSet):
     queryset = FoodCategory.objects.all()
@@ -18,6 +31,42 @@ class FoodItemViewSet(viewsets.ModelViewSet):
     # [MODIFIED] Add parser classes to support image uploads
     parser_classes = [MultiPartParser, FormParser]
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Full-text search over food names and descriptions with facet counts.
+        Query params: q, category, price_band, is_available, page, page_size.
+        Accessed via /api/menu/items/search/
+        """
+        params = request.query_params
+        queryset = FoodItem.objects.select_related('category').order_by('name')
+        if params.get('is_available') in ('true', 'false'):
+            queryset = queryset.filter(is_available=params['is_available'] == 'true')
+        queryset = catalog_search.search(queryset, params.get('q', ''))
+
+        category_filter = None
+        if params.get('category'):
+            try:
+                category_filter = Q(category_id=int(params['category']))
+            except ValueError:
+                raise ValidationError({"category": "A valid integer is required."})
+        price_filter = None
+        if params.get('price_band'):
+            price_filter = catalog_search.price_band_filter(params['price_band'])
+            if price_filter is None:
+                raise ValidationError({"price_band": "Unknown price band."})
+
+        facets = catalog_search.facets(queryset, category_filter, price_filter)
+        for condition in (category_filter, price_filter):
+            if condition is not None:
+                queryset = queryset.filter(condition)
+
+        paginator = FoodSearchPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        response = paginator.get_paginated_response(self.get_serializer(page, many=True).data)
+        response.data['facets'] = facets
+        return response
+
 class SideDishViewSet(viewsets.ModelViewSet):
     queryset = SideDish.objects.all()
     serializer_class = SideDishSerializer
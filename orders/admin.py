@@ -1,11 +1,11 @@
 # start of orders/admin.py
 from django.contrib import admin
-from .models import Order
+from .models import Order, ArchivedOrder
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'get_company', 'get_date', 'food_item', 'status')
-    list_filter = ('status', 'daily_menu__date', 'daily_menu__schedule__company')
+    list_filter = ('status', 'delivery_date', 'company')
     search_fields = ('user__username', 'food_item__name')
     list_select_related = ('user', 'daily_menu', 'food_item', 'daily_menu__schedule__company')
 
@@ -16,4 +16,19 @@ class OrderAdmin(admin.ModelAdmin):
     @admin.display(description='Date')
     def get_date(self, obj):
         return obj.daily_menu.date
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'company', 'delivery_date', 'food_name', 'total_price', 'status')
+    list_filter = ('status', 'company')
+    search_fields = ('user__username', 'food_name')
+    date_hierarchy = 'delivery_date'
+    list_select_related = ('user', 'company')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 # end of orders/admin.py
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
+
+    def ready(self):
+        # Register the signals that maintain the dashboard rollups.
+        import orders.signals
@@ -0,0 +1,110 @@
+# orders/archive.py
+"""
+Moves old, finished orders out of the orders table into ArchivedOrder.
+
+Archived orders keep counting in the dashboard and report rollups: they are
+moved with rollup maintenance paused, and rollups.rebuild() adds the archive
+back in. Reports over old ranges therefore include them without reading the
+archive at all. Their portions are not handed back to the menus' capacity
+either: the orders were served, the menus are over.
+
+Only DELIVERED and CANCELED orders are archived, so pending counts never
+depend on the archive.
+"""
+import gzip
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+
+from core import sharding
+from schedules import capacity
+from . import rollups
+from .models import Order, ArchivedOrder
+
+ARCHIVABLE_STATUSES = (Order.OrderStatus.DELIVERED, Order.OrderStatus.CANCELED)
+
+
+def archivable_orders(before):
+    """Finished orders delivered (or, without a menu, created) before `before`."""
+    return Order.objects.filter(status__in=ARCHIVABLE_STATUSES).filter(
+        Q(delivery_date__lt=before) | Q(delivery_date__isnull=True, created_at__date__lt=before)
+    )
+
+
+def snapshot(order):
+    """Builds the ArchivedOrder for an order loaded with its relations."""
+    sides = [
+        {'id': side.pk, 'name': side.name, 'price': str(side.price)}
+        for side in order.side_dishes.all()
+    ]
+    food_price = order.food_item.price if order.food_item else Decimal('0.00')
+    return ArchivedOrder(
+        id=order.pk,
+        user_id=order.user_id,
+        company_id=order.company_id,
+        delivery_date=order.delivery_date,
+        status=order.status,
+        food_item_id=order.food_item_id,
+        food_name=order.food_item.name if order.food_item else '',
+        food_price=food_price,
+        side_dishes=sides,
+        total_price=food_price + sum((Decimal(side['price']) for side in sides), Decimal('0.00')),
+        created_at=order.created_at,
+    )
+
+
+def _export(path, archived):
+    """Appends the batch as gzip-compressed NDJSON (one gzip member per batch)."""
+    with gzip.open(path, 'at', encoding='utf-8') as stream:
+        for row in archived:
+            stream.write(json.dumps({
+                'id': row.id,
+                'user_id': row.user_id,
+                'company_id': row.company_id,
+                'delivery_date': row.delivery_date,
+                'status': row.status,
+                'food_item_id': row.food_item_id,
+                'food_name': row.food_name,
+                'food_price': row.food_price,
+                'side_dishes': row.side_dishes,
+                'total_price': row.total_price,
+                'created_at': row.created_at,
+            }, cls=DjangoJSONEncoder, ensure_ascii=False))
+            stream.write('\n')
+
+
+def archive_orders(before, batch_size=1000, export_path=None, limit=None):
+    """
+    Archives every archivable order older than `before` in batches, each in
+    its own transaction. If `export_path` is given, each committed batch is
+    also appended there as NDJSON.gz. Returns the number of orders archived.
+    """
+    queryset = (
+        archivable_orders(before)
+        .select_related('food_item')
+        .prefetch_related('side_dishes')
+        .order_by('pk')
+    )
+    total = 0
+    while limit is None or total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - total)
+        with transaction.atomic(using=sharding.current_alias()), rollups.paused(), capacity.releases_paused():
+            batch = list(queryset[:size])
+            if not batch:
+                break
+            archived = ArchivedOrder.objects.bulk_create([snapshot(order) for order in batch])
+            # The m2m links go with the orders; no rollup or capacity changes while paused.
+            Order.objects.filter(pk__in=[order.pk for order in batch]).delete()
+        if export_path:
+            _export(export_path, archived)
+        total += len(batch)
+    return total
+
+
+def default_export_path(directory, before):
+    stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    return directory / f"orders-before-{before.isoformat()}-{stamp}.ndjson.gz"
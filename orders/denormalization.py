@@ -0,0 +1,64 @@
+# orders/denormalization.py
+"""
+Keeps Order.company and Order.delivery_date consistent with their sources.
+
+Order.save() sets both; this module covers the paths that bypass it (menu
+date edits, bulk inserts, raw SQL) and the integrity check behind
+`manage.py check_order_denormalization`.
+"""
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+
+from core import sharding
+from schedules.models import DailyMenu
+from users.models import User
+from . import rollups
+from .models import Order
+
+
+def menu_date_changed(menu, old_date):
+    """Moves the orders of a daily menu (and their rollup counts) to its new date."""
+    orders = Order.objects.filter(daily_menu=menu)
+    with transaction.atomic(using=sharding.current_alias()):
+        rollups.delivery_date_moved(orders, old_date, menu.date)
+        orders.update(delivery_date=menu.date)
+
+
+def delivery_date_mismatches():
+    """Orders whose delivery_date differs from their daily menu's date."""
+    return Order.objects.filter(
+        Q(daily_menu__isnull=False) & (Q(delivery_date__isnull=True) | ~Q(delivery_date=F('daily_menu__date')))
+        | Q(daily_menu__isnull=True, delivery_date__isnull=False)
+    )
+
+
+def missing_companies():
+    """
+    Orders without a company although their user has one. A company that
+    differs from the user's current one is expected (the user moved) and is
+    not reported.
+    """
+    return Order.objects.filter(company__isnull=True, user__company__isnull=False)
+
+
+def repair():
+    """
+    Fixes both kinds of drift and rebuilds the rollups of the affected
+    companies. Returns (delivery dates fixed, companies filled in).
+    """
+    with transaction.atomic(using=sharding.current_alias()):
+        dates = delivery_date_mismatches()
+        companies = missing_companies()
+        affected = set(dates.values_list('company_id', flat=True)) | set(
+            companies.values_list('user__company_id', flat=True)
+        )
+        fixed_dates = Order.objects.filter(pk__in=dates.values('pk')).update(
+            delivery_date=Subquery(DailyMenu.objects.filter(pk=OuterRef('daily_menu_id')).values('date')[:1])
+        )
+        fixed_companies = Order.objects.filter(pk__in=companies.values('pk')).update(
+            company_id=Subquery(User.objects.filter(pk=OuterRef('user_id')).values('company_id')[:1])
+        )
+        affected.discard(None)
+        if affected:
+            rollups.rebuild(sorted(affected))
+    return fixed_dates, fixed_companies
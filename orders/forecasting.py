@@ -0,0 +1,192 @@
+# orders/forecasting.py
+"""
+Demand forecasts for the kitchen, per company, upcoming menu date and food.
+
+The history comes from the per-day rollup tables (orders/rollups.py), read
+with a handful of GROUP BY statements over the last FORECAST_HISTORY_DAYS:
+
+* the company's mean number of orders per weekday,
+* a seasonal factor: the company's mean for the month against its overall mean,
+* each food's pull: its mean orders on the days it was ordered at all.
+
+For a menu date the weekday mean (times the seasonal factor) is split over
+the menu's foods in proportion to their pull; foods without history get the
+company's average pull. A forecast is never below the orders already placed.
+
+Only dates whose reservations are still open (RESERVATION_LEAD_DAYS or more
+ahead) are forecast; for closed dates the bookings are final.
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractWeekDay
+from django.utils import timezone
+
+from companies.models import Company
+from core import sharding
+from schedules.models import DailyMenu, Schedule
+from .models import DailyFoodOrderCount, DailyOrderCount, DemandForecast
+
+# Months with fewer days of history than this get no seasonal adjustment.
+MIN_SEASON_DAYS = 4
+SEASON_BOUNDS = (0.5, 2.0)
+
+
+def forecast_window(today=None):
+    """(first, last) date forecast: the first date still open for orders up to the horizon."""
+    today = today or timezone.now().date()
+    return (
+        today + timedelta(days=settings.RESERVATION_LEAD_DAYS),
+        today + timedelta(days=settings.FORECAST_HORIZON_DAYS),
+    )
+
+
+def upcoming_menus(start_date, end_date, company_ids=None):
+    """{(company id, date): [food ids]} from each company's active (or the default) schedule."""
+    default = Schedule.objects.filter(company__isnull=True, is_active=True).values_list('pk', flat=True).first()
+    companies = Company.objects.all()
+    if company_ids:
+        companies = companies.filter(pk__in=company_ids)
+    companies_by_schedule = defaultdict(list)
+    for company_id, schedule_id in companies.values_list('pk', 'active_schedule_id'):
+        if schedule_id or default:
+            companies_by_schedule[schedule_id or default].append(company_id)
+
+    menus = dict(
+        (pk, (schedule_id, menu_date))
+        for pk, schedule_id, menu_date in DailyMenu.objects.filter(
+            schedule_id__in=list(companies_by_schedule), date__range=(start_date, end_date)
+        ).values_list('pk', 'schedule_id', 'date')
+    )
+    foods = defaultdict(list)
+    links = DailyMenu.available_foods.through.objects.filter(dailymenu_id__in=list(menus))
+    for menu_id, food_id in links.values_list('dailymenu_id', 'fooditem_id'):
+        foods[menu_id].append(food_id)
+
+    result = {}
+    for menu_id, (schedule_id, menu_date) in menus.items():
+        for company_id in companies_by_schedule[schedule_id]:
+            if foods[menu_id]:
+                result[(company_id, menu_date)] = foods[menu_id]
+    return result
+
+
+class History:
+    """Per-company statistics from the rollups, loaded with four grouped queries."""
+
+    def __init__(self, start_date, end_date, company_ids):
+        daily = DailyOrderCount.objects.filter(
+            date__range=(start_date, end_date), company_id__in=company_ids, orders__gt=0
+        ).order_by()
+        foods = DailyFoodOrderCount.objects.filter(
+            date__range=(start_date, end_date), company_id__in=company_ids, orders__gt=0
+        ).order_by()
+
+        self.overall = {
+            row['company_id']: row['orders'] / row['days']
+            for row in daily.values('company_id').annotate(orders=Sum('orders'), days=Count('pk'))
+        }
+        self.weekday = {
+            (row['company_id'], row['weekday']): row['orders'] / row['days']
+            for row in daily.annotate(weekday=ExtractWeekDay('date'))
+            .values('company_id', 'weekday').annotate(orders=Sum('orders'), days=Count('pk'))
+        }
+        self.month = {
+            (row['company_id'], row['month']): row['orders'] / row['days']
+            for row in daily.annotate(month=ExtractMonth('date'))
+            .values('company_id', 'month').annotate(orders=Sum('orders'), days=Count('pk'))
+            if row['days'] >= MIN_SEASON_DAYS
+        }
+        self.pull = defaultdict(dict)
+        for row in foods.values('company_id', 'food_item_id').annotate(orders=Sum('orders'), days=Count('pk')):
+            self.pull[row['company_id']][row['food_item_id']] = row['orders'] / row['days']
+
+    def day_total(self, company_id, menu_date):
+        overall = self.overall.get(company_id)
+        if not overall:
+            return 0.0
+        # ExtractWeekDay numbers days 1 (Sunday) to 7 (Saturday).
+        weekday = (menu_date.isoweekday() % 7) + 1
+        base = self.weekday.get((company_id, weekday), overall)
+        season = self.month.get((company_id, menu_date.month), overall) / overall
+        return base * min(max(season, SEASON_BOUNDS[0]), SEASON_BOUNDS[1])
+
+    def split(self, company_id, food_ids):
+        """{food id: share of the day's orders} for the foods on one menu."""
+        pulls = self.pull.get(company_id, {})
+        default = sum(pulls.values()) / len(pulls) if pulls else 1.0
+        weights = {food_id: pulls.get(food_id, default) for food_id in food_ids}
+        total = sum(weights.values())
+        return {food_id: weight / total for food_id, weight in weights.items()}
+
+
+def compute_forecasts(today=None, company_ids=None):
+    """
+    Replaces the forecasts for the open dates in the horizon. Returns the
+    number of forecast rows written.
+    """
+    today = today or timezone.now().date()
+    start_date, end_date = forecast_window(today)
+    menus = upcoming_menus(start_date, end_date, company_ids)
+    companies = sorted({company_id for company_id, _ in menus})
+    history = History(today - timedelta(days=settings.FORECAST_HISTORY_DAYS), today - timedelta(days=1), companies)
+
+    booked = {
+        (row['company_id'], row['date'], row['food_item_id']): row['orders']
+        for row in DailyFoodOrderCount.objects.filter(
+            date__range=(start_date, end_date), company_id__in=companies
+        ).values('company_id', 'date', 'food_item_id', 'orders')
+    }
+
+    forecasts = []
+    for (company_id, menu_date), food_ids in menus.items():
+        total = history.day_total(company_id, menu_date)
+        for food_id, share in history.split(company_id, food_ids).items():
+            placed = booked.get((company_id, menu_date, food_id), 0)
+            forecasts.append(DemandForecast(
+                company_id=company_id,
+                date=menu_date,
+                food_item_id=food_id,
+                predicted=max(math.ceil(total * share), placed),
+                booked=placed,
+            ))
+
+    with transaction.atomic(using=sharding.current_alias()):
+        stale = DemandForecast.objects.filter(date__gte=start_date)
+        if company_ids:
+            stale = stale.filter(company_id__in=company_ids)
+        stale.delete()
+        DemandForecast.objects.bulk_create(forecasts, batch_size=1000)
+    return len(forecasts)
+
+
+def forecast_report(start_date, end_date, company_id=None):
+    """Forecast rows for the range plus per date/food totals across companies for prep."""
+    rows = DemandForecast.objects.filter(date__range=(start_date, end_date)).select_related('company', 'food_item')
+    if company_id:
+        rows = rows.filter(company_id=company_id)
+    rows = rows.order_by('date', 'company__name', 'food_item__name')
+
+    details = []
+    totals = {}
+    for row in rows:
+        details.append({
+            'date': row.date,
+            'company_id': row.company_id,
+            'company_name': row.company.name,
+            'food_item_id': row.food_item_id,
+            'food_name': row.food_item.name,
+            'predicted': row.predicted,
+            'booked': row.booked,
+        })
+        key = (row.date, row.food_item_id)
+        if key not in totals:
+            totals[key] = {'date': row.date, 'food_item_id': row.food_item_id, 'food_name': row.food_item.name,
+                           'predicted': 0, 'booked': 0}
+        totals[key]['predicted'] += row.predicted
+        totals[key]['booked'] += row.booked
+    return {'forecasts': details, 'prep_totals': list(totals.values())}
@@ -0,0 +1,31 @@
+# orders/management/commands/advance_order_statuses.py
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.transitions import advance_due_orders
+
+
+class Command(BaseCommand):
+    """
+    Confirms, starts and closes orders as their delivery dates approach.
+    Meant to run periodically (e.g. every 15 minutes from cron).
+    """
+    help = 'Advances order statuses once the reservation lead time has passed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--today', help='Override today\'s date (YYYY-MM-DD), for backfills.')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['today']:
+            try:
+                today = date.fromisoformat(options['today'])
+            except ValueError:
+                raise CommandError("Invalid date format. Use YYYY-MM-DD.")
+
+        moved = advance_due_orders(today)
+        for status, count in moved.items():
+            self.stdout.write(f"{status}: {count} order(s)")
+        self.stdout.write(self.style.SUCCESS("Order statuses advanced."))
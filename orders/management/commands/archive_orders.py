@@ -0,0 +1,51 @@
+# orders/management/commands/archive_orders.py
+
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orders.archive import archivable_orders, archive_orders, default_export_path
+
+
+class Command(BaseCommand):
+    """
+    Moves delivered/canceled orders older than ORDER_ARCHIVE_AFTER_DAYS into
+    the ArchivedOrder table. Reports and dashboards keep counting them.
+    """
+    help = 'Archives old finished orders into ArchivedOrder (and optionally NDJSON.gz files).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='Archive orders delivered before this date (YYYY-MM-DD). '
+                                             'Defaults to ORDER_ARCHIVE_AFTER_DAYS days ago.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many orders.')
+        parser.add_argument('--export', action='store_true',
+                            help='Also write the archived orders as NDJSON.gz under ORDER_ARCHIVE_DIR.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many orders would be archived.')
+
+    def handle(self, *args, **options):
+        if options['before']:
+            try:
+                before = date.fromisoformat(options['before'])
+            except ValueError:
+                raise CommandError("Invalid date format. Use YYYY-MM-DD.")
+        else:
+            before = timezone.now().date() - timedelta(days=settings.ORDER_ARCHIVE_AFTER_DAYS)
+
+        if options['dry_run']:
+            self.stdout.write(f"{archivable_orders(before).count()} order(s) before {before} would be archived.")
+            return
+
+        export_path = None
+        if options['export']:
+            directory = Path(settings.ORDER_ARCHIVE_DIR)
+            directory.mkdir(parents=True, exist_ok=True)
+            export_path = default_export_path(directory, before)
+
+        archived = archive_orders(before, options['batch_size'], export_path, options['limit'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} order(s) delivered before {before}."))
+        if export_path and archived:
+            self.stdout.write(f"Exported to {export_path}")
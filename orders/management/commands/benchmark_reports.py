@@ -0,0 +1,102 @@
+# orders/management/commands/benchmark_reports.py
+
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from companies.models import Company
+from menu.models import FoodItem, SideDish
+from orders import rollups
+from orders.models import Order
+from orders.reports import build_admin_report
+from schedules.models import Schedule, DailyMenu
+from users.models import User
+
+
+class Command(BaseCommand):
+    """
+    Regression benchmark for the admin reports endpoint.
+
+    Generates a synthetic data set (by default 50 companies x 2,000 users x
+    60 days, one order per user per day) inside a transaction, times
+    build_admin_report(), and rolls everything back. Exits with an error if
+    the median run exceeds the budget.
+    """
+    help = 'Benchmarks the admin reports aggregation on a large synthetic data set.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=50)
+        parser.add_argument('--users', type=int, default=2000, help='Users per company.')
+        parser.add_argument('--days', type=int, default=60)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--budget-ms', type=float, default=200.0)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.populate(options)
+            timings = self.measure(options)
+            # Never keep the synthetic data.
+            transaction.set_rollback(True)
+
+        median = statistics.median(timings)
+        self.stdout.write(f"Median: {median:.1f} ms, worst: {max(timings):.1f} ms over {len(timings)} runs")
+        if median > options['budget_ms']:
+            raise CommandError(f"Report took {median:.1f} ms, over the {options['budget_ms']:.0f} ms budget.")
+        self.stdout.write(self.style.SUCCESS("Within budget."))
+
+    def populate(self, options):
+        batch_size = options['batch_size']
+        today = timezone.now().date()
+        start = today - timedelta(days=options['days'] - 1)
+        self.stdout.write("Generating synthetic data...")
+
+        foods = FoodItem.objects.bulk_create([
+            FoodItem(name=f"bench-food-{i}", description="", price=Decimal(100 + i)) for i in range(8)
+        ])
+        side = SideDish.objects.create(name="bench-side", price=Decimal('20.00'))
+        schedule = Schedule.objects.create(name="bench", start_date=start, end_date=today)
+        menus = DailyMenu.objects.bulk_create([
+            DailyMenu(schedule=schedule, date=start + timedelta(days=d)) for d in range(options['days'])
+        ])
+        companies = Company.objects.bulk_create([
+            Company(name=f"bench-company-{i}") for i in range(options['companies'])
+        ])
+
+        OrderSideDish = Order.side_dishes.through
+        for company in companies:
+            users = User.objects.bulk_create([
+                User(username=f"bench-{company.pk}-{i}", company=company, password='!')
+                for i in range(options['users'])
+            ], batch_size=batch_size)
+            orders = [
+                # bulk_create skips Order.save(), so set the denormalized fields here.
+                Order(user=user, company=company, daily_menu=menu, delivery_date=menu.date,
+                      food_item=foods[(user.pk + day) % len(foods)], status=Order.OrderStatus.DELIVERED)
+                for day, menu in enumerate(menus)
+                for user in users
+            ]
+            orders = Order.objects.bulk_create(orders, batch_size=batch_size)
+            # Roughly a third of orders come with a side dish.
+            OrderSideDish.objects.bulk_create([
+                OrderSideDish(order_id=order.pk, sidedish_id=side.pk)
+                for order in orders[::3]
+            ], batch_size=batch_size)
+            self.stdout.write(f"  {company.name}: {len(orders)} orders")
+
+        rollups.rebuild()
+
+    def measure(self, options):
+        today = timezone.now().date()
+        start = today - timedelta(days=30)
+        timings = []
+        for _ in range(options['repeat']):
+            began = time.perf_counter()
+            build_admin_report(start, today, today=today)
+            timings.append((time.perf_counter() - began) * 1000)
+        return timings
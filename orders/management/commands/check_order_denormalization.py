@@ -0,0 +1,33 @@
+# orders/management/commands/check_order_denormalization.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.denormalization import delivery_date_mismatches, missing_companies, repair
+
+
+class Command(BaseCommand):
+    """
+    Verifies Order.delivery_date and Order.company against daily_menu.date
+    and user.company. Exits with an error when drift is found, unless --fix
+    is given, which repairs it and rebuilds the affected rollups.
+    """
+    help = 'Checks (and optionally repairs) the denormalized company/delivery date columns on orders.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Repair mismatches instead of failing.')
+
+    def handle(self, *args, **options):
+        wrong_dates = delivery_date_mismatches().count()
+        no_company = missing_companies().count()
+        self.stdout.write(f"Orders with a wrong delivery_date: {wrong_dates}")
+        self.stdout.write(f"Orders missing their company: {no_company}")
+        if not wrong_dates and not no_company:
+            self.stdout.write(self.style.SUCCESS("Order denormalization is consistent."))
+            return
+        if not options['fix']:
+            raise CommandError("Denormalized order columns have drifted; run with --fix to repair them.")
+
+        fixed_dates, fixed_companies = repair()
+        self.stdout.write(self.style.SUCCESS(
+            f"Repaired {fixed_dates} delivery date(s) and {fixed_companies} company reference(s)."
+        ))
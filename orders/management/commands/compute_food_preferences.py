@@ -0,0 +1,25 @@
+# orders/management/commands/compute_food_preferences.py
+
+from django.core.management.base import BaseCommand
+
+from jobs.queue import enqueue
+from orders.recommendations import compute_preferences
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the food rankings used to order employees' menus. Meant to
+    run nightly; --enqueue hands the work to the background worker instead.
+    """
+    help = 'Recomputes per-user and per-company food preference rankings from order history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enqueue', action='store_true', help='Queue a background job instead of running now.')
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            enqueue('orders.compute_food_preferences')
+            self.stdout.write(self.style.SUCCESS("Queued orders.compute_food_preferences."))
+            return
+        users, companies = compute_preferences()
+        self.stdout.write(self.style.SUCCESS(f"Ranked foods for {users} user(s) and {companies} company(ies)."))
@@ -0,0 +1,29 @@
+# orders/management/commands/forecast_demand.py
+
+from django.core.management.base import BaseCommand
+
+from jobs.queue import enqueue
+from orders.forecasting import compute_forecasts, forecast_window
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the demand forecasts for every upcoming menu date that is
+    still open for orders. Meant to run nightly; --enqueue hands the work
+    to the background worker instead.
+    """
+    help = 'Forecasts orders per company, menu date and food for kitchen prep.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, action='append', dest='companies',
+                            help='Only forecast the given company id (repeatable).')
+        parser.add_argument('--enqueue', action='store_true', help='Queue a background job instead of running now.')
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            enqueue('orders.forecast_demand')
+            self.stdout.write(self.style.SUCCESS("Queued orders.forecast_demand."))
+            return
+        start_date, end_date = forecast_window()
+        written = compute_forecasts(company_ids=options['companies'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} forecast(s) for {start_date} to {end_date}."))
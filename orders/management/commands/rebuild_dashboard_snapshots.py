@@ -0,0 +1,21 @@
+# orders/management/commands/rebuild_dashboard_snapshots.py
+
+from django.core.management.base import BaseCommand
+
+from orders import rollups
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the per-company dashboard rollups from the orders table.
+    Normally they are maintained incrementally; use this after bulk imports.
+    """
+    help = 'Rebuilds the per-company dashboard snapshots from scratch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, action='append', dest='companies',
+                            help='Only rebuild the given company id (repeatable).')
+
+    def handle(self, *args, **options):
+        rollups.rebuild(options['companies'])
+        self.stdout.write(self.style.SUCCESS("Dashboard snapshots rebuilt."))
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_rollups(apps, schema_editor):
+    """Seeds the rollup tables from the existing orders."""
+    Company = apps.get_model('companies', 'Company')
+    Order = apps.get_model('orders', 'Order')
+    DashboardSnapshot = apps.get_model('orders', 'DashboardSnapshot')
+    DailyOrderCount = apps.get_model('orders', 'DailyOrderCount')
+    FoodOrderCount = apps.get_model('orders', 'FoodOrderCount')
+
+    orders = Order.objects.filter(user__company__isnull=False)
+    DailyOrderCount.objects.bulk_create([
+        DailyOrderCount(company_id=row['user__company_id'], date=row['daily_menu__date'], orders=row['n'])
+        for row in orders.filter(daily_menu__isnull=False)
+        .values('user__company_id', 'daily_menu__date').annotate(n=models.Count('id')).order_by()
+    ])
+    FoodOrderCount.objects.bulk_create([
+        FoodOrderCount(company_id=row['user__company_id'], food_item_id=row['food_item_id'], orders=row['n'])
+        for row in orders.filter(food_item__isnull=False)
+        .values('user__company_id', 'food_item_id').annotate(n=models.Count('id')).order_by()
+    ])
+    pending = dict(
+        orders.filter(status__in=['PLACED', 'CONFIRMED'])
+        .values('user__company_id').annotate(n=models.Count('id')).order_by()
+        .values_list('user__company_id', 'n')
+    )
+    DashboardSnapshot.objects.bulk_create([
+        DashboardSnapshot(company_id=company_id, pending_orders=pending.get(company_id, 0))
+        for company_id in Company.objects.values_list('pk', flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_company_active_schedule'),
+        ('menu', '0002_fooditem_image_variants'),
+        ('orders', '0003_order_status_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pending_orders', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_snapshot', to='companies.company')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyOrderCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders', models.IntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_order_counts', to='companies.company')),
+            ],
+            options={
+                'unique_together': {('company', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='FoodOrderCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orders', models.IntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='food_order_counts', to='companies.company')),
+                ('food_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='company_order_counts', to='menu.fooditem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', '-orders'], name='orders_foodcount_top_idx')],
+                'unique_together': {('company', 'food_item')},
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_report_rollups(apps, schema_editor):
+    """Seeds the per-day pending counts and the per-day food/side dish counts."""
+    Order = apps.get_model('orders', 'Order')
+    DailyOrderCount = apps.get_model('orders', 'DailyOrderCount')
+    DailyFoodOrderCount = apps.get_model('orders', 'DailyFoodOrderCount')
+    DailySideOrderCount = apps.get_model('orders', 'DailySideOrderCount')
+
+    orders = Order.objects.filter(user__company__isnull=False, daily_menu__isnull=False)
+    for row in (
+        orders.filter(status__in=['PLACED', 'CONFIRMED'])
+        .values('user__company_id', 'daily_menu__date').annotate(n=models.Count('id')).order_by()
+    ):
+        DailyOrderCount.objects.filter(
+            company_id=row['user__company_id'], date=row['daily_menu__date'],
+        ).update(pending=row['n'])
+    DailyFoodOrderCount.objects.bulk_create([
+        DailyFoodOrderCount(company_id=row['user__company_id'], date=row['daily_menu__date'],
+                            food_item_id=row['food_item_id'], orders=row['n'])
+        for row in orders.filter(food_item__isnull=False)
+        .values('user__company_id', 'daily_menu__date', 'food_item_id').annotate(n=models.Count('id')).order_by()
+    ])
+    DailySideOrderCount.objects.bulk_create([
+        DailySideOrderCount(company_id=row['order__user__company_id'], date=row['order__daily_menu__date'],
+                            side_dish_id=row['sidedish_id'], orders=row['n'])
+        for row in Order.side_dishes.through.objects.filter(order__in=orders.values('pk'))
+        .values('order__user__company_id', 'order__daily_menu__date', 'sidedish_id')
+        .annotate(n=models.Count('id')).order_by()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_company_active_schedule'),
+        ('menu', '0002_fooditem_image_variants'),
+        ('orders', '0004_dashboard_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyFoodOrderCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailySideOrderCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='dailyordercount',
+            name='pending',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='dailyordercount',
+            index=models.Index(fields=['date'], name='orders_dailycount_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailyfoodordercount',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_food_order_counts', to='companies.company'),
+        ),
+        migrations.AddField(
+            model_name='dailyfoodordercount',
+            name='food_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_order_counts', to='menu.fooditem'),
+        ),
+        migrations.AddField(
+            model_name='dailysideordercount',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_side_order_counts', to='companies.company'),
+        ),
+        migrations.AddField(
+            model_name='dailysideordercount',
+            name='side_dish',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_order_counts', to='menu.sidedish'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyfoodordercount',
+            index=models.Index(fields=['date'], name='orders_dailyfood_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyfoodordercount',
+            unique_together={('company', 'date', 'food_item')},
+        ),
+        migrations.AddIndex(
+            model_name='dailysideordercount',
+            index=models.Index(fields=['date'], name='orders_dailyside_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailysideordercount',
+            unique_together={('company', 'date', 'side_dish')},
+        ),
+        migrations.RunPython(build_report_rollups, migrations.RunPython.noop),
+    ]
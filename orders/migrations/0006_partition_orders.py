@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Used to partition orders_order on created_at. Orders are now partitioned
+    on delivery_date once it exists (0011_partition_orders_by_delivery_date),
+    which also re-partitions tables this migration already converted.
+    """
+
+    dependencies = [
+        ('orders', '0005_report_rollups'),
+    ]
+
+    operations = []
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_company_active_schedule'),
+        ('menu', '0002_fooditem_image_variants'),
+        ('orders', '0006_partition_orders'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('delivery_date', models.DateField(null=True)),
+                ('status', models.CharField(choices=[('PLACED', 'ثبت شده'), ('CONFIRMED', 'تایید شده'), ('PREPARING', 'در حال آماده\u200cسازی'), ('DELIVERED', 'تحویل داده شده'), ('CANCELED', 'لغو شده')], max_length=50)),
+                ('food_name', models.CharField(blank=True, max_length=255)),
+                ('food_price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('side_dishes', models.JSONField(blank=True, default=list)),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_orders', to='companies.company')),
+                ('food_item', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_orders', to='menu.fooditem')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['delivery_date'], name='orders_archive_date_idx'), models.Index(fields=['company', 'delivery_date'], name='orders_archive_company_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 10000
+
+
+def backfill_company_and_delivery_date(apps, schema_editor):
+    """Copies user.company and daily_menu.date onto every order, in id ranges."""
+    Order = apps.get_model('orders', 'Order')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    DailyMenu = apps.get_model('schedules', 'DailyMenu')
+
+    last_id = Order.objects.aggregate(last=models.Max('id'))['last'] or 0
+    for start in range(0, last_id + 1, BATCH_SIZE):
+        Order.objects.filter(id__gte=start, id__lt=start + BATCH_SIZE).update(
+            company_id=models.Subquery(User.objects.filter(pk=models.OuterRef('user_id')).values('company_id')[:1]),
+            delivery_date=models.Subquery(DailyMenu.objects.filter(pk=models.OuterRef('daily_menu_id')).values('date')[:1]),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_company_active_schedule'),
+        ('menu', '0002_fooditem_image_variants'),
+        ('orders', '0007_archived_order'),
+        ('schedules', '0002_alter_schedule_company'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='company',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='company_orders', to='companies.company'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        # Backfill before the indexes exist, so the UPDATEs don't maintain them.
+        migrations.RunPython(backfill_company_and_delivery_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['company', 'delivery_date'], name='orders_order_company_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['delivery_date', 'status'], name='orders_order_date_status_idx'),
+        ),
+    ]
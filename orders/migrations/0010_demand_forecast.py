@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_company_active_schedule'),
+        ('menu', '0003_fooditem_search_text'),
+        ('orders', '0009_food_preference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('predicted', models.PositiveIntegerField(default=0)),
+                ('booked', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='demand_forecasts', to='companies.company')),
+                ('food_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='demand_forecasts', to='menu.fooditem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='orders_forecast_date_idx')],
+                'unique_together': {('company', 'date', 'food_item')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from core.partitioning import convert_table
+
+
+def partition_orders(apps, schema_editor):
+    """Partitions orders_order by month of delivery_date (PostgreSQL with DB_PARTITIONING only)."""
+    convert_table(schema_editor.connection, 'orders_order', 'delivery_date')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_demand_forecast'),
+    ]
+
+    operations = [
+        # Migrating backwards leaves the table partitioned, which is
+        # transparent to Django.
+        migrations.RunPython(partition_orders, migrations.RunPython.noop),
+    ]
@@ -35,6 +35,19 @@ class Order(models.Model):
         blank=True
     )
 
+    # --- Denormalized from user.company and daily_menu.date (kept in sync by save()) ---
+    # The company is the one the user belonged to when ordering (whose wallet paid).
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=False,  # covered by orders_order_company_date_idx
+        related_name='company_orders'
+    )
+    delivery_date = models.DateField(null=True, blank=True, editable=False)
+
     # --- Order Details ---
     status = models.CharField(
         max_length=50,
@@ -44,7 +57,220 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # --- Status transition timestamps (set by orders/transitions.py) ---
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+    preparing_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    canceled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Pending-order counts filter on status alone.
+            models.Index(fields=['status'], name='orders_order_status_idx'),
+            # Admin filters and reports: one company over a date range.
+            models.Index(fields=['company', 'delivery_date'], name='orders_order_company_date_idx'),
+            # Daily summaries and status advancement: one date (range) and status.
+            models.Index(fields=['delivery_date', 'status'], name='orders_order_date_status_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so signal handlers can compute rollup deltas
+        # and save() only re-derives the denormalized fields when needed.
+        instance._rollup_state = instance.rollup_key()
+        instance._loaded_refs = (instance.user_id, instance.daily_menu_id)
+        return instance
+
+    def rollup_key(self):
+        """The fields the dashboard rollups depend on, see orders/rollups.py."""
+        return (self.company_id, self.delivery_date, self.food_item_id, self.status)
+
+    def sync_denormalized_fields(self):
+        """
+        Copies the company and delivery date from the user and daily menu.
+        The company is only taken on creation or when the user changes, so
+        orders stay with the company that paid for them.
+        """
+        loaded = getattr(self, '_loaded_refs', None)
+        if loaded is None or loaded[0] != self.user_id:
+            self.company_id = self.user.company_id if self.user_id else None
+        if loaded is None or loaded[1] != self.daily_menu_id:
+            self.delivery_date = self.daily_menu.date if self.daily_menu_id else None
+
+    def save(self, *args, **kwargs):
+        self.sync_denormalized_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'user', 'user_id', 'daily_menu', 'daily_menu_id'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'company', 'delivery_date'}
+        super().save(*args, **kwargs)
+        self._loaded_refs = (self.user_id, self.daily_menu_id)
+
     def __str__(self):
         return f"سفارش #{self.id} برای {self.user.username} در {self.daily_menu.date}"
 
+
+class ArchivedOrder(models.Model):
+    """
+    Compact copy of a delivered or canceled order older than the archive cutoff
+    (see orders/archive.py). Keeps the original id and a snapshot of what was
+    ordered at what price, so the live orders table stays small.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='archived_orders'
+    )
+    company = models.ForeignKey(
+        'companies.Company', on_delete=models.SET_NULL, null=True, related_name='archived_orders'
+    )
+    delivery_date = models.DateField(null=True)
+    status = models.CharField(max_length=50, choices=Order.OrderStatus.choices)
+    food_item = models.ForeignKey(
+        'menu.FoodItem', on_delete=models.SET_NULL, null=True, related_name='archived_orders'
+    )
+    food_name = models.CharField(max_length=255, blank=True)
+    food_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # [{"id": 3, "name": "...", "price": "25000.00"}, ...]
+    side_dishes = models.JSONField(default=list, blank=True)
+    total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['delivery_date'], name='orders_archive_date_idx'),
+            models.Index(fields=['company', 'delivery_date'], name='orders_archive_company_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived order #{self.id} ({self.delivery_date})"
+
+
+# --- Dashboard rollups (maintained by orders/rollups.py) ---
+
+class DashboardSnapshot(models.Model):
+    """
+    Per-company dashboard counters, updated incrementally on every order change
+    so the dashboard can be read without scanning the orders table.
+    """
+    company = models.OneToOneField(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='dashboard_snapshot'
+    )
+    pending_orders = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dashboard snapshot for {self.company}"
+
+
+class DailyOrderCount(models.Model):
+    """Number of orders (and how many are still pending) per company and delivery date."""
+    company = models.ForeignKey('companies.Company', on_delete=models.CASCADE, related_name='daily_order_counts')
+    date = models.DateField()
+    orders = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('company', 'date')
+        indexes = [
+            models.Index(fields=['date'], name='orders_dailycount_date_idx'),
+        ]
+
+
+class DailyFoodOrderCount(models.Model):
+    """Number of orders per company, delivery date and food item (for reports)."""
+    company = models.ForeignKey('companies.Company', on_delete=models.CASCADE, related_name='daily_food_order_counts')
+    date = models.DateField()
+    food_item = models.ForeignKey('menu.FoodItem', on_delete=models.CASCADE, related_name='daily_order_counts')
+    orders = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('company', 'date', 'food_item')
+        indexes = [
+            models.Index(fields=['date'], name='orders_dailyfood_date_idx'),
+        ]
+
+
+class DailySideOrderCount(models.Model):
+    """Number of side dishes ordered per company, delivery date and side dish."""
+    company = models.ForeignKey('companies.Company', on_delete=models.CASCADE, related_name='daily_side_order_counts')
+    date = models.DateField()
+    side_dish = models.ForeignKey('menu.SideDish', on_delete=models.CASCADE, related_name='daily_order_counts')
+    orders = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('company', 'date', 'side_dish')
+        indexes = [
+            models.Index(fields=['date'], name='orders_dailyside_date_idx'),
+        ]
+
+
+class FoodOrderCount(models.Model):
+    """All-time number of orders per company and food item."""
+    company = models.ForeignKey('companies.Company', on_delete=models.CASCADE, related_name='food_order_counts')
+    food_item = models.ForeignKey('menu.FoodItem', on_delete=models.CASCADE, related_name='company_order_counts')
+    orders = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('company', 'food_item')
+        indexes = [
+            # Top-N foods per company is an index range scan.
+            models.Index(fields=['company', '-orders'], name='orders_foodcount_top_idx'),
+        ]
+
+
+class FoodPreference(models.Model):
+    """
+    Top-K food items a user (or, as a fallback, a whole company) is most
+    likely to order, best first. Recomputed in batch from the order history
+    by orders/recommendations.py.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='food_preference'
+    )
+    company = models.OneToOneField(
+        'companies.Company', on_delete=models.CASCADE, null=True, blank=True, related_name='food_preference'
+    )
+    # Food item ids, best first
+    ranking = models.JSONField(default=list)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(user__isnull=False, company__isnull=True)
+                | models.Q(user__isnull=True, company__isnull=False),
+                name='orders_foodpreference_one_owner',
+            ),
+        ]
+
+    def __str__(self):
+        owner = f"user #{self.user_id}" if self.user_id else f"company #{self.company_id}"
+        return f"Food preferences of {owner}"
+
+
+class DemandForecast(models.Model):
+    """
+    Expected number of orders of a food item for a company's upcoming menu
+    date, computed in batch by orders/forecasting.py.
+    """
+    company = models.ForeignKey('companies.Company', on_delete=models.CASCADE, related_name='demand_forecasts')
+    date = models.DateField()
+    food_item = models.ForeignKey('menu.FoodItem', on_delete=models.CASCADE, related_name='demand_forecasts')
+    predicted = models.PositiveIntegerField(default=0)
+    # Orders already placed when the forecast was computed
+    booked = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('company', 'date', 'food_item')
+        indexes = [
+            models.Index(fields=['date'], name='orders_forecast_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.predicted} x {self.food_item_id} for company #{self.company_id} on {self.date}"
+
 # end of orders/models.py
\ No newline at end of file
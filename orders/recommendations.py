@@ -0,0 +1,85 @@
+# orders/recommendations.py
+"""
+Per-employee food recommendations from the order history.
+
+`compute_preferences()` scores every (user, food) and (company, food) pair
+with one grouped COUNT each, done by the database over the recent orders,
+and keeps the RECOMMENDATION_TOP_K best foods per owner as FoodPreference
+rows. Orders from the last RECOMMENDATION_RECENT_DAYS count twice, so
+changing tastes show up quickly.
+
+Menus are then ordered with `food_ranking()`: the user's own favourites
+first, then their company's, then everything else in its usual order.
+"""
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from core import sharding
+from .models import FoodPreference, Order
+
+
+def _top_foods(rows, owner_field):
+    """{owner id: [food ids, best first]} from grouped (owner, food, score) rows."""
+    scores = defaultdict(list)
+    for row in rows:
+        scores[row[owner_field]].append((row['score'], -row['food_item_id']))
+    top_k = settings.RECOMMENDATION_TOP_K
+    return {
+        owner: [-food for _, food in heapq.nlargest(top_k, entries)]
+        for owner, entries in scores.items()
+    }
+
+
+def compute_preferences(today=None):
+    """
+    Replaces every FoodPreference row with rankings computed from the orders
+    of the last RECOMMENDATION_WINDOW_DAYS. Returns (users, companies) ranked.
+    """
+    today = today or timezone.now().date()
+    recent = today - timedelta(days=settings.RECOMMENDATION_RECENT_DAYS)
+    orders = Order.objects.filter(
+        food_item__isnull=False,
+        delivery_date__gte=today - timedelta(days=settings.RECOMMENDATION_WINDOW_DAYS),
+    ).exclude(status=Order.OrderStatus.CANCELED).order_by()
+    score = Count('pk') + Count('pk', filter=Q(delivery_date__gte=recent))
+
+    by_user = _top_foods(
+        orders.values('user_id', 'food_item_id').annotate(score=score), 'user_id'
+    )
+    by_company = _top_foods(
+        orders.filter(company__isnull=False).values('company_id', 'food_item_id').annotate(score=score), 'company_id'
+    )
+
+    with transaction.atomic(using=sharding.current_alias()):
+        FoodPreference.objects.all().delete()
+        FoodPreference.objects.bulk_create(
+            [FoodPreference(user_id=user_id, ranking=ranking) for user_id, ranking in by_user.items()]
+            + [FoodPreference(company_id=company_id, ranking=ranking) for company_id, ranking in by_company.items()],
+            batch_size=1000,
+        )
+    return len(by_user), len(by_company)
+
+
+def food_ranking(user):
+    """
+    {food id: position} for ordering menus for `user`, from one query for
+    the user's and their company's rankings. Foods not listed keep their
+    place after the ranked ones.
+    """
+    owners = Q(user_id=user.pk)
+    if user.company_id:
+        owners |= Q(company_id=user.company_id)
+    rankings = dict(
+        (('user' if user_id else 'company'), ranking)
+        for user_id, ranking in FoodPreference.objects.filter(owners).values_list('user_id', 'ranking')
+    )
+    positions = {}
+    for food_id in rankings.get('user', []) + rankings.get('company', []):
+        positions.setdefault(food_id, len(positions))
+    return positions
@@ -0,0 +1,139 @@
+# orders/report_cache.py
+"""
+Result cache for the admin report endpoints.
+
+Entries are keyed by (endpoint, from, to, companyId, date) plus a version
+token for every delivery date the report reads. When an order for a date
+changes, orders/rollups.py calls invalidate_dates() after commit, which
+replaces that date's token; every cached report covering the date then misses
+on its next read. Nothing has to enumerate or delete existing entries.
+
+Ranges that reach today (or the future) are cached briefly, because
+figures such as today's sales change without any order in the range
+changing. Fully historical ranges are cached for much longer, but only with
+a shared cache (settings.CACHE_SHARED): a process-local cache never sees the
+invalidations made by other workers or by cron commands, so there every
+range gets the short TTL.
+
+Reports that are cached are built from the primary even on requests that
+read from the replica (core/db_routing.py): a replica that lags behind the
+invalidation would otherwise put stale figures under the new token for the
+whole TTL.
+
+Concurrent misses for the same key are single-flighted: the first request
+takes a short cache.add() lock and builds the report. The others wait for
+its result, and only compute it themselves if the lock holder is too slow.
+"""
+import hashlib
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from core import db_routing
+
+KEY_PREFIX = 'reports'
+
+# Poll interval while waiting for another request to finish building a report.
+WAIT_INTERVAL = 0.05
+
+
+def _cache():
+    return caches[settings.REPORT_CACHE_ALIAS]
+
+
+def _version_key(date):
+    return f'{KEY_PREFIX}:version:{date.isoformat()}'
+
+
+def invalidate_dates(dates):
+    """Gives each date a new version token, orphaning cached reports that read it."""
+    if not dates:
+        return
+    _cache().set_many(
+        {_version_key(date): uuid.uuid4().hex for date in set(dates)},
+        timeout=None,
+    )
+
+
+def _versions(dates):
+    """Returns the current version token of every date, creating missing ones."""
+    cache = _cache()
+    keys = [_version_key(date) for date in dates]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # add() so concurrent readers settle on the same token.
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _date_range(start_date, end_date):
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+def cache_key(endpoint, start_date, end_date, company_id=None, today=None):
+    """
+    The cache key for one report. Includes the version tokens of every date
+    in [start_date, end_date], so it changes whenever an order on any of
+    those dates changes. Reports must therefore only read data for dates in
+    their range; `today` is part of the key so entries roll over at midnight.
+    """
+    today = today or timezone.now().date()
+    digest = hashlib.sha1(':'.join(_versions(_date_range(start_date, end_date))).encode()).hexdigest()
+    return (
+        f'{KEY_PREFIX}:{endpoint}:{start_date.isoformat()}:{end_date.isoformat()}'
+        f':{company_id or "all"}:{today.isoformat()}:{digest}'
+    )
+
+
+def ttl_for(end_date, today=None):
+    """
+    Short TTL for ranges that reach today or later, long TTL for history
+    (unless the cache is process-local).
+    """
+    today = today or timezone.now().date()
+    if end_date >= today or not settings.CACHE_SHARED:
+        return settings.REPORT_CACHE_LIVE_TTL
+    return settings.REPORT_CACHE_HISTORICAL_TTL
+
+
+def cached_report(endpoint, start_date, end_date, build, company_id=None, today=None):
+    """
+    Returns build() for the given report parameters, served from the cache
+    when possible. Ranges longer than REPORT_CACHE_MAX_DAYS are not cached.
+    """
+    today = today or timezone.now().date()
+    if (end_date - start_date).days + 1 > settings.REPORT_CACHE_MAX_DAYS or end_date < start_date:
+        return build()
+
+    cache = _cache()
+    key = cache_key(endpoint, start_date, end_date, company_id, today)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    lock_key = f'{key}:lock'
+    lock_timeout = settings.REPORT_CACHE_LOCK_TIMEOUT
+    if not cache.add(lock_key, 1, timeout=lock_timeout):
+        # Someone else is building this report; wait for their result.
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            result = cache.get(key)
+            if result is not None:
+                return result
+        # The builder died or is very slow: build it ourselves.
+        return build()
+
+    try:
+        with db_routing.use_primary():
+            result = build()
+        cache.set(key, result, timeout=ttl_for(end_date, today))
+    finally:
+        cache.delete(lock_key)
+    return result
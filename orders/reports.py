@@ -0,0 +1,234 @@
+# orders/reports.py
+"""
+Set-based aggregations behind AdminReportsView.
+
+Order counts, pending counts, top items and revenue are read from the per-day
+rollup tables maintained by orders/rollups.py, so the cost depends on the
+number of days, companies and menu items in the range - not on the number of
+orders. Company stats never join employees x orders: each count is an
+independent correlated subquery.
+
+Revenue is priced at the current food/side dish prices (orders do not store
+the price they were placed at), and, like the dashboard rollups, only counts
+orders whose user belongs to a company.
+
+With tenant sharding (core/sharding.py) the reports are built on every shard
+and combined with merge_today_summaries()/merge_admin_reports().
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from companies.models import Company
+from users.models import User
+from .models import DailyOrderCount, DailyFoodOrderCount, DailySideOrderCount
+
+ZERO = Decimal('0.00')
+
+
+def _revenue(queryset, price_field):
+    """Sum of orders x current price per date for a per-day rollup queryset."""
+    line_total = ExpressionWrapper(
+        F('orders') * F(price_field), output_field=DecimalField(max_digits=14, decimal_places=2)
+    )
+    return queryset.values('date').annotate(revenue=Sum(line_total)).order_by()
+
+
+def _sales_by_date(start_date, end_date, company_id=None):
+    """
+    Returns {date: [order_count, pending_count, revenue]} for the range
+    using three GROUP BY date statements over the rollup tables.
+    """
+    daily = DailyOrderCount.objects.filter(date__range=(start_date, end_date))
+    foods = DailyFoodOrderCount.objects.filter(date__range=(start_date, end_date))
+    sides = DailySideOrderCount.objects.filter(date__range=(start_date, end_date))
+    if company_id:
+        daily = daily.filter(company_id=company_id)
+        foods = foods.filter(company_id=company_id)
+        sides = sides.filter(company_id=company_id)
+
+    totals = defaultdict(lambda: [0, 0, ZERO])
+    for row in daily.values('date').annotate(n=Sum('orders'), pending=Sum('pending')).order_by():
+        totals[row['date']][0] += row['n'] or 0
+        totals[row['date']][1] += row['pending'] or 0
+    for queryset, price_field in ((foods, 'food_item__price'), (sides, 'side_dish__price')):
+        for row in _revenue(queryset, price_field):
+            totals[row['date']][2] += row['revenue'] or ZERO
+    # Dates whose orders were all deleted or moved keep a zero row; drop them.
+    return {date: values for date, values in totals.items() if values[0] or values[2]}
+
+
+def _count_subquery(queryset, group_field):
+    """A correlated COUNT(*) subquery usable in annotate(), 0 when empty."""
+    counted = queryset.order_by().values(group_field).annotate(n=Count('pk')).values('n')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def _sum_subquery(queryset, group_field, field):
+    summed = queryset.order_by().values(group_field).annotate(total=Sum(field)).values('total')
+    return Coalesce(Subquery(summed, output_field=IntegerField()), Value(0))
+
+
+def build_today_summary(company_id=None, today=None):
+    """Today's order count and sales, the part of the summary not tied to the report range."""
+    today = today or timezone.now().date()
+    orders, _, revenue = _sales_by_date(today, today, company_id).get(today, [0, 0, ZERO])
+    return {"orders_today": orders, "total_sales_today": revenue}
+
+
+def merge_today_summaries(summaries):
+    return {
+        "orders_today": sum(summary["orders_today"] for summary in summaries),
+        "total_sales_today": sum((summary["total_sales_today"] for summary in summaries), ZERO),
+    }
+
+
+def build_user_stats(company_id=None, today=None):
+    """
+    Active users per company and the user totals. They do not depend on the
+    report range, so reports cached over past ranges take them from here.
+    """
+    today = today or timezone.now().date()
+    companies = Company.objects.all()
+    if company_id:
+        companies = companies.filter(id=company_id)
+    active_users = companies.annotate(
+        n=_count_subquery(User.objects.filter(company=OuterRef('pk'), is_active=True), 'company'),
+    ).values_list('id', 'n')
+    return {
+        "active_users": dict(active_users),
+        "user_stats": {
+            "total_users": User.objects.count(),
+            "active_last_30_days": User.objects.filter(last_login__gte=(today - timedelta(days=30))).count()
+        },
+    }
+
+
+def merge_user_stats(stats):
+    active_users = defaultdict(int)
+    for shard_stats in stats:
+        for company_id, count in shard_stats["active_users"].items():
+            active_users[company_id] += count
+    return {
+        "active_users": dict(active_users),
+        "user_stats": {
+            key: sum(shard_stats["user_stats"][key] for shard_stats in stats)
+            for key in ("total_users", "active_last_30_days")
+        },
+    }
+
+
+def with_user_stats(report, users):
+    """The report with its user figures taken from build_user_stats()."""
+    company_stats = [
+        {'id': row['id'], 'name': row['name'], 'active_users': users["active_users"].get(row['id'], 0),
+         'orders': row['orders']}
+        for row in report["company_stats"]
+    ]
+    return {**report, "company_stats": company_stats, "user_stats": users["user_stats"]}
+
+
+def build_admin_report(start_date, end_date, company_id=None, today=None, top_items_limit=5):
+    """
+    Builds the payload for the admin reports page for [start_date, end_date],
+    optionally restricted to one company. `top_items_limit=None` lists every
+    ordered item, for reports that are merged afterwards.
+    """
+    today = today or timezone.now().date()
+
+    by_date = _sales_by_date(start_date, end_date, company_id)
+    if start_date <= today <= end_date:
+        orders_today, _, sales_today = by_date.get(today, [0, 0, ZERO])
+        today_summary = {"orders_today": orders_today, "total_sales_today": sales_today}
+    else:
+        today_summary = build_today_summary(company_id, today)
+
+    companies = Company.objects.all()
+    top_items = DailyFoodOrderCount.objects.filter(date__range=(start_date, end_date))
+    if company_id:
+        companies = companies.filter(id=company_id)
+        top_items = top_items.filter(company_id=company_id)
+
+    # --- Summary Stats ---
+    summary_data = {
+        "orders_today": today_summary["orders_today"],
+        "pending_orders_total": sum(values[1] for values in by_date.values()),
+        "total_sales_today": today_summary["total_sales_today"],
+    }
+
+    # --- Top Items ---
+    top_items_data = top_items.values('food_item__id', 'food_item__name').annotate(
+        foodId=F('food_item__id'),
+        name=F('food_item__name'),
+        ordered=Sum('orders')
+    ).filter(ordered__gt=0).order_by('-ordered')
+    if top_items_limit is not None:
+        top_items_data = top_items_data[:top_items_limit]
+
+    # --- Sales by Date ---
+    sales_by_date_data = [
+        {'date': date.isoformat(), 'orders': orders, 'revenue': revenue}
+        for date, (orders, _, revenue) in sorted(by_date.items())
+    ]
+
+    # --- Company Stats (independent subqueries, no employees x orders join) ---
+    company_stats_data = companies.annotate(
+        orders=_sum_subquery(
+            DailyOrderCount.objects.filter(company=OuterRef('pk'), date__range=(start_date, end_date)),
+            'company',
+            'orders',
+        ),
+    ).values('id', 'name', 'orders')
+
+    # --- User Stats (and each company's active users) ---
+    return with_user_stats({
+        "summary": summary_data,
+        "top_items": list(top_items_data),
+        "sales_by_date": sales_by_date_data,
+        "company_stats": list(company_stats_data),
+    }, build_user_stats(company_id, today))
+
+
+def merge_admin_reports(reports, top_items_limit=5):
+    """
+    Combines build_admin_report() payloads of several shards. Each shard holds
+    other companies' orders and users, so every figure is summed; the shard
+    reports must be built with `top_items_limit=None`.
+    """
+    summary = merge_today_summaries([report["summary"] for report in reports])
+    summary["pending_orders_total"] = sum(report["summary"]["pending_orders_total"] for report in reports)
+
+    top_items = {}
+    for report in reports:
+        for item in report["top_items"]:
+            merged = top_items.setdefault(item['foodId'], {**item, 'ordered': 0})
+            merged['ordered'] += item['ordered']
+
+    sales = defaultdict(lambda: {'orders': 0, 'revenue': ZERO})
+    for report in reports:
+        for row in report["sales_by_date"]:
+            sales[row['date']]['orders'] += row['orders']
+            sales[row['date']]['revenue'] += row['revenue']
+
+    # Companies are reference data, so every shard lists all of them.
+    company_stats = {}
+    for report in reports:
+        for row in report["company_stats"]:
+            merged = company_stats.setdefault(row['id'], {**row, 'active_users': 0, 'orders': 0})
+            merged['active_users'] += row['active_users']
+            merged['orders'] += row['orders']
+
+    return {
+        "summary": {key: summary[key] for key in ("orders_today", "pending_orders_total", "total_sales_today")},
+        "top_items": sorted(top_items.values(), key=lambda item: -item['ordered'])[:top_items_limit],
+        "sales_by_date": [{'date': date, **sales[date]} for date in sorted(sales)],
+        "company_stats": list(company_stats.values()),
+        "user_stats": {
+            key: sum(report["user_stats"][key] for report in reports)
+            for key in ("total_users", "active_last_30_days")
+        },
+    }
@@ -0,0 +1,436 @@
+# orders/rollups.py
+"""
+Incrementally maintained per-company dashboard rollups.
+
+Every order change is turned into small +/- deltas on the counter tables
+(DashboardSnapshot, DailyOrderCount, FoodOrderCount, DailyFoodOrderCount,
+DailySideOrderCount). The deltas are applied after the order's transaction
+commits, so rolled-back orders are never counted and the order transaction
+never waits on a company-wide counter row. Reading a dashboard or a report is
+then a handful of index lookups over a few thousand rows at most.
+
+Orders whose user has no company are not rolled up; they only appear in the
+live (?fresh=1) super admin view.
+"""
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from companies.models import Company
+from core import sharding
+from menu.models import FoodItem, SideDish
+from .models import (
+    Order, ArchivedOrder, DashboardSnapshot, DailyOrderCount, FoodOrderCount, DailyFoodOrderCount,
+    DailySideOrderCount,
+)
+from .transitions import KITCHEN_STATUSES, PENDING_STATUSES
+from . import report_cache
+
+_paused = contextvars.ContextVar('orders_rollups_paused', default=False)
+
+
+@contextmanager
+def paused():
+    """Suspends rollup maintenance, e.g. while archiving orders that must stay counted."""
+    token = _paused.set(True)
+    try:
+        yield
+    finally:
+        _paused.reset(token)
+
+
+class RollupDelta:
+    """Accumulates counter changes and applies them in one go."""
+
+    def __init__(self):
+        self.daily = Counter()
+        self.daily_pending = Counter()
+        self.foods = Counter()
+        self.daily_foods = Counter()
+        self.daily_sides = Counter()
+        self.pending = Counter()
+        self.companies = set()
+        # Delivery dates touched, including orders of users without a company.
+        self.dates = set()
+
+    def add(self, company_id, date, food_item_id, status, sign, side_dish_ids=()):
+        if date is not None:
+            self.dates.add(date)
+        if company_id is None:
+            return
+        self.companies.add(company_id)
+        pending = status in PENDING_STATUSES
+        if pending:
+            self.pending[company_id] += sign
+        if food_item_id is not None:
+            self.foods[(company_id, food_item_id)] += sign
+        if date is None:
+            return
+        self.daily[(company_id, date)] += sign
+        if pending:
+            self.daily_pending[(company_id, date)] += sign
+        if food_item_id is not None:
+            self.daily_foods[(company_id, date, food_item_id)] += sign
+        self.add_sides(company_id, date, side_dish_ids, sign)
+
+    def add_sides(self, company_id, date, side_dish_ids, sign):
+        if date is not None:
+            self.dates.add(date)
+        if company_id is None or date is None:
+            return
+        self.companies.add(company_id)
+        for side_dish_id in side_dish_ids:
+            self.daily_sides[(company_id, date, side_dish_id)] += sign
+
+    def apply(self):
+        for key in self.daily.keys() | self.daily_pending.keys():
+            company_id, date = key
+            _bump(DailyOrderCount, {'company_id': company_id, 'date': date},
+                  orders=self.daily[key], pending=self.daily_pending[key])
+        for (company_id, food_item_id), delta in self.foods.items():
+            _bump(FoodOrderCount, {'company_id': company_id, 'food_item_id': food_item_id}, orders=delta)
+        for (company_id, date, food_item_id), delta in self.daily_foods.items():
+            _bump(DailyFoodOrderCount, {'company_id': company_id, 'date': date, 'food_item_id': food_item_id},
+                  orders=delta)
+        for (company_id, date, side_dish_id), delta in self.daily_sides.items():
+            _bump(DailySideOrderCount, {'company_id': company_id, 'date': date, 'side_dish_id': side_dish_id},
+                  orders=delta)
+        now = timezone.now()
+        for company_id in self.companies:
+            # Always touch the snapshot so its timestamp reflects the last change.
+            _bump(DashboardSnapshot, {'company_id': company_id}, touch=True,
+                  extra={'updated_at': now}, pending_orders=self.pending[company_id])
+        # Cached reports for these dates are stale once the new counts are
+        # committed. Invalidating any earlier would let a report read the old
+        # counts and cache them under the new token.
+        dates = set(self.dates)
+        sharding.on_commit(lambda: report_cache.invalidate_dates(dates))
+
+    def schedule(self):
+        if self.companies or self.dates:
+            sharding.on_commit(self.apply)
+
+
+def _bump(model, lookup, touch=False, extra=None, **deltas):
+    """
+    Adds the given deltas to the row matching `lookup`, creating it if needed.
+    Zero deltas are skipped unless `touch` is set.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas and not touch:
+        return
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    changes.update(extra or {})
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic(using=sharding.current_alias()):
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another process created the row first; add our deltas to theirs.
+        model.objects.filter(**lookup).update(**changes)
+
+
+# --- Hooks called from orders/signals.py and orders/transitions.py ---
+
+def _side_dish_ids(order):
+    if order.pk is None:
+        return []
+    return list(Order.side_dishes.through.objects.filter(order_id=order.pk).values_list('sidedish_id', flat=True))
+
+
+def order_saved(order, created):
+    if _paused.get():
+        return
+    new_state = order.rollup_key()
+    old_state = None if created else getattr(order, '_rollup_state', None)
+    order._rollup_state = new_state
+    if old_state == new_state:
+        return
+
+    delta = RollupDelta()
+    if old_state is None:
+        # Side dishes are added after the row exists, via m2m_changed.
+        delta.add(*new_state, sign=1)
+    else:
+        side_dish_ids = []
+        if old_state[:2] != new_state[:2]:
+            # Company or date changed: the side dish counts move with the order.
+            side_dish_ids = _side_dish_ids(order)
+        delta.add(*old_state, sign=-1, side_dish_ids=side_dish_ids)
+        delta.add(*new_state, sign=1, side_dish_ids=side_dish_ids)
+    delta.schedule()
+
+
+def order_deleting(order):
+    """Called on pre_delete, while the side dish links still exist."""
+    if not _paused.get():
+        order._rollup_sides = _side_dish_ids(order)
+
+
+def order_deleted(order):
+    if _paused.get():
+        return
+    state = getattr(order, '_rollup_state', None) or order.rollup_key()
+    delta = RollupDelta()
+    delta.add(*state, sign=-1, side_dish_ids=getattr(order, '_rollup_sides', []))
+    delta.schedule()
+
+
+def side_dishes_changed(order, action, side_dish_ids):
+    """
+    Called from m2m_changed for Order.side_dishes with the affected ids.
+    For 'clear', the ids must have been captured on 'pre_clear'.
+    """
+    if _paused.get() or not side_dish_ids:
+        return
+    sign = 1 if action == 'post_add' else -1
+    delta = RollupDelta()
+    delta.add_sides(order.company_id, order.delivery_date, side_dish_ids, sign)
+    delta.schedule()
+
+
+def status_changed_in_bulk(queryset, sources, to_status):
+    """
+    Must be called right before bulk_transition's UPDATE, inside its
+    transaction. Only queries when the pending count or the kitchen summary
+    (KITCHEN_STATUSES) actually changes.
+    """
+    if _paused.get():
+        return
+    affected = [status for status in sources if (status in PENDING_STATUSES) != (to_status in PENDING_STATUSES)]
+    # Moves that leave the pending counts alone still change the kitchen summary.
+    kitchen = [status for status in sources if (status in KITCHEN_STATUSES) != (to_status in KITCHEN_STATUSES)]
+    if not affected and not kitchen:
+        return
+    sign = 1 if to_status in PENDING_STATUSES else -1
+    delta = RollupDelta()
+    rows = (
+        queryset.filter(status__in=set(affected) | set(kitchen))
+        .values('company_id', 'delivery_date', 'status')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        company_id, date = row['company_id'], row['delivery_date']
+        if date is not None:
+            delta.dates.add(date)
+        if company_id is None or row['status'] not in affected:
+            continue
+        delta.companies.add(company_id)
+        delta.pending[company_id] += sign * row['n']
+        if date is not None:
+            delta.daily_pending[(company_id, date)] += sign * row['n']
+    delta.schedule()
+
+
+def delivery_date_moved(queryset, old_date, new_date):
+    """
+    Moves the per-day counts of the orders in `queryset` from old_date to
+    new_date. Must be called before their delivery_date is updated in bulk.
+    """
+    if _paused.get() or old_date == new_date:
+        return
+    delta = RollupDelta()
+    rows = queryset.values('company_id', 'food_item_id', 'status').annotate(n=Count('id')).order_by()
+    for row in rows:
+        delta.add(row['company_id'], old_date, row['food_item_id'], row['status'], sign=-row['n'])
+        delta.add(row['company_id'], new_date, row['food_item_id'], row['status'], sign=row['n'])
+    sides = (
+        Order.side_dishes.through.objects.filter(order__in=queryset.values('pk'))
+        .values('order__company_id', 'sidedish_id').annotate(n=Count('id')).order_by()
+    )
+    for row in sides:
+        delta.add_sides(row['order__company_id'], old_date, [row['sidedish_id']], -row['n'])
+        delta.add_sides(row['order__company_id'], new_date, [row['sidedish_id']], row['n'])
+    delta.schedule()
+
+
+# --- Reading ---
+
+def dashboard_stats(company_id=None, today=None, top_foods_limit=5):
+    """
+    Dashboard numbers read from the rollups. With a company_id this is three
+    indexed lookups; without one the per-company rows are summed.
+    """
+    today = today or timezone.now().date()
+    snapshots = DashboardSnapshot.objects.all()
+    daily = DailyOrderCount.objects.filter(date=today)
+    foods = FoodOrderCount.objects.filter(orders__gt=0)
+    if company_id is not None:
+        snapshots = snapshots.filter(company_id=company_id)
+        daily = daily.filter(company_id=company_id)
+        foods = foods.filter(company_id=company_id)
+
+    snapshot = snapshots.aggregate(pending=Sum('pending_orders'), updated_at=Max('updated_at'))
+    top_foods = (
+        foods.values('food_item__name')
+        .annotate(count=Sum('orders'))
+        .order_by('-count')
+    )
+    if top_foods_limit is not None:
+        top_foods = top_foods[:top_foods_limit]
+    return {
+        'orders_today': daily.aggregate(total=Sum('orders'))['total'] or 0,
+        'pending_orders_total': snapshot['pending'] or 0,
+        'top_5_foods': [{'name': row['food_item__name'], 'count': row['count']} for row in top_foods],
+        'snapshot_at': snapshot['updated_at'],
+    }
+
+
+def _food_count(queryset):
+    """Correlated COUNT of `queryset` rows per food item, 0 when empty."""
+    counted = queryset.order_by().values('food_item').annotate(n=Count('pk')).values('n')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+
+def live_dashboard_stats(company_id=None, today=None, top_foods_limit=5):
+    """Dashboard numbers computed directly from the orders (and archived orders) tables."""
+    today = today or timezone.now().date()
+    base_queryset = Order.objects.all()
+    archived = ArchivedOrder.objects.all()
+    if company_id is not None:
+        base_queryset = base_queryset.filter(company_id=company_id)
+        archived = archived.filter(company_id=company_id)
+
+    top_foods = (
+        FoodItem.objects.annotate(
+            order_count=_food_count(base_queryset.filter(food_item=OuterRef('pk')))
+            + _food_count(archived.filter(food_item=OuterRef('pk')))
+        )
+        .filter(order_count__gt=0)
+        .order_by('-order_count')
+    )
+    if top_foods_limit is not None:
+        top_foods = top_foods[:top_foods_limit]
+    return {
+        'orders_today': base_queryset.filter(delivery_date=today).count(),
+        'pending_orders_total': base_queryset.filter(status__in=PENDING_STATUSES).count(),
+        'top_5_foods': [{'name': f.name, 'count': f.order_count} for f in top_foods],
+        'snapshot_at': timezone.now(),
+    }
+
+
+def merge_dashboard_stats(stats, top_foods_limit=5):
+    """
+    Sums the dashboard numbers of several shards (see core/sharding.py); they
+    must be computed with `top_foods_limit=None`.
+    """
+    top_foods = Counter()
+    for entry in stats:
+        for food in entry['top_5_foods']:
+            top_foods[food['name']] += food['count']
+    snapshots = [entry['snapshot_at'] for entry in stats if entry['snapshot_at'] is not None]
+    return {
+        'orders_today': sum(entry['orders_today'] for entry in stats),
+        'pending_orders_total': sum(entry['pending_orders_total'] for entry in stats),
+        'top_5_foods': [{'name': name, 'count': count} for name, count in top_foods.most_common(top_foods_limit)],
+        'snapshot_at': max(snapshots) if snapshots else None,
+    }
+
+
+def _archived_counts(company_ids):
+    """
+    Per-day order, food and side dish counts of the archived orders of the
+    given companies, in the same shape rebuild() uses for live orders.
+    """
+    archived = ArchivedOrder.objects.filter(company_id__in=company_ids)
+    daily, foods, daily_foods, daily_sides = Counter(), Counter(), Counter(), Counter()
+    for row in archived.values('company_id', 'delivery_date', 'food_item_id').annotate(n=Count('id')).order_by():
+        company_id, date, food_item_id = row['company_id'], row['delivery_date'], row['food_item_id']
+        if food_item_id is not None:
+            foods[(company_id, food_item_id)] += row['n']
+        if date is None:
+            continue
+        daily[(company_id, date)] += row['n']
+        if food_item_id is not None:
+            daily_foods[(company_id, date, food_item_id)] += row['n']
+    sides = archived.filter(delivery_date__isnull=False).exclude(side_dishes=[]).values_list('company_id', 'delivery_date', 'side_dishes')
+    existing_sides = set(SideDish.objects.values_list('pk', flat=True))
+    for company_id, date, side_dishes in sides.iterator(chunk_size=2000):
+        for side in side_dishes:
+            if side['id'] in existing_sides:
+                daily_sides[(company_id, date, side['id'])] += 1
+    return daily, foods, daily_foods, daily_sides
+
+
+def rebuild(company_ids=None):
+    """
+    Recomputes the rollups from scratch (all companies, or only the given ones),
+    from the orders table plus the archived orders.
+    Used after bulk imports or if the counters are ever suspected to drift.
+    """
+    orders = Order.objects.filter(company__isnull=False)
+    companies = Company.objects.all()
+    if company_ids is not None:
+        orders = orders.filter(company_id__in=company_ids)
+        companies = companies.filter(pk__in=company_ids)
+    company_ids = list(companies.values_list('pk', flat=True))
+    dated = orders.filter(delivery_date__isnull=False)
+
+    daily, foods, daily_foods, daily_sides = _archived_counts(company_ids)
+    daily_pending = Counter()
+    for row in (
+        dated.values('company_id', 'delivery_date')
+        .annotate(n=Count('id'), pending=Count('id', filter=Q(status__in=PENDING_STATUSES))).order_by()
+    ):
+        key = (row['company_id'], row['delivery_date'])
+        daily[key] += row['n']
+        daily_pending[key] += row['pending']
+    for row in (
+        orders.filter(food_item__isnull=False)
+        .values('company_id', 'food_item_id').annotate(n=Count('id')).order_by()
+    ):
+        foods[(row['company_id'], row['food_item_id'])] += row['n']
+    for row in (
+        dated.filter(food_item__isnull=False)
+        .values('company_id', 'delivery_date', 'food_item_id').annotate(n=Count('id')).order_by()
+    ):
+        daily_foods[(row['company_id'], row['delivery_date'], row['food_item_id'])] += row['n']
+    for row in (
+        Order.side_dishes.through.objects.filter(order__in=dated.values('pk'))
+        .values('order__company_id', 'order__delivery_date', 'sidedish_id')
+        .annotate(n=Count('id')).order_by()
+    ):
+        daily_sides[(row['order__company_id'], row['order__delivery_date'], row['sidedish_id'])] += row['n']
+    pending = dict(
+        orders.filter(status__in=PENDING_STATUSES)
+        .values('company_id').annotate(n=Count('id')).order_by()
+        .values_list('company_id', 'n')
+    )
+
+    # Cached reports over any date whose counts may change are now stale.
+    stale_dates = {date for _, date in daily} | set(
+        DailyOrderCount.objects.filter(company_id__in=company_ids).values_list('date', flat=True).distinct()
+    )
+
+    with transaction.atomic(using=sharding.current_alias()):
+        sharding.on_commit(lambda: report_cache.invalidate_dates(stale_dates))
+        for model in (DailyOrderCount, FoodOrderCount, DailyFoodOrderCount, DailySideOrderCount, DashboardSnapshot):
+            model.objects.filter(company_id__in=company_ids).delete()
+
+        DailyOrderCount.objects.bulk_create([
+            DailyOrderCount(company_id=company_id, date=date, orders=n, pending=daily_pending[(company_id, date)])
+            for (company_id, date), n in daily.items()
+        ])
+        FoodOrderCount.objects.bulk_create([
+            FoodOrderCount(company_id=company_id, food_item_id=food_item_id, orders=n)
+            for (company_id, food_item_id), n in foods.items()
+        ])
+        DailyFoodOrderCount.objects.bulk_create([
+            DailyFoodOrderCount(company_id=company_id, date=date, food_item_id=food_item_id, orders=n)
+            for (company_id, date, food_item_id), n in daily_foods.items()
+        ])
+        DailySideOrderCount.objects.bulk_create([
+            DailySideOrderCount(company_id=company_id, date=date, side_dish_id=side_dish_id, orders=n)
+            for (company_id, date, side_dish_id), n in daily_sides.items()
+        ])
+        DashboardSnapshot.objects.bulk_create([
+            DashboardSnapshot(company_id=company_id, pending_orders=pending.get(company_id, 0))
+            for company_id in company_ids
+        ])
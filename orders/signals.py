@@ -0,0 +1,75 @@
+# orders/signals.py
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from schedules import capacity
+from schedules.models import DailyMenu
+from .models import Order
+from . import denormalization, rollups
+
+
+@receiver(post_save, sender=Order)
+def update_rollups_on_save(sender, instance, created, **kwargs):
+    """
+    Keeps the dashboard rollups in step with created or changed orders.
+    """
+    rollups.order_saved(instance, created)
+
+
+@receiver(pre_delete, sender=Order)
+def capture_side_dishes_on_delete(sender, instance, **kwargs):
+    """
+    Remembers the order's side dishes before the cascade removes the links.
+    """
+    rollups.order_deleting(instance)
+
+
+@receiver(post_delete, sender=Order)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    """
+    Removes a deleted order from the dashboard rollups.
+    """
+    rollups.order_deleted(instance)
+
+
+@receiver(post_delete, sender=Order)
+def release_portion_on_delete(sender, instance, **kwargs):
+    """
+    Gives the portion held by a deleted order back to its menu's capacity.
+    """
+    if instance.food_item_id and instance.status != Order.OrderStatus.CANCELED:
+        capacity.release(instance.daily_menu_id, instance.food_item_id)
+
+
+@receiver(m2m_changed, sender=Order.side_dishes.through)
+def update_rollups_on_side_dishes(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps the per-day side dish counts in step with Order.side_dishes.
+    Changes made from the SideDish side are left to rollups.rebuild().
+    """
+    if reverse:
+        return
+    if action == 'pre_clear':
+        instance._rollup_cleared_sides = list(instance.side_dishes.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        rollups.side_dishes_changed(instance, action, getattr(instance, '_rollup_cleared_sides', []))
+    elif action in ('post_add', 'post_remove'):
+        rollups.side_dishes_changed(instance, action, pk_set or ())
+
+
+@receiver(pre_save, sender=DailyMenu)
+def remember_menu_date(sender, instance, **kwargs):
+    """
+    Remembers the stored date so a change can be copied to the menu's orders.
+    """
+    if instance.pk:
+        instance._previous_date = DailyMenu.objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+
+
+@receiver(post_save, sender=DailyMenu)
+def sync_order_delivery_dates(sender, instance, created, **kwargs):
+    """
+    Keeps Order.delivery_date in step when a daily menu is moved to another date.
+    """
+    previous = getattr(instance, '_previous_date', None)
+    if not created and previous is not None and previous != instance.date:
+        denormalization.menu_date_changed(instance, previous)
@@ -0,0 +1,16 @@
+# orders/tasks.py
+from jobs.queue import task
+from .forecasting import compute_forecasts
+from .recommendations import compute_preferences
+
+
+@task('orders.compute_food_preferences')
+def compute_food_preferences():
+    """Background job: recomputes the per-user and per-company food rankings."""
+    compute_preferences()
+
+
+@task('orders.forecast_demand')
+def forecast_demand():
+    """Background job: recomputes the kitchen demand forecasts."""
+    compute_forecasts()
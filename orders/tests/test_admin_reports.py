@@ -49,11 +49,13 @@ class AdminReportsAPITests(APITestCase):
         self.daily_menu_yesterday.available_foods.set([self.food_kebab])
 
         # === Create Orders ===
-        # 2 orders for today
-        Order.objects.create(user=self.employee_a, daily_menu=self.daily_menu_today, food_item=self.food_kebab)
-        Order.objects.create(user=self.employee_a, daily_menu=self.daily_menu_today, food_item=self.food_pizza)
-        # 1 order for yesterday
-        Order.objects.create(user=self.employee_a, daily_menu=self.daily_menu_yesterday, food_item=self.food_kebab)
+        # Reports read the rollups, which are updated once the orders commit.
+        with self.captureOnCommitCallbacks(execute=True):
+            # 2 orders for today
+            Order.objects.create(user=self.employee_a, daily_menu=self.daily_menu_today, food_item=self.food_kebab)
+            Order.objects.create(user=self.employee_a, daily_menu=self.daily_menu_today, food_item=self.food_pizza)
+            # 1 order for yesterday
+            Order.objects.create(user=self.employee_a, daily_menu=self.daily_menu_yesterday, food_item=self.food_kebab)
 
         # URL for the reports endpoint
         self.reports_url = reverse('admin-reports')
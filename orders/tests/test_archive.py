@@ -0,0 +1,90 @@
+# orders/tests/test_archive.py
+
+import gzip
+import json
+import tempfile
+from io import StringIO
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from companies.models import Company
+from menu.models import FoodItem, SideDish
+from orders import rollups
+from orders.models import ArchivedOrder, Order
+from orders.reports import build_admin_report
+from schedules import capacity
+from schedules.models import DailyMenu, MenuItemCapacity, Schedule
+from users.models import User
+
+
+class OrderArchiveTests(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.old_date = self.today - timedelta(days=400)
+        self.company = Company.objects.create(name="Company")
+        self.employee = User.objects.create_user(username='emp', password='password123', company=self.company)
+        self.kebab = FoodItem.objects.create(name="Kebab", description="", price=Decimal('100.00'))
+        self.salad = SideDish.objects.create(name="Salad", price=Decimal('20.00'))
+        schedule = Schedule.objects.create(name="Schedule", start_date=self.old_date, end_date=self.today)
+        self.old_menu = DailyMenu.objects.create(schedule=schedule, date=self.old_date)
+        self.menu_today = DailyMenu.objects.create(schedule=schedule, date=self.today)
+
+    def place(self, menu, status=Order.OrderStatus.DELIVERED, sides=()):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(user=self.employee, daily_menu=menu, food_item=self.kebab, status=status)
+            order.side_dishes.set(sides)
+        return order
+
+    def test_archives_old_finished_orders_with_a_snapshot(self):
+        delivered = self.place(self.old_menu, sides=[self.salad])
+        pending = self.place(self.old_menu, status=Order.OrderStatus.PLACED)
+        recent = self.place(self.menu_today)
+
+        call_command('archive_orders', stdout=StringIO())
+
+        self.assertEqual(set(Order.objects.values_list('pk', flat=True)), {pending.pk, recent.pk})
+        archived = ArchivedOrder.objects.get()
+        self.assertEqual(archived.pk, delivered.pk)
+        self.assertEqual(archived.company, self.company)
+        self.assertEqual(archived.delivery_date, self.old_date)
+        self.assertEqual(archived.side_dishes, [{'id': self.salad.pk, 'name': "Salad", 'price': '20.00'}])
+        self.assertEqual(archived.total_price, Decimal('120.00'))
+        self.assertFalse(Order.side_dishes.through.objects.filter(order_id=delivered.pk).exists())
+
+    def test_archiving_does_not_hand_portions_back(self):
+        self.place(self.old_menu)
+        capacity.set_limits(self.old_menu, {self.kebab.pk: 1})
+
+        call_command('archive_orders', stdout=StringIO())
+        self.assertEqual(ArchivedOrder.objects.count(), 1)
+        self.assertEqual(MenuItemCapacity.objects.get(daily_menu=self.old_menu).remaining, 0)
+
+    def test_reports_and_rebuild_still_count_archived_orders(self):
+        self.place(self.old_menu, sides=[self.salad])
+        self.place(self.menu_today)
+        report = build_admin_report(self.old_date, self.today, today=self.today)
+        dashboard = rollups.dashboard_stats(self.company.id)
+
+        call_command('archive_orders', stdout=StringIO())
+        self.assertEqual(build_admin_report(self.old_date, self.today, today=self.today), report)
+
+        rollups.rebuild()
+        self.assertEqual(build_admin_report(self.old_date, self.today, today=self.today), report)
+        rebuilt = rollups.dashboard_stats(self.company.id)
+        self.assertEqual(rebuilt['top_5_foods'], dashboard['top_5_foods'])
+        self.assertEqual(rollups.live_dashboard_stats(self.company.id)['top_5_foods'], dashboard['top_5_foods'])
+
+    def test_export_writes_ndjson_gz(self):
+        order = self.place(self.old_menu, sides=[self.salad])
+        with tempfile.TemporaryDirectory() as directory, override_settings(ORDER_ARCHIVE_DIR=directory):
+            call_command('archive_orders', '--export', stdout=StringIO())
+            [path] = Path(directory).glob('*.ndjson.gz')
+            with gzip.open(path, 'rt', encoding='utf-8') as stream:
+                rows = [json.loads(line) for line in stream]
+        self.assertEqual([row['id'] for row in rows], [order.pk])
+        self.assertEqual(rows[0]['total_price'], '120.00')
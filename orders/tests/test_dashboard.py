@@ -0,0 +1,90 @@
+# orders/tests/test_dashboard.py
+
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from companies.models import Company
+from menu.models import FoodItem
+from orders import rollups
+from orders.models import Order
+from orders.transitions import bulk_transition
+from schedules.models import DailyMenu, Schedule
+from users.models import User
+
+
+class DashboardSnapshotTests(APITestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.company_a = Company.objects.create(name="Company A")
+        self.company_b = Company.objects.create(name="Company B")
+        self.super_admin = User.objects.create_user(username='super', password='password123', role=User.Role.SUPER_ADMIN)
+        self.company_admin = User.objects.create_user(
+            username='admin_a', password='password123', role=User.Role.COMPANY_ADMIN, company=self.company_a
+        )
+        self.employee_a = User.objects.create_user(username='emp_a', password='password123', company=self.company_a)
+        self.employee_b = User.objects.create_user(username='emp_b', password='password123', company=self.company_b)
+        self.kebab = FoodItem.objects.create(name="Kebab", description="", price=100)
+        self.pasta = FoodItem.objects.create(name="Pasta", description="", price=80)
+        schedule = Schedule.objects.create(
+            name="Schedule", start_date=self.today - timedelta(days=5), end_date=self.today + timedelta(days=5)
+        )
+        self.menu_today = DailyMenu.objects.create(schedule=schedule, date=self.today)
+        self.menu_yesterday = DailyMenu.objects.create(schedule=schedule, date=self.today - timedelta(days=1))
+        self.url = reverse('dashboard-stats')
+
+    def place(self, user, menu, food, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Order.objects.create(user=user, daily_menu=menu, food_item=food, **kwargs)
+
+    def test_rollups_follow_create_update_and_delete(self):
+        self.place(self.employee_a, self.menu_today, self.kebab)
+        self.place(self.employee_a, self.menu_yesterday, self.kebab)
+        order = self.place(self.employee_a, self.menu_today, self.pasta)
+        self.place(self.employee_b, self.menu_today, self.pasta)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.food_item = self.kebab
+            order.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.get(user=self.employee_b).delete()
+
+        for company_id in (self.company_a.id, self.company_b.id, None):
+            snapshot = rollups.dashboard_stats(company_id)
+            live = rollups.live_dashboard_stats(company_id)
+            for key in ('orders_today', 'pending_orders_total', 'top_5_foods'):
+                self.assertEqual(snapshot[key], live[key], (company_id, key))
+
+    def test_bulk_transition_updates_pending_counts(self):
+        self.place(self.employee_a, self.menu_yesterday, self.kebab, status=Order.OrderStatus.CONFIRMED)
+        self.assertEqual(rollups.dashboard_stats(self.company_a.id)['pending_orders_total'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition(Order.objects.all(), Order.OrderStatus.DELIVERED)
+        self.assertEqual(rollups.dashboard_stats(self.company_a.id)['pending_orders_total'], 0)
+
+    def test_company_admin_reads_own_snapshot(self):
+        self.place(self.employee_a, self.menu_today, self.kebab)
+        self.place(self.employee_b, self.menu_today, self.kebab)
+        self.client.force_authenticate(user=self.company_admin)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['orders_today'], 1)
+        self.assertEqual(response.data['top_5_foods'], [{'name': 'Kebab', 'count': 1}])
+        self.assertIsNotNone(response.data['snapshot_at'])
+
+    def test_fresh_escape_hatch_is_live_for_super_admin(self):
+        # Bypass the signals so the rollups are stale on purpose.
+        with rollups.paused():
+            Order.objects.create(user=self.employee_a, daily_menu=self.menu_today, food_item=self.kebab)
+        self.client.force_authenticate(user=self.super_admin)
+        self.assertEqual(self.client.get(self.url).data['orders_today'], 0)
+        self.assertEqual(self.client.get(self.url, {'fresh': '1'}).data['orders_today'], 1)
+
+        rollups.rebuild()
+        self.assertEqual(self.client.get(self.url).data['orders_today'], 1)
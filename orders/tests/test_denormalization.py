@@ -0,0 +1,85 @@
+# orders/tests/test_denormalization.py
+
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from companies.models import Company
+from menu.models import FoodItem, SideDish
+from orders import rollups
+from orders.models import Order
+from orders.reports import build_admin_report
+from schedules.models import DailyMenu, Schedule
+from users.models import User
+
+
+class OrderDenormalizationTests(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.tomorrow = self.today + timedelta(days=1)
+        self.company_a = Company.objects.create(name="Company A")
+        self.company_b = Company.objects.create(name="Company B")
+        self.employee = User.objects.create_user(username='emp', password='password123', company=self.company_a)
+        self.kebab = FoodItem.objects.create(name="Kebab", description="", price=100)
+        self.salad = SideDish.objects.create(name="Salad", price=20)
+        schedule = Schedule.objects.create(name="Schedule", start_date=self.today, end_date=self.tomorrow)
+        self.menu_today = DailyMenu.objects.create(schedule=schedule, date=self.today)
+        self.menu_tomorrow = DailyMenu.objects.create(schedule=schedule, date=self.tomorrow)
+
+    def place(self, menu):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(user=self.employee, daily_menu=menu, food_item=self.kebab)
+            order.side_dishes.add(self.salad)
+        return order
+
+    def report(self):
+        return build_admin_report(self.today - timedelta(days=1), self.tomorrow + timedelta(days=1), today=self.today)
+
+    def test_save_sets_company_and_delivery_date(self):
+        order = self.place(self.menu_today)
+        self.assertEqual((order.company_id, order.delivery_date), (self.company_a.id, self.today))
+
+        # Moving the user to another company does not move their past orders.
+        self.employee.company = self.company_b
+        self.employee.save()
+        order = Order.objects.get(pk=order.pk)
+        order.daily_menu = self.menu_tomorrow
+        order.save(update_fields=['daily_menu'])
+        order.refresh_from_db()
+        self.assertEqual((order.company_id, order.delivery_date), (self.company_a.id, self.tomorrow))
+
+    def test_moving_a_menu_moves_its_orders(self):
+        order = self.place(self.menu_today)
+        expected = self.report()['sales_by_date'][0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.menu_today.date = self.today + timedelta(days=2)
+            self.menu_today.save()
+
+        order.refresh_from_db()
+        self.assertEqual(order.delivery_date, self.today + timedelta(days=2))
+        self.assertEqual(
+            build_admin_report(self.today, self.today + timedelta(days=2), today=self.today)['sales_by_date'],
+            [{**expected, 'date': (self.today + timedelta(days=2)).isoformat()}],
+        )
+
+    def test_integrity_check_and_repair(self):
+        order = self.place(self.menu_today)
+        call_command('check_order_denormalization', stdout=StringIO())
+
+        before = self.report()
+        # Simulate drift from a raw bulk write.
+        Order.objects.filter(pk=order.pk).update(delivery_date=self.tomorrow, company=None)
+        rollups.rebuild()
+        with self.assertRaises(CommandError):
+            call_command('check_order_denormalization', stdout=StringIO())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('check_order_denormalization', '--fix', stdout=StringIO())
+        order.refresh_from_db()
+        self.assertEqual((order.company_id, order.delivery_date), (self.company_a.id, self.today))
+        self.assertEqual(self.report(), before)
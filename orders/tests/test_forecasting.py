@@ -0,0 +1,76 @@
+# orders/tests/test_forecasting.py
+
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from companies.models import Company
+from menu.models import FoodItem
+from orders.forecasting import compute_forecasts
+from orders.models import DailyFoodOrderCount, DailyOrderCount, DemandForecast
+from schedules.models import DailyMenu, Schedule
+from users.models import User
+
+
+class DemandForecastTests(APITestCase):
+    def setUp(self):
+        self.today = date(2030, 3, 4)  # a Monday
+        self.company = Company.objects.create(name="Company")
+        self.kebab, self.stew, self.soup = [
+            FoodItem.objects.create(name=name, description="", price=Decimal('100.00'))
+            for name in ("Kebab", "Stew", "Soup")
+        ]
+        # Eight weeks of history: Mondays 15 kebab + 5 stew, Tuesdays 5 + 5.
+        for week in range(1, 9):
+            monday = self.today - timedelta(weeks=week)
+            for day, counts in ((monday, (15, 5)), (monday + timedelta(days=1), (5, 5))):
+                DailyOrderCount.objects.create(company=self.company, date=day, orders=sum(counts))
+                for food, orders in zip((self.kebab, self.stew), counts):
+                    DailyFoodOrderCount.objects.create(company=self.company, date=day, food_item=food, orders=orders)
+
+        schedule = Schedule.objects.create(name="Default", start_date=self.today, end_date=self.today + timedelta(days=30))
+        self.next_monday = DailyMenu.objects.create(schedule=schedule, date=date(2030, 3, 11))
+        self.next_monday.available_foods.set([self.kebab, self.stew, self.soup])
+        next_tuesday = DailyMenu.objects.create(schedule=schedule, date=date(2030, 3, 12))
+        next_tuesday.available_foods.set([self.kebab])
+        # Too close to order for, so not forecast.
+        DailyMenu.objects.create(schedule=schedule, date=date(2030, 3, 5)).available_foods.set([self.kebab])
+        # Orders already placed for next Monday.
+        DailyFoodOrderCount.objects.create(company=self.company, date=date(2030, 3, 11), food_item=self.kebab, orders=12)
+
+    def forecasts(self):
+        return {
+            (row.date, row.food_item.name): (row.predicted, row.booked)
+            for row in DemandForecast.objects.select_related('food_item')
+        }
+
+    def test_splits_the_weekday_mean_by_food_pull(self):
+        self.assertEqual(compute_forecasts(self.today), 4)
+        self.assertEqual(self.forecasts(), {
+            (date(2030, 3, 11), "Kebab"): (12, 12),  # 9 expected, but 12 are already booked
+            (date(2030, 3, 11), "Stew"): (5, 0),
+            (date(2030, 3, 11), "Soup"): (7, 0),  # no history: the company's average pull
+            (date(2030, 3, 12), "Kebab"): (10, 0),
+        })
+
+        # Recomputing replaces the previous forecasts.
+        self.next_monday.available_foods.remove(self.soup)
+        compute_forecasts(self.today)
+        self.assertNotIn((date(2030, 3, 11), "Soup"), self.forecasts())
+
+    def test_report_totals_across_companies(self):
+        other = Company.objects.create(name="Other")
+        compute_forecasts(self.today)
+        call_command('forecast_demand', '--company', str(other.pk), stdout=StringIO())
+        super_admin = User.objects.create_user(username='super', password='password123', role=User.Role.SUPER_ADMIN)
+        self.client.force_authenticate(user=super_admin)
+
+        response = self.client.get(reverse('demand-forecast'), {'from': '2030-03-11', 'to': '2030-03-11'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['forecasts']), 3)
+        totals = {row['food_name']: row['predicted'] for row in response.data['prep_totals']}
+        self.assertEqual(totals, {"Kebab": 12, "Stew": 5, "Soup": 7})
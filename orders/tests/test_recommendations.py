@@ -0,0 +1,74 @@
+# orders/tests/test_recommendations.py
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from companies.models import Company
+from menu.models import FoodItem
+from orders.models import FoodPreference, Order
+from orders.recommendations import compute_preferences, food_ranking
+from schedules.models import DailyMenu, Schedule
+from users.models import User
+
+
+class RecommendationTests(APITestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.company = Company.objects.create(name="Company")
+        self.schedule = Schedule.objects.create(name="Schedule", company=self.company,
+                                                start_date=self.today - timedelta(days=90),
+                                                end_date=self.today + timedelta(days=7))
+        self.company.active_schedule = self.schedule
+        self.company.save()
+        self.alice = User.objects.create_user(username='alice', password='password123', company=self.company)
+        self.bob = User.objects.create_user(username='bob', password='password123', company=self.company)
+        self.kebab, self.stew, self.salad, self.soup = [
+            FoodItem.objects.create(name=name, description="", price=Decimal('100.00'))
+            for name in ("Kebab", "Stew", "Salad", "Soup")
+        ]
+
+    def order(self, user, food, days_ago, status=Order.OrderStatus.DELIVERED):
+        menu, _ = DailyMenu.objects.get_or_create(schedule=self.schedule, date=self.today - timedelta(days=days_ago))
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(user=user, daily_menu=menu, food_item=food, status=status)
+
+    def test_ranks_user_favourites_before_company_favourites(self):
+        for days_ago in (60, 61, 62):
+            self.order(self.alice, self.stew, days_ago)
+        for days_ago in (1, 2):
+            self.order(self.alice, self.kebab, days_ago)  # recent orders count twice
+        self.order(self.alice, self.soup, 3, status=Order.OrderStatus.CANCELED)
+        for days_ago in (4, 5, 6):
+            self.order(self.bob, self.salad, days_ago)
+
+        self.assertEqual(compute_preferences(self.today), (2, 1))
+        self.assertEqual(FoodPreference.objects.get(user=self.alice).ranking, [self.kebab.pk, self.stew.pk])
+        self.assertEqual(FoodPreference.objects.get(company=self.company).ranking,
+                         [self.salad.pk, self.kebab.pk, self.stew.pk])
+        self.assertEqual(food_ranking(self.alice), {self.kebab.pk: 0, self.stew.pk: 1, self.salad.pk: 2})
+
+    def test_menu_lists_foods_in_preference_order(self):
+        menu = DailyMenu.objects.create(schedule=self.schedule, date=self.today + timedelta(days=1))
+        menu.available_foods.set([self.kebab, self.stew, self.salad, self.soup])
+        for days_ago in (1, 2):
+            self.order(self.alice, self.soup, days_ago)
+        self.order(self.bob, self.salad, 3)
+        call_command('compute_food_preferences', stdout=StringIO())
+
+        self.client.force_authenticate(user=self.alice)
+        url = reverse('my-company-menu')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        [schedule] = response.data
+        upcoming = next(day for day in schedule['daily_menus'] if day['id'] == menu.pk)
+        self.assertEqual([food['name'] for food in upcoming['available_foods']][:2], ["Soup", "Salad"])
+        self.assertEqual(len([q for q in queries if 'orders_foodpreference' in q['sql']]), 1)
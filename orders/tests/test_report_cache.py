@@ -0,0 +1,179 @@
+# orders/tests/test_report_cache.py
+
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from companies.models import Company
+from menu.models import FoodItem
+from orders import report_cache
+from orders.models import DailyOrderCount, Order
+from orders.report_cache import cached_report
+from orders.transitions import advance_due_orders, bulk_transition
+from schedules.models import DailyMenu, Schedule
+from users.models import User
+
+
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return {'build': self.builds}
+
+    def test_hits_are_keyed_by_parameters(self):
+        start = self.today - timedelta(days=3)
+        self.assertEqual(cached_report('r', start, self.today, self.build, today=self.today), {'build': 1})
+        self.assertEqual(cached_report('r', start, self.today, self.build, today=self.today), {'build': 1})
+        cached_report('r', start, self.today, self.build, company_id=7, today=self.today)
+        cached_report('other', start, self.today, self.build, today=self.today)
+        self.assertEqual(self.builds, 3)
+
+    def test_invalidation_only_affects_ranges_covering_the_date(self):
+        last_week = self.today - timedelta(days=7)
+        cached_report('r', last_week, last_week, self.build, today=self.today)
+        cached_report('r', self.today, self.today, self.build, today=self.today)
+
+        report_cache.invalidate_dates([self.today])
+        cached_report('r', last_week, last_week, self.build, today=self.today)
+        self.assertEqual(self.builds, 2)
+        cached_report('r', self.today, self.today, self.build, today=self.today)
+        self.assertEqual(self.builds, 3)
+
+    def test_ttl_depends_on_whether_the_range_reaches_today(self):
+        with override_settings(REPORT_CACHE_LIVE_TTL=30, REPORT_CACHE_HISTORICAL_TTL=3600, CACHE_SHARED=True):
+            self.assertEqual(report_cache.ttl_for(self.today, self.today), 30)
+            self.assertEqual(report_cache.ttl_for(self.today + timedelta(days=2), self.today), 30)
+            self.assertEqual(report_cache.ttl_for(self.today - timedelta(days=1), self.today), 3600)
+
+    def test_history_gets_the_live_ttl_in_a_process_local_cache(self):
+        with override_settings(REPORT_CACHE_LIVE_TTL=30, REPORT_CACHE_HISTORICAL_TTL=3600, CACHE_SHARED=False):
+            self.assertEqual(report_cache.ttl_for(self.today - timedelta(days=1), self.today), 30)
+
+    def test_long_ranges_are_not_cached(self):
+        with override_settings(REPORT_CACHE_MAX_DAYS=10):
+            start = self.today - timedelta(days=30)
+            cached_report('r', start, self.today, self.build, today=self.today)
+            cached_report('r', start, self.today, self.build, today=self.today)
+        self.assertEqual(self.builds, 2)
+
+    def test_concurrent_misses_build_once(self):
+        builds = []
+
+        def slow_build():
+            builds.append(1)
+            time.sleep(0.2)
+            return {'ok': True}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                cached_report('r', self.today, self.today, slow_build, today=self.today)
+            ))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(results, [{'ok': True}] * 4)
+
+
+class ReportCacheInvalidationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        company = Company.objects.create(name="Company")
+        self.super_admin = User.objects.create_user(username='super', password='password123', role=User.Role.SUPER_ADMIN)
+        self.employee = User.objects.create_user(username='emp', password='password123', company=company)
+        self.loner = User.objects.create_user(username='loner', password='password123')
+        self.kebab = FoodItem.objects.create(name="Kebab", description="", price=100)
+        schedule = Schedule.objects.create(name="Schedule", start_date=self.today, end_date=self.today)
+        self.menu = DailyMenu.objects.create(schedule=schedule, date=self.today)
+        self.client.force_authenticate(user=self.super_admin)
+
+    def place(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Order.objects.create(user=user, daily_menu=self.menu, food_item=self.kebab)
+
+    def test_order_changes_refresh_cached_reports(self):
+        reports_url = reverse('admin-reports')
+        summary_url = reverse('daily-summary')
+        self.assertEqual(self.client.get(reports_url).data['summary']['orders_today'], 0)
+        self.assertEqual(self.client.get(summary_url).data['food_summary'], [])
+
+        self.place(self.employee)
+        self.assertEqual(self.client.get(reports_url).data['summary']['orders_today'], 1)
+        # Orders of users without a company also invalidate the daily summary.
+        order = self.place(self.loner)
+        self.assertEqual(self.client.get(summary_url).data['food_summary'], [{'food_item__name': "Kebab", 'count': 2}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition(Order.objects.filter(pk=order.pk), Order.OrderStatus.CANCELED)
+        self.assertEqual(self.client.get(summary_url).data['food_summary'], [{'food_item__name': "Kebab", 'count': 1}])
+
+    def test_kitchen_summary_keeps_orders_being_prepared(self):
+        summary_url = reverse('daily-summary')
+        self.place(self.employee)
+        self.assertEqual(self.client.get(summary_url).data['food_summary'], [{'food_item__name': "Kebab", 'count': 1}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            advance_due_orders(self.today)
+        self.assertEqual(Order.objects.get().status, Order.OrderStatus.PREPARING)
+        self.assertEqual(self.client.get(summary_url).data['food_summary'], [{'food_item__name': "Kebab", 'count': 1}])
+
+        # Canceling a PREPARING order leaves the pending counts alone but not the summary.
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition(Order.objects.all(), Order.OrderStatus.CANCELED)
+        self.assertEqual(self.client.get(summary_url).data['food_summary'], [])
+
+    def test_reports_are_invalidated_after_the_counts_change(self):
+        seen = []
+        invalidate = report_cache.invalidate_dates
+
+        def record(dates):
+            seen.append(DailyOrderCount.objects.filter(date=self.today).aggregate(n=Sum('orders'))['n'])
+            invalidate(dates)
+
+        with mock.patch.object(report_cache, 'invalidate_dates', side_effect=record):
+            self.place(self.employee)
+        # A report built right after the invalidation already sees the order.
+        self.assertEqual(seen, [1])
+
+    def test_user_counts_of_cached_past_ranges_stay_current(self):
+        yesterday = self.today - timedelta(days=1)
+        url = f"{reverse('admin-reports')}?from={yesterday.isoformat()}&to={yesterday.isoformat()}"
+        self.assertEqual(self.client.get(url).data['user_stats']['total_users'], 3)
+        key = report_cache.cache_key('admin-reports', yesterday, yesterday, today=self.today)
+
+        User.objects.create_user(username='new', password='password123', company=self.employee.company)
+        # Stands in for the user figures' short TTL running out.
+        report_cache.invalidate_dates([self.today])
+        response = self.client.get(url)
+        self.assertIsNotNone(cache.get(key))
+        self.assertEqual(response.data['user_stats']['total_users'], 4)
+        company = next(row for row in response.data['company_stats'] if row['id'] == self.employee.company_id)
+        self.assertEqual(company['active_users'], 2)
+
+    def test_todays_orders_do_not_invalidate_past_ranges(self):
+        yesterday = self.today - timedelta(days=1)
+        url = f"{reverse('admin-reports')}?from={yesterday.isoformat()}&to={yesterday.isoformat()}"
+        self.client.get(url)
+        key = report_cache.cache_key('admin-reports', yesterday, yesterday, today=self.today)
+        self.assertIsNotNone(cache.get(key))
+
+        self.place(self.employee)
+        self.assertIsNotNone(cache.get(key))
+        self.assertEqual(self.client.get(url).data['summary']['orders_today'], 1)
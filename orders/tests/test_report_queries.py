@@ -0,0 +1,106 @@
+# orders/tests/test_report_queries.py
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from companies.models import Company
+from menu.models import FoodItem, SideDish
+from orders import rollups
+from orders.models import Order
+from orders.reports import build_admin_report
+from schedules.models import DailyMenu, Schedule
+from users.models import User
+
+
+class AdminReportQueryTests(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.yesterday = self.today - timedelta(days=1)
+        self.company_a = Company.objects.create(name="Company A")
+        self.company_b = Company.objects.create(name="Company B")
+        self.employee_a = User.objects.create_user(username='emp_a', password='password123', company=self.company_a)
+        self.employee_b = User.objects.create_user(username='emp_b', password='password123', company=self.company_b)
+        self.kebab = FoodItem.objects.create(name="Kebab", description="", price=Decimal('100.00'))
+        self.pizza = FoodItem.objects.create(name="Pizza", description="", price=Decimal('150.00'))
+        self.salad = SideDish.objects.create(name="Salad", price=Decimal('20.00'))
+        self.yogurt = SideDish.objects.create(name="Yogurt", price=Decimal('10.00'))
+        schedule = Schedule.objects.create(name="Schedule", start_date=self.yesterday, end_date=self.today)
+        self.menu_today = DailyMenu.objects.create(schedule=schedule, date=self.today)
+        self.menu_yesterday = DailyMenu.objects.create(schedule=schedule, date=self.yesterday)
+
+    def place(self, user, menu, food, sides=(), **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(user=user, daily_menu=menu, food_item=food, **kwargs)
+            order.side_dishes.set(sides)
+        return order
+
+    def test_report_figures(self):
+        self.place(self.employee_a, self.menu_today, self.kebab, [self.salad])
+        self.place(self.employee_a, self.menu_today, self.pizza, status=Order.OrderStatus.DELIVERED)
+        self.place(self.employee_b, self.menu_yesterday, self.kebab, [self.salad, self.yogurt])
+
+        report = build_admin_report(self.yesterday, self.today, today=self.today)
+
+        self.assertEqual(report['summary']['orders_today'], 2)
+        self.assertEqual(report['summary']['pending_orders_total'], 2)
+        self.assertEqual(report['summary']['total_sales_today'], Decimal('270.00'))
+        self.assertEqual(report['sales_by_date'], [
+            {'date': self.yesterday.isoformat(), 'orders': 1, 'revenue': Decimal('130.00')},
+            {'date': self.today.isoformat(), 'orders': 2, 'revenue': Decimal('270.00')},
+        ])
+        self.assertEqual(
+            [(item['name'], item['ordered']) for item in report['top_items']], [("Kebab", 2), ("Pizza", 1)]
+        )
+        self.assertEqual(
+            {row['name']: (row['active_users'], row['orders']) for row in report['company_stats']},
+            {"Company A": (1, 2), "Company B": (1, 1)},
+        )
+
+        company_report = build_admin_report(self.yesterday, self.today, company_id=self.company_b.id, today=self.today)
+        self.assertEqual(company_report['summary']['orders_today'], 0)
+        self.assertEqual(company_report['sales_by_date'][0]['revenue'], Decimal('130.00'))
+
+    def test_side_dish_and_order_changes_are_rolled_up(self):
+        order = self.place(self.employee_a, self.menu_today, self.kebab, [self.salad])
+        with self.captureOnCommitCallbacks(execute=True):
+            order.side_dishes.clear()
+            order.side_dishes.add(self.yogurt)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.daily_menu = self.menu_yesterday
+            order.save()
+
+        report = build_admin_report(self.yesterday, self.today, today=self.today)
+        self.assertEqual(report['sales_by_date'], [
+            {'date': self.yesterday.isoformat(), 'orders': 1, 'revenue': Decimal('110.00')},
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+        report = build_admin_report(self.yesterday, self.today, today=self.today)
+        self.assertEqual(report['sales_by_date'], [])
+        self.assertEqual(report['top_items'], [])
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.place(self.employee_a, self.menu_today, self.kebab, [self.salad])
+        self.place(self.employee_b, self.menu_yesterday, self.pizza, [self.yogurt])
+        before = build_admin_report(self.yesterday, self.today, today=self.today)
+        rollups.rebuild()
+        self.assertEqual(build_admin_report(self.yesterday, self.today, today=self.today), before)
+
+    def test_query_count_does_not_grow_with_orders(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                build_admin_report(self.yesterday, self.today, today=self.today)
+            return len(queries)
+
+        self.place(self.employee_a, self.menu_today, self.kebab, [self.salad])
+        few = count_queries()
+        for _ in range(20):
+            self.place(self.employee_a, self.menu_today, self.pizza, [self.salad, self.yogurt])
+            self.place(self.employee_b, self.menu_yesterday, self.kebab)
+        self.assertEqual(count_queries(), few)
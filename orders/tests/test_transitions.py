@@ -0,0 +1,69 @@
+# orders/tests/test_transitions.py
+
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from companies.models import Company
+from menu.models import FoodItem
+from orders.models import Order
+from orders.transitions import InvalidTransition, advance_due_orders, bulk_transition, transition
+from schedules.models import DailyMenu, Schedule
+from users.models import User
+
+
+class OrderTransitionTests(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        company = Company.objects.create(name="Company A")
+        self.employee = User.objects.create_user(username='emp', password='password123', company=company)
+        self.food = FoodItem.objects.create(name="Kebab", description="", price=100)
+        self.schedule = Schedule.objects.create(
+            name="Schedule", company=company,
+            start_date=self.today - timedelta(days=10), end_date=self.today + timedelta(days=10),
+        )
+
+    def order_for(self, days_from_today, status=Order.OrderStatus.PLACED):
+        menu, _ = DailyMenu.objects.get_or_create(schedule=self.schedule, date=self.today + timedelta(days=days_from_today))
+        return Order.objects.create(user=self.employee, daily_menu=menu, food_item=self.food, status=status)
+
+    def test_single_transition_records_timestamp(self):
+        order = self.order_for(5)
+        transition(order, Order.OrderStatus.CONFIRMED)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.OrderStatus.CONFIRMED)
+        self.assertIsNotNone(order.confirmed_at)
+
+    def test_illegal_transition_is_rejected(self):
+        order = self.order_for(5, status=Order.OrderStatus.DELIVERED)
+        with self.assertRaises(InvalidTransition):
+            transition(order, Order.OrderStatus.PLACED)
+
+    def test_bulk_transition_skips_orders_in_other_states(self):
+        self.order_for(5)
+        self.order_for(6, status=Order.OrderStatus.CANCELED)
+        self.assertEqual(bulk_transition(Order.objects.all(), Order.OrderStatus.CONFIRMED), 1)
+        self.assertEqual(Order.objects.filter(status=Order.OrderStatus.CANCELED).count(), 1)
+
+    def test_advance_due_orders_uses_lead_days(self):
+        future = self.order_for(10)
+        locked = self.order_for(1)
+        today = self.order_for(0)
+        past = self.order_for(-2)
+
+        with CaptureQueriesContext(connection) as queries:
+            advance_due_orders(self.today)
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 3)
+
+        statuses = dict(Order.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[future.id], Order.OrderStatus.PLACED)
+        self.assertEqual(statuses[locked.id], Order.OrderStatus.CONFIRMED)
+        self.assertEqual(statuses[today.id], Order.OrderStatus.PREPARING)
+        self.assertEqual(statuses[past.id], Order.OrderStatus.DELIVERED)
+        past.refresh_from_db()
+        self.assertIsNotNone(past.confirmed_at)
+        self.assertIsNotNone(past.delivered_at)
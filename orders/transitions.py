@@ -0,0 +1,127 @@
+# orders/transitions.py
+"""
+State machine for Order.status.
+
+    PLACED ──► CONFIRMED ──► PREPARING ──► DELIVERED
+       │           │             │
+       └───────────┴─────────────┴──────► CANCELED
+
+Single orders go through `transition()`; scheduled bulk changes go through
+`bulk_transition()`, which issues one UPDATE per target state instead of
+saving rows one by one.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core import sharding
+from schedules import capacity
+from .models import Order
+
+Status = Order.OrderStatus
+
+ALLOWED_TRANSITIONS = {
+    Status.PLACED: {Status.CONFIRMED, Status.CANCELED},
+    Status.CONFIRMED: {Status.PREPARING, Status.DELIVERED, Status.CANCELED},
+    Status.PREPARING: {Status.DELIVERED, Status.CANCELED},
+    Status.DELIVERED: set(),
+    Status.CANCELED: set(),
+}
+
+# Orders not yet being prepared (the dashboards' "pending" counts).
+PENDING_STATUSES = (Status.PLACED, Status.CONFIRMED)
+
+# Orders the kitchen still has to fulfil, including those already being
+# prepared (the daily kitchen summary).
+KITCHEN_STATUSES = (Status.PLACED, Status.CONFIRMED, Status.PREPARING)
+
+TIMESTAMP_FIELDS = {
+    Status.CONFIRMED: 'confirmed_at',
+    Status.PREPARING: 'preparing_at',
+    Status.DELIVERED: 'delivered_at',
+    Status.CANCELED: 'canceled_at',
+}
+
+
+class InvalidTransition(ValueError):
+    """Raised when an order cannot move to the requested status."""
+
+
+def can_transition(from_status, to_status):
+    return to_status in ALLOWED_TRANSITIONS.get(from_status, set())
+
+
+def sources_for(to_status):
+    """All statuses from which `to_status` can be reached in one step."""
+    return [status for status, targets in ALLOWED_TRANSITIONS.items() if to_status in targets]
+
+
+def transition(order, to_status, at=None):
+    """
+    Moves a single order to `to_status`, recording the transition timestamp.
+    """
+    if not can_transition(order.status, to_status):
+        raise InvalidTransition(f"Order #{order.id} cannot go from {order.status} to {to_status}.")
+    at = at or timezone.now()
+    if to_status == Status.CANCELED and order.food_item_id:
+        capacity.release(order.daily_menu_id, order.food_item_id)
+    order.status = to_status
+    timestamp_field = TIMESTAMP_FIELDS[to_status]
+    setattr(order, timestamp_field, at)
+    order.save(update_fields=['status', timestamp_field, 'updated_at'])
+    return order
+
+
+def bulk_transition(queryset, to_status, at=None):
+    """
+    Moves every order in `queryset` that may legally reach `to_status` there
+    with a single UPDATE. Orders in other states are left untouched.
+    Returns the number of orders changed.
+    """
+    from . import rollups
+
+    at = at or timezone.now()
+    sources = sources_for(to_status)
+    with transaction.atomic(using=sharding.current_alias()):
+        # UPDATE bypasses signals, so tell the rollups about the status change.
+        rollups.status_changed_in_bulk(queryset, sources, to_status)
+        if to_status == Status.CANCELED:
+            capacity.release_orders(queryset.filter(status__in=sources))
+        return queryset.filter(status__in=sources).update(
+            status=to_status,
+            updated_at=at,
+            **{TIMESTAMP_FIELDS[to_status]: at},
+        )
+
+
+def advance_due_orders(today=None):
+    """
+    Applies the scheduled transitions, oldest state first:
+    - PLACED orders whose date is inside the reservation lead time can no
+      longer be changed by the employee, so they become CONFIRMED.
+    - CONFIRMED orders for today move to PREPARING.
+    - Orders for past dates that were never canceled become DELIVERED.
+
+    Returns a dict of {status: number of orders moved there}.
+    """
+    today = today or timezone.now().date()
+    lock_date = today + timedelta(days=settings.RESERVATION_LEAD_DAYS)
+    at = timezone.now()
+
+    return {
+        Status.CONFIRMED: bulk_transition(
+            Order.objects.filter(status=Status.PLACED, delivery_date__lt=lock_date), Status.CONFIRMED, at
+        ),
+        Status.PREPARING: bulk_transition(
+            Order.objects.filter(status=Status.CONFIRMED, delivery_date=today), Status.PREPARING, at
+        ),
+        Status.DELIVERED: bulk_transition(
+            Order.objects.filter(
+                status__in=[Status.CONFIRMED, Status.PREPARING], delivery_date__lt=today
+            ),
+            Status.DELIVERED,
+            at,
+        ),
+    }
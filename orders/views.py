@@ -2,20 +2,23 @@
 # orders/views.py
 
 from rest_framework import viewsets, permissions, serializers
-from django.db import transaction
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
 
 from .models import Order
 from .serializers import OrderReadSerializer, OrderWriteSerializer
+from wallets import ledger
 from wallets.models import Transaction
 from users.models import User
+from schedules import capacity
 # [MODIFIED] Import the new permission class
+from core.idempotency import idempotent
 from core.permissions import CanModifyOrder
+from core.throttling import AdmissionControlMixin, CompanyRateBucket, UserRateBucket
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(AdmissionControlMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing orders.
     Users can only see and modify their own orders.
@@ -23,6 +26,9 @@ class OrderViewSet(viewsets.ModelViewSet):
     """
     # [MODIFIED] Add the new permission class. It will run after IsAuthenticated.
     permission_classes = [permissions.IsAuthenticated, CanModifyOrder]
+    # Rate limits and admission control run before any row lock is taken.
+    throttle_scope = 'orders'
+    throttle_classes = [UserRateBucket, CompanyRateBucket]
 
     # ... (get_queryset and get_serializer_class methods are unchanged) ...
     def get_queryset(self):
@@ -44,6 +50,13 @@ class OrderViewSet(viewsets.ModelViewSet):
             return OrderWriteSerializer
         return OrderReadSerializer
 
+    @idempotent('orders.create')
+    def create(self, request, *args, **kwargs):
+        """
+        Retries with the same Idempotency-Key replay the first response.
+        """
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """
         Wrap order creation and budget deduction in a transaction.
@@ -51,7 +64,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         user = self.request.user
         total_cost = serializer.context.get('total_cost', Decimal('0.00'))
 
-        with transaction.atomic():
+        with ledger.atomic():
             # Lock the user row to prevent race conditions on their budget.
             user_for_update = User.objects.select_for_update().get(pk=user.pk)
             
@@ -59,18 +72,25 @@ class OrderViewSet(viewsets.ModelViewSet):
             if user_for_update.budget < total_cost:
                 raise serializers.ValidationError("Insufficient funds.")
 
+            self._take_portion(serializer.validated_data['daily_menu'], serializer.validated_data['food_item'])
             order = serializer.save(user=user_for_update)
             user_for_update.budget -= total_cost
             user_for_update.save(update_fields=['budget'])
 
-            Transaction.objects.create(
-                wallet=user_for_update.company.wallet,
-                user=user_for_update,
-                transaction_type=Transaction.TransactionType.ORDER_DEDUCTION,
-                amount=-total_cost,
-                description=f"Deduction for Order #{order.id}"
+            ledger.record(
+                user_for_update.company.wallet, Transaction.TransactionType.ORDER_DEDUCTION, -total_cost,
+                'order_deduction', user=user_for_update, order_id=order.id,
             )
     
+    def _take_portion(self, daily_menu, food_item):
+        """Takes a portion of a capped food; must run inside the order's transaction."""
+        if food_item is None:
+            return
+        try:
+            capacity.reserve(daily_menu.pk, food_item.pk)
+        except capacity.SoldOut:
+            raise serializers.ValidationError(f"'{food_item.name}' is sold out on {daily_menu.date}.")
+
     # --- REFACTORED CODE STARTS HERE ---
 
     # [REMOVED] The redundant helper function is no longer needed.
@@ -100,12 +120,24 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         cost_difference = old_total_cost - new_total_cost
 
+        # Moving to another food (or day) takes a portion there and gives the old one back.
+        new_daily_menu = serializer.validated_data.get('daily_menu', order_instance.daily_menu)
+        portion_changed = (new_food_item, new_daily_menu) != (order_instance.food_item, order_instance.daily_menu)
+
         if cost_difference == Decimal('0.00'):
             # If no price change, just save the order.
-            serializer.save()
+            with ledger.atomic():
+                if portion_changed:
+                    self._take_portion(new_daily_menu, new_food_item)
+                    capacity.release(order_instance.daily_menu_id, order_instance.food_item_id)
+                serializer.save()
             return
         
-        with transaction.atomic():
+        with ledger.atomic():
+            if portion_changed:
+                self._take_portion(new_daily_menu, new_food_item)
+                capacity.release(order_instance.daily_menu_id, order_instance.food_item_id)
+
             user = User.objects.select_for_update().get(pk=self.request.user.pk)
             
             # If the new order is more expensive, check if the user has enough budget for the difference.
@@ -123,12 +155,9 @@ class OrderViewSet(viewsets.ModelViewSet):
             
             # Log the transaction for the budget adjustment
             transaction_type = Transaction.TransactionType.REFUND if cost_difference > 0 else Transaction.TransactionType.ORDER_DEDUCTION
-            Transaction.objects.create(
-                wallet=user.company.wallet,
-                user=user,
-                transaction_type=transaction_type,
-                amount=cost_difference,
-                description=f"Price adjustment for updated Order #{order_instance.id}"
+            ledger.record(
+                user.company.wallet, transaction_type, cost_difference,
+                'order_adjustment', user=user, order_id=order_instance.id,
             )
 
     def perform_destroy(self, instance):
@@ -144,18 +173,15 @@ class OrderViewSet(viewsets.ModelViewSet):
         refund_amount = food_price + sides_price
         
         if refund_amount > Decimal('0.00'):
-            with transaction.atomic():
+            with ledger.atomic():
                 user = User.objects.select_for_update().get(pk=instance.user.pk)
                 user.budget += refund_amount
                 user.save(update_fields=['budget'])
                 
                 # Log the refund transaction
-                Transaction.objects.create(
-                    wallet=user.company.wallet,
-                    user=user,
-                    transaction_type=Transaction.TransactionType.REFUND,
-                    amount=refund_amount,
-                    description=f"Refund for canceled Order #{instance.id}"
+                ledger.record(
+                    user.company.wallet, Transaction.TransactionType.REFUND, refund_amount,
+                    'order_refund', user=user, order_id=instance.id,
                 )
 
         # Finally, delete the order instance
@@ -4,28 +4,34 @@ from rest_framework import viewsets
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django_filters import rest_framework as filters
-from django.db.models import Count, Sum, F, Q
-from django.db.models.functions import Coalesce, TruncDate
+from django.db.models import Count
+from django.conf import settings
 from django.utils import timezone
+from collections import Counter
 from datetime import timedelta
-from decimal import Decimal
-from collections import defaultdict
 
 from .models import Order
-from users.models import User
-from companies.models import Company
-from menu.models import FoodItem
+from core import sharding
 # [اصلاح] کلاس دسترسی IsAdmin برای استفاده در داشبورد اضافه شد
+from core.authz import auth_context
 from core.permissions import IsSuperAdmin, IsAdmin 
 from .serializers import OrderReadSerializer
+from .transitions import KITCHEN_STATUSES
+from . import rollups
+from .reports import (
+    build_admin_report, build_today_summary, build_user_stats, merge_admin_reports, merge_today_summaries,
+    merge_user_stats, with_user_stats,
+)
+from .report_cache import cached_report
+from .forecasting import forecast_report
 
 
 # --- FilterSet for the Order View ---
 
 class OrderFilter(filters.FilterSet):
-    start_date = filters.DateFilter(field_name="daily_menu__date", lookup_expr='gte')
-    end_date = filters.DateFilter(field_name="daily_menu__date", lookup_expr='lte')
-    company_id = filters.NumberFilter(field_name='daily_menu__schedule__company_id')
+    start_date = filters.DateFilter(field_name="delivery_date", lookup_expr='gte')
+    end_date = filters.DateFilter(field_name="delivery_date", lookup_expr='lte')
+    company_id = filters.NumberFilter(field_name='company_id')
 
     class Meta:
         model = Order
@@ -44,6 +50,13 @@ class AdminOrderViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsSuperAdmin]
     filterset_class = OrderFilter
 
+    def dispatch(self, request, *args, **kwargs):
+        # Orders live on their company's shard; without ?company_id= this
+        # lists the primary's orders.
+        company_id = request.GET.get('company_id', '')
+        with sharding.for_company(int(company_id) if company_id.isdigit() else None):
+            return super().dispatch(request, *args, **kwargs)
+
 
 # --- APIViews for Reports and Dashboard ---
 
@@ -55,39 +68,58 @@ class DailyOrderSummaryView(APIView):
             query_date = timezone.datetime.strptime(query_date_str, '%Y-%m-%d').date()
         except ValueError:
             return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
-        food_summary = Order.objects.filter(daily_menu__date=query_date, status__in=['PLACED', 'CONFIRMED']).values('food_item__name').annotate(count=Count('food_item')).order_by('-count')
-        side_dish_summary = Order.objects.filter(daily_menu__date=query_date, status__in=['PLACED', 'CONFIRMED']).values('side_dishes__name').annotate(count=Count('side_dishes')).order_by('-count')
+        return Response(cached_report('daily-summary', query_date, query_date, lambda: self.merged_summary(query_date)))
+
+    @classmethod
+    def merged_summary(cls, query_date):
+        """build_summary() over every shard, with the counts of each name summed."""
+        summaries = sharding.fan_out(lambda: cls.build_summary(query_date))
+        if len(summaries) == 1:
+            return summaries[0]
+
+        def merge(key, name_field):
+            counts = Counter()
+            for summary in summaries:
+                for row in summary[key]:
+                    counts[row[name_field]] += row['count']
+            return [{name_field: name, 'count': count} for name, count in counts.most_common()]
+
+        return {'date': query_date, 'food_summary': merge('food_summary', 'food_item__name'),
+                'side_dish_summary': merge('side_dish_summary', 'side_dishes__name')}
+
+    @staticmethod
+    def build_summary(query_date):
+        food_summary = Order.objects.filter(delivery_date=query_date, status__in=KITCHEN_STATUSES).values('food_item__name').annotate(count=Count('food_item')).order_by('-count')
+        side_dish_summary = Order.objects.filter(delivery_date=query_date, status__in=KITCHEN_STATUSES).values('side_dishes__name').annotate(count=Count('side_dishes')).order_by('-count')
         side_dish_summary = [item for item in side_dish_summary if item['side_dishes__name'] is not None]
-        return Response({'date': query_date, 'food_summary': list(food_summary), 'side_dish_summary': list(side_dish_summary)})
+        return {'date': query_date, 'food_summary': list(food_summary), 'side_dish_summary': list(side_dish_summary)}
 
 
 class DashboardStatsView(APIView):
+    """
+    Dashboard numbers read from the per-company rollups (see orders/rollups.py).
+    Super admins can pass ?fresh=1 to compute them live from the orders table.
+    """
     # [اصلاح کلیدی] سطح دسترسی به IsAdmin تغییر یافت تا ادمین شرکت نیز دسترسی داشته باشد
     permission_classes = [IsAdmin]
     
     def get(self, request, *args, **kwargs):
-        today = timezone.now().date()
-        user = request.user
+        context = auth_context(request)
         
         # [اصلاح] آمار بر اساس نقش کاربر فیلتر می‌شود
         # اگر کاربر ادمین کل نباشد، آمار فقط برای شرکت خودش نمایش داده می‌شود
-        base_queryset = Order.objects.all()
-        if user.role == User.Role.COMPANY_ADMIN:
-            base_queryset = base_queryset.filter(user__company=user.company)
+        company_id = None
+        if context.is_company_admin:
+            company_id = context.company_id
+            if company_id is None:
+                return Response({'orders_today': 0, 'pending_orders_total': 0, 'top_5_foods': [], 'snapshot_at': None})
 
-        orders_today = base_queryset.filter(daily_menu__date=today).count()
-        pending_orders = base_queryset.filter(status__in=['PLACED', 'CONFIRMED']).count()
-        
-        # فیلتر کردن غذاهای محبوب بر اساس شرکت (در صورت نیاز)
-        top_foods_qs = FoodItem.objects
-        if user.role == User.Role.COMPANY_ADMIN:
-            top_foods_qs = top_foods_qs.filter(orders__user__company=user.company)
-            
-        top_foods = top_foods_qs.annotate(order_count=Count('orders')).order_by('-order_count')[:5]
-        
-        top_foods_data = [{'name': f.name, 'count': f.order_count} for f in top_foods]
-        stats = {'orders_today': orders_today, 'pending_orders_total': pending_orders, 'top_5_foods': top_foods_data}
-        return Response(stats)
+        fresh = request.query_params.get('fresh') in ('1', 'true')
+        compute = rollups.live_dashboard_stats if fresh and context.is_super else rollups.dashboard_stats
+        if company_id is not None or not sharding.enabled():
+            return Response(compute(company_id))
+        # A super admin's totals span every shard.
+        return Response(rollups.merge_dashboard_stats(sharding.fan_out(lambda: compute(top_foods_limit=None))))
 
 
 # --- Comprehensive Admin Reports View ---
@@ -114,72 +146,75 @@ class AdminReportsView(APIView):
 
         company_id = request.query_params.get('companyId')
 
-        # 2. Base QuerySets
-        base_orders_queryset = Order.objects.filter(daily_menu__date__range=(start_date, end_date), daily_menu__isnull=False)
-        company_queryset = Company.objects.all()
-        if company_id:
-            base_orders_queryset = base_orders_queryset.filter(user__company_id=company_id)
-            company_queryset = company_queryset.filter(id=company_id)
+        # 2. Aggregations (set-based, see orders/reports.py), cached per filter set
+        response_data = cached_report(
+            'admin-reports', start_date, end_date,
+            lambda: self.build_report(start_date, end_date, company_id, today),
+            company_id=company_id, today=today,
+        )
+        if not start_date <= today <= end_date:
+            # Today's figures are cached on their own, so today's orders do not
+            # invalidate reports over past ranges.
+            today_summary = cached_report(
+                'admin-reports-today', today, today,
+                lambda: self.build_today(company_id, today),
+                company_id=company_id, today=today,
+            )
+            response_data = {**response_data, 'summary': {**response_data['summary'], **today_summary}}
+        if end_date < today:
+            # Past ranges are cached for hours, but user counts change without
+            # any order changing; take them from a short-lived entry instead.
+            users = cached_report(
+                'admin-reports-users', today, today,
+                lambda: self.build_users(company_id, today),
+                company_id=company_id, today=today,
+            )
+            response_data = with_user_stats(response_data, users)
+
+        return Response(response_data)
+
+    @staticmethod
+    def build_report(start_date, end_date, company_id, today):
+        """One company's report from its shard, or all of them merged across shards."""
+        if company_id or not sharding.enabled():
+            with sharding.for_company(company_id or None):
+                return build_admin_report(start_date, end_date, company_id, today=today)
+        return merge_admin_reports(sharding.fan_out(
+            lambda: build_admin_report(start_date, end_date, today=today, top_items_limit=None)
+        ))
+
+    @staticmethod
+    def build_today(company_id, today):
+        if company_id or not sharding.enabled():
+            with sharding.for_company(company_id or None):
+                return build_today_summary(company_id, today)
+        return merge_today_summaries(sharding.fan_out(lambda: build_today_summary(today=today)))
+
+    @staticmethod
+    def build_users(company_id, today):
+        if company_id or not sharding.enabled():
+            with sharding.for_company(company_id or None):
+                return build_user_stats(company_id, today)
+        return merge_user_stats(sharding.fan_out(lambda: build_user_stats(today=today)))
+
+# --- Kitchen Demand Forecast View ---
+
+class DemandForecastView(APIView):
+    """
+    Expected orders per company, date and food for the upcoming menus, and
+    per date and food across companies for prep. Computed nightly by
+    `manage.py forecast_demand`.
+    """
+    permission_classes = [IsSuperAdmin]
 
-        # 3. Aggregations (Now done in a safer way)
+    def get(self, request, *args, **kwargs):
+        today = timezone.now().date()
+        try:
+            start_date = timezone.datetime.fromisoformat(request.query_params.get('from', today.isoformat())).date()
+            end_date = timezone.datetime.fromisoformat(
+                request.query_params.get('to', (today + timedelta(days=settings.FORECAST_HORIZON_DAYS)).isoformat())
+            ).date()
+        except ValueError:
+            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
 
-        # --- Summary Stats ---
-        orders_today_qs = Order.objects.filter(daily_menu__date=today)
-        if company_id:
-            orders_today_qs = orders_today_qs.filter(user__company_id=company_id)
-        
-        total_sales_today = Decimal('0.0')
-        for order in orders_today_qs.select_related('food_item').prefetch_related('side_dishes'):
-            if order.food_item:
-                total_sales_today += order.food_item.price
-            total_sales_today += sum(side.price for side in order.side_dishes.all())
-
-        summary_data = {
-            "orders_today": orders_today_qs.count(),
-            "pending_orders_total": base_orders_queryset.filter(status__in=['PLACED', 'CONFIRMED']).count(),
-            "total_sales_today": total_sales_today
-        }
-
-        # --- Top Items (This query is generally safe) ---
-        top_items_data = base_orders_queryset.values('food_item__id', 'food_item__name').annotate(
-            foodId=F('food_item__id'),
-            name=F('food_item__name'),
-            ordered=Count('food_item')
-        ).order_by('-ordered')[:5]
-
-        # --- Sales by Date (Calculated in Python for reliability) ---
-        sales_by_date = defaultdict(lambda: {'orders': 0, 'revenue': Decimal('0.0')})
-        
-        orders_for_revenue = base_orders_queryset.select_related('food_item', 'daily_menu').prefetch_related('side_dishes')
-        
-        for order in orders_for_revenue:
-            date_str = order.daily_menu.date.isoformat()
-            sales_by_date[date_str]['orders'] += 1
-            
-            order_total = order.food_item.price if order.food_item else Decimal('0.0')
-            order_total += sum(side.price for side in order.side_dishes.all())
-            sales_by_date[date_str]['revenue'] += order_total
-
-        sales_by_date_data = [{'date': date, **data} for date, data in sorted(sales_by_date.items())]
-
-        # --- Company & User Stats (These queries are safe) ---
-        company_stats_data = company_queryset.annotate(
-            active_users=Count('employees', filter=Q(employees__is_active=True), distinct=True),
-            orders=Count('employees__orders', filter=Q(employees__orders__daily_menu__date__range=(start_date, end_date)), distinct=True)
-        ).values('id', 'name', 'active_users', 'orders')
-
-        user_stats_data = {
-            "total_users": User.objects.count(),
-            "active_last_30_days": User.objects.filter(last_login__gte=(today - timedelta(days=30))).count()
-        }
-
-        # --- 4. Response ---
-        response_data = {
-            "summary": summary_data,
-            "top_items": list(top_items_data),
-            "sales_by_date": sales_by_date_data,
-            "company_stats": list(company_stats_data),
-            "user_stats": user_stats_data,
-        }
-
-        return Response(response_data)
\ No newline at end of file
+        return Response(forecast_report(start_date, end_date, request.query_params.get('companyId')))
\ No newline at end of file
@@ -0,0 +1,174 @@
+# schedules/authoring.py
+"""
+Bulk authoring of daily menus.
+
+`upsert_daily_menus()` writes any number of menus of one schedule with a
+fixed number of queries: one bulk insert for the new menus and, per M2M, one
+delete plus one bulk insert of through-table rows. Existing menus keep their
+primary key (and so their orders); only their foods and sides are replaced.
+
+`clone_schedule()` copies a whole schedule, optionally to other companies
+and/or shifted in time, with three INSERT ... SELECT statements (menus, foods,
+sides) however many menus and targets there are.
+
+Through-table rows are written directly, so no m2m_changed signals fire for
+these menus; with tenant sharding both functions copy what they wrote to the
+shards themselves (core.sharding.copy_to_shards).
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+
+from companies.models import Company
+from core import sharding
+from .models import DailyMenu, Schedule
+
+FoodLink = DailyMenu.available_foods.through
+SideLink = DailyMenu.available_sides.through
+
+
+def week_template(schedule, template_start):
+    """
+    {weekday: (food ids, side ids)} read from the schedule's menus in the
+    seven days starting at `template_start`.
+    """
+    menus = dict(
+        DailyMenu.objects.filter(
+            schedule=schedule, date__gte=template_start, date__lt=template_start + timedelta(days=7)
+        ).values_list('pk', 'date')
+    )
+    foods, sides = defaultdict(list), defaultdict(list)
+    for menu_id, food_id in FoodLink.objects.filter(dailymenu_id__in=menus).values_list('dailymenu_id', 'fooditem_id'):
+        foods[menu_id].append(food_id)
+    for menu_id, side_id in SideLink.objects.filter(dailymenu_id__in=menus).values_list('dailymenu_id', 'sidedish_id'):
+        sides[menu_id].append(side_id)
+    return {menu_date.weekday(): (foods[menu_id], sides[menu_id]) for menu_id, menu_date in menus.items()}
+
+
+def expand_template(template, start_date, end_date):
+    """{date: (food ids, side ids)} for every day in the range whose weekday is in the template."""
+    entries = {}
+    day = start_date
+    while day <= end_date:
+        if day.weekday() in template:
+            entries[day] = template[day.weekday()]
+        day += timedelta(days=1)
+    return entries
+
+
+@transaction.atomic
+def upsert_daily_menus(schedule, entries):
+    """
+    Creates or updates the schedule's menus from {date: (food ids, side ids)}.
+    Returns (menus created, menus updated).
+    """
+    if not entries:
+        return 0, 0
+    existing = dict(
+        DailyMenu.objects.filter(schedule=schedule, date__in=list(entries)).values_list('date', 'pk')
+    )
+    created = DailyMenu.objects.bulk_create([
+        DailyMenu(schedule=schedule, date=menu_date) for menu_date in entries if menu_date not in existing
+    ])
+    menu_ids = dict(existing)
+    menu_ids.update((menu.date, menu.pk) for menu in created)
+
+    if existing:
+        FoodLink.objects.filter(dailymenu_id__in=existing.values()).delete()
+        SideLink.objects.filter(dailymenu_id__in=existing.values()).delete()
+    FoodLink.objects.bulk_create([
+        FoodLink(dailymenu_id=menu_ids[menu_date], fooditem_id=food_id)
+        for menu_date, (food_ids, _) in entries.items() for food_id in set(food_ids)
+    ], batch_size=1000)
+    SideLink.objects.bulk_create([
+        SideLink(dailymenu_id=menu_ids[menu_date], sidedish_id=side_id)
+        for menu_date, (_, side_ids) in entries.items() for side_id in set(side_ids)
+    ], batch_size=1000)
+    sharding.copy_to_shards(DailyMenu, pk__in=list(menu_ids.values()))
+    return len(created), len(existing)
+
+
+def _shifted(column, days):
+    """SQL (and params) for a date column moved by `days` days on this database."""
+    if connection.vendor == 'sqlite':
+        return f"date({column}, %s)", [f"{days:+d} days"]
+    if connection.vendor == 'mysql':
+        return f"DATE_ADD({column}, INTERVAL %s DAY)", [days]
+    # PostgreSQL and Oracle add integers to dates as days.
+    return f"({column} + %s)", [days]
+
+
+def _clone_links(cursor, link, target_field, source, targets, days):
+    table = connection.ops.quote_name(link._meta.db_table)
+    menus = connection.ops.quote_name(DailyMenu._meta.db_table)
+    shifted, params = _shifted('src.date', days)
+    placeholders = ', '.join(['%s'] * len(targets))
+    cursor.execute(
+        f"INSERT INTO {table} (dailymenu_id, {target_field}) "
+        f"SELECT dst.id, link.{target_field} FROM {table} link "
+        f"JOIN {menus} src ON src.id = link.dailymenu_id "
+        f"JOIN {menus} dst ON dst.schedule_id IN ({placeholders}) AND dst.date = {shifted} "
+        f"WHERE src.schedule_id = %s",
+        [*targets, *params, source.pk],
+    )
+
+
+@transaction.atomic
+def clone_schedule(source, companies=None, shift_days=0, name=None, activate=False):
+    """
+    Copies `source` with all its menus and their items. One copy is made per
+    entry of `companies` (None entries make default schedules); without
+    `companies` a single copy keeps the source's company. Every copied date
+    is moved by `shift_days`. With `activate`, each company's copy becomes its
+    active schedule. Returns the new schedules.
+    """
+    if companies is None:
+        companies = [source.company]
+    shift = timedelta(days=shift_days)
+    schedules = [
+        Schedule(
+            name=name or source.name,
+            company=company,
+            start_date=source.start_date + shift,
+            end_date=source.end_date + shift,
+            is_active=source.is_active,
+        )
+        for company in companies
+    ]
+    if connection.features.can_return_rows_from_bulk_insert:
+        schedules = Schedule.objects.bulk_create(schedules)
+    else:
+        for schedule in schedules:
+            schedule.save()
+    if not schedules:
+        return []
+
+    targets = [schedule.pk for schedule in schedules]
+    menus = connection.ops.quote_name(DailyMenu._meta.db_table)
+    schedule_table = connection.ops.quote_name(Schedule._meta.db_table)
+    shifted, params = _shifted('src.date', shift_days)
+    placeholders = ', '.join(['%s'] * len(targets))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {menus} (schedule_id, date) "
+            f"SELECT dst.id, {shifted} FROM {menus} src "
+            f"JOIN {schedule_table} dst ON dst.id IN ({placeholders}) "
+            f"WHERE src.schedule_id = %s",
+            [*params, *targets, source.pk],
+        )
+        _clone_links(cursor, FoodLink, 'fooditem_id', source, targets, shift_days)
+        _clone_links(cursor, SideLink, 'sidedish_id', source, targets, shift_days)
+    # Parents first: the shards copy these in this order after the commit.
+    sharding.copy_to_shards(Schedule, pk__in=targets)
+    sharding.copy_to_shards(DailyMenu, schedule_id__in=targets)
+
+    if activate:
+        activated = []
+        for company, schedule in zip(companies, schedules):
+            if company is not None:
+                company.active_schedule = schedule
+                activated.append(company)
+        Company.objects.bulk_update(activated, ['active_schedule'])
+        sharding.copy_to_shards(Company, pk__in=[company.pk for company in activated])
+    return schedules
@@ -0,0 +1,133 @@
+# schedules/capacity.py
+"""
+Portion limits per daily menu and food.
+
+Placing an order takes a portion with a single conditional UPDATE
+
+    UPDATE ... SET remaining = remaining - 1 WHERE ... AND remaining > 0
+
+inside the order's transaction. The database row lock on that one counter
+serializes concurrent orders for the same dish without locking the orders
+table, and a rolled-back order gives its portion back with the rollback.
+Foods without a MenuItemCapacity row are unlimited.
+
+With tenant sharding (core/sharding.py) the capacity rows are tenant data:
+they live on the shard of the menu's company, next to the orders that take
+from them. set_limits() writes them there and prefetch() reads them back.
+Menus of the default schedule (no company) are ordered from every shard, so
+no single row could count their portions: capping them is refused while
+sharding is on (see supports_limits()).
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, F, Prefetch
+from django.db.models.functions import Least
+
+from core import sharding
+from .models import MenuItemCapacity
+
+
+_releases_paused = contextvars.ContextVar('capacity_releases_paused', default=False)
+
+
+class SoldOut(Exception):
+    """Raised when no portion of a capped food is left."""
+
+
+class LimitsNotSupported(Exception):
+    """Raised when portion limits are set on a menu that cannot enforce them."""
+
+
+@contextmanager
+def releases_paused():
+    """Keeps deleted orders' portions taken, e.g. while archiving orders of past menus."""
+    token = _releases_paused.set(True)
+    try:
+        yield
+    finally:
+        _releases_paused.reset(token)
+
+
+def reserve(daily_menu_id, food_item_id):
+    """Takes one portion, or raises SoldOut. Call inside the order's transaction."""
+    taken = MenuItemCapacity.objects.filter(
+        daily_menu_id=daily_menu_id, food_item_id=food_item_id, remaining__gt=0
+    ).update(remaining=F('remaining') - 1)
+    if not taken and MenuItemCapacity.objects.filter(
+        daily_menu_id=daily_menu_id, food_item_id=food_item_id
+    ).exists():
+        raise SoldOut
+    return bool(taken)
+
+
+def release(daily_menu_id, food_item_id, portions=1):
+    """Gives portions back, never above the limit."""
+    if _releases_paused.get():
+        return
+    MenuItemCapacity.objects.filter(daily_menu_id=daily_menu_id, food_item_id=food_item_id).update(
+        remaining=Least(F('remaining') + portions, F('limit'))
+    )
+
+
+def release_orders(orders):
+    """Gives back the portions held by a queryset of orders (before they are canceled)."""
+    counts = orders.filter(food_item__isnull=False).order_by().values('daily_menu_id', 'food_item_id').annotate(n=Count('pk'))
+    for row in counts:
+        release(row['daily_menu_id'], row['food_item_id'], row['n'])
+
+
+def prefetch(company_id):
+    """prefetch_related() entry for DailyMenu.capacities, read from the company's shard."""
+    alias = sharding.shard_for_company(company_id)
+    if alias == sharding.PRIMARY:
+        return 'capacities'
+    return Prefetch('capacities', queryset=MenuItemCapacity.objects.using(alias))
+
+
+def supports_limits(daily_menu):
+    """Whether portions of this menu can be capped (see the module docstring)."""
+    return daily_menu.schedule.company_id is not None or not sharding.enabled()
+
+
+def set_limits(daily_menu, limits):
+    """
+    Sets {food id: limit or None} for a menu. `remaining` starts from the
+    limit minus the portions already ordered; None removes the cap.
+
+    The existing capacity rows are locked before the orders are counted, so
+    orders that are taking portions from them finish (and are counted) first
+    and later ones wait for the new remaining counts. A food capped for the
+    first time has no row to lock yet, so an order for it that is still in
+    flight is not counted.
+    """
+    from orders.models import Order
+
+    if not supports_limits(daily_menu) and any(limit is not None for limit in limits.values()):
+        raise LimitsNotSupported("Portion limits on the default schedule are not supported with tenant sharding.")
+    with sharding.for_company(daily_menu.schedule.company_id), transaction.atomic(using=sharding.current_alias()):
+        list(
+            MenuItemCapacity.objects.select_for_update()
+            .filter(daily_menu=daily_menu, food_item_id__in=list(limits)).values_list('pk', flat=True)
+        )
+        ordered = dict(
+            Order.objects.filter(daily_menu=daily_menu, food_item_id__in=list(limits))
+            .exclude(status=Order.OrderStatus.CANCELED)
+            .order_by().values('food_item_id').annotate(n=Count('pk')).values_list('food_item_id', 'n')
+        )
+        MenuItemCapacity.objects.filter(
+            daily_menu=daily_menu, food_item_id__in=[food_id for food_id, limit in limits.items() if limit is None]
+        ).delete()
+        MenuItemCapacity.objects.bulk_create(
+            [
+                MenuItemCapacity(
+                    daily_menu=daily_menu, food_item_id=food_id, limit=limit,
+                    remaining=max(limit - ordered.get(food_id, 0), 0),
+                )
+                for food_id, limit in limits.items() if limit is not None
+            ],
+            update_conflicts=True,
+            unique_fields=['daily_menu', 'food_item'],
+            update_fields=['limit', 'remaining'],
+        )
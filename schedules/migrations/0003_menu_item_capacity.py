@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0003_fooditem_search_text'),
+        ('schedules', '0002_alter_schedule_company'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuItemCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('limit', models.PositiveIntegerField()),
+                ('remaining', models.PositiveIntegerField()),
+                ('daily_menu', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='capacities', to='schedules.dailymenu')),
+                ('food_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='menu_capacities', to='menu.fooditem')),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('remaining__lte', models.F('limit'))), name='schedules_capacity_remaining_lte_limit')],
+                'unique_together': {('daily_menu', 'food_item')},
+            },
+        ),
+    ]
@@ -61,4 +61,28 @@ class DailyMenu(models.Model):
             )
 
     def __str__(self):
-        return f"Menu for {self.date} ({self.schedule.name})"
\ No newline at end of file
+        return f"Menu for {self.date} ({self.schedule.name})"
+
+
+class MenuItemCapacity(models.Model):
+    """
+    Maximum number of portions of a food on one daily menu. `remaining` is
+    decremented with a conditional UPDATE when an order is placed (see
+    schedules/capacity.py); foods without a row are unlimited.
+    """
+    daily_menu = models.ForeignKey(DailyMenu, on_delete=models.CASCADE, related_name='capacities')
+    food_item = models.ForeignKey('menu.FoodItem', on_delete=models.CASCADE, related_name='menu_capacities')
+    limit = models.PositiveIntegerField()
+    remaining = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('daily_menu', 'food_item')
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(remaining__lte=models.F('limit')),
+                name='schedules_capacity_remaining_lte_limit',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.remaining}/{self.limit} of {self.food_item_id} on menu #{self.daily_menu_id}"
@@ -1,5 +1,8 @@
 from rest_framework import serializers
 from .models import Schedule, DailyMenu
+from . import capacity
+from companies.models import Company
+from menu.models import FoodItem, SideDish
 from menu.serializers import FoodItemSerializer, SideDishSerializer
 
 # --- Serializers for DailyMenu ---
@@ -19,14 +22,89 @@ class DailyMenuWriteSerializer(serializers.ModelSerializer):
             )
         return value
 
+class DailyMenuEntrySerializer(serializers.Serializer):
+    """One menu of a bulk request. Item IDs are checked once for the whole batch."""
+    date = serializers.DateField()
+    available_foods = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    available_sides = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+
+class DailyMenuBulkSerializer(serializers.Serializer):
+    """
+    Serializer for creating/updating many daily menus of a schedule at once.
+    Either `menus` lists the menus to write, or `template_start` names the
+    first day of an existing week whose menus are cloned over
+    `start_date`..`end_date` by weekday.
+    """
+    menus = DailyMenuEntrySerializer(many=True, required=False)
+    template_start = serializers.DateField(required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        schedule = self.context['schedule']
+        if ('menus' in attrs) == ('template_start' in attrs):
+            raise serializers.ValidationError("Provide either 'menus' or 'template_start'.")
+
+        if 'menus' in attrs:
+            dates = [entry['date'] for entry in attrs['menus']]
+            if len(set(dates)) != len(dates):
+                raise serializers.ValidationError({"menus": "Each date may appear only once."})
+            first, last = (min(dates), max(dates)) if dates else (None, None)
+        else:
+            if 'start_date' not in attrs or 'end_date' not in attrs:
+                raise serializers.ValidationError("'start_date' and 'end_date' are required with 'template_start'.")
+            first, last = attrs['start_date'], attrs['end_date']
+            if first > last:
+                raise serializers.ValidationError({"end_date": "End date cannot be before the start date."})
+
+        if first is not None and not (schedule.start_date <= first and last <= schedule.end_date):
+            raise serializers.ValidationError(
+                "All dates must be within the parent schedule's date range."
+            )
+
+        self._validate_items(FoodItem, 'available_foods', attrs.get('menus', ()))
+        self._validate_items(SideDish, 'available_sides', attrs.get('menus', ()))
+        return attrs
+
+    def _validate_items(self, model, field, entries):
+        requested = {pk for entry in entries for pk in entry[field]}
+        if not requested:
+            return
+        missing = requested - set(model.objects.filter(pk__in=requested).values_list('pk', flat=True))
+        if missing:
+            raise serializers.ValidationError(
+                {field: f"Invalid pk(s) {sorted(missing)} - object does not exist."}
+            )
+
+
 class DailyMenuReadSerializer(serializers.ModelSerializer):
     """Serializer for reading DailyMenu instances with nested food details."""
     available_foods = FoodItemSerializer(many=True, read_only=True)
     available_sides = SideDishSerializer(many=True, read_only=True)
+    remaining_portions = serializers.SerializerMethodField()
 
     class Meta:
         model = DailyMenu
-        fields = ['id', 'date', 'available_foods', 'available_sides']
+        fields = ['id', 'date', 'available_foods', 'available_sides', 'remaining_portions']
+
+    def get_remaining_portions(self, obj):
+        """
+        {food id: portions left} for the capped foods of the menu; foods not
+        listed are unlimited. Prefetch 'capacities' to avoid a query per menu.
+        """
+        return {str(cap.food_item_id): cap.remaining for cap in obj.capacities.all()}
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # {food id: position} from orders.recommendations.food_ranking(), if the view passed one
+        ranking = self.context.get('food_ranking')
+        if ranking:
+            unranked = len(ranking)
+            data['available_foods'] = sorted(
+                data['available_foods'], key=lambda food: ranking.get(food['id'], unranked)
+            )
+        return data
 
 
 # --- Serializer for Schedule ---
@@ -40,4 +118,69 @@ class ScheduleSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'company', 'company_name', 'start_date', 'end_date', 'is_active', 'daily_menus'
         ]
-        extra_kwargs = {'company': {'write_only': True}}
\ No newline at end of file
+        extra_kwargs = {'company': {'write_only': True}}
+
+
+class ScheduleCloneSerializer(serializers.Serializer):
+    """
+    Serializer for cloning a schedule. `company_ids` lists the target
+    companies (omit it to keep the source's company, use `include_default`
+    for a default copy); dates move by `shift_days`, or so that the copy
+    starts on `start_date`.
+    """
+    company_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    include_default = serializers.BooleanField(default=False)
+    shift_days = serializers.IntegerField(required=False)
+    start_date = serializers.DateField(required=False)
+    name = serializers.CharField(max_length=255, required=False)
+    activate = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        schedule = self.context['schedule']
+        if 'shift_days' in attrs and 'start_date' in attrs:
+            raise serializers.ValidationError("Provide either 'shift_days' or 'start_date', not both.")
+        if 'start_date' in attrs:
+            attrs['shift_days'] = (attrs.pop('start_date') - schedule.start_date).days
+        attrs.setdefault('shift_days', 0)
+
+        if 'company_ids' in attrs or attrs['include_default']:
+            ids = attrs.pop('company_ids', [])
+            companies = Company.objects.in_bulk(ids)
+            missing = set(ids) - set(companies)
+            if missing:
+                raise serializers.ValidationError(
+                    {"company_ids": f"Invalid pk(s) {sorted(missing)} - object does not exist."}
+                )
+            attrs['companies'] = [companies[pk] for pk in dict.fromkeys(ids)]
+            if attrs['include_default']:
+                attrs['companies'].append(None)
+        else:
+            attrs['companies'] = None
+        if attrs['companies'] == [] or (attrs['companies'] is None and attrs['shift_days'] == 0):
+            raise serializers.ValidationError("The copy needs another company or a date shift.")
+        return attrs
+
+
+
+class MenuCapacitySerializer(serializers.Serializer):
+    """
+    Serializer for setting portion limits on a daily menu:
+    {"limits": {"<food id>": 200, "<food id>": null}}; null removes the cap.
+    """
+    limits = serializers.DictField(child=serializers.IntegerField(min_value=0, allow_null=True))
+
+    def validate_limits(self, value):
+        daily_menu = self.context['daily_menu']
+        try:
+            limits = {int(food_id): limit for food_id, limit in value.items()}
+        except ValueError:
+            raise serializers.ValidationError("Keys must be food item IDs.")
+        offered = set(daily_menu.available_foods.values_list('pk', flat=True))
+        unknown = set(limits) - offered
+        if unknown:
+            raise serializers.ValidationError(f"Food item(s) {sorted(unknown)} are not on this menu.")
+        if not capacity.supports_limits(daily_menu) and any(limit is not None for limit in limits.values()):
+            raise serializers.ValidationError(
+                "Portion limits cannot be set on the default schedule's menus while tenant sharding is on."
+            )
+        return limits
\ No newline at end of file
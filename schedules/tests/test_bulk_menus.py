@@ -0,0 +1,128 @@
+# schedules/tests/test_bulk_menus.py
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from companies.models import Company
+from menu.models import FoodItem, SideDish
+from schedules.models import DailyMenu, Schedule
+from users.models import User
+
+
+class BulkDailyMenuTests(APITestCase):
+    def setUp(self):
+        self.super_admin = User.objects.create_user(username='super', password='password123', role=User.Role.SUPER_ADMIN)
+        self.client.force_authenticate(user=self.super_admin)
+        self.schedule = Schedule.objects.create(name="Schedule", start_date=date(2030, 1, 1), end_date=date(2030, 3, 31))
+        self.kebab = FoodItem.objects.create(name="Kebab", description="", price=Decimal('100.00'))
+        self.stew = FoodItem.objects.create(name="Stew", description="", price=Decimal('80.00'))
+        self.salad = SideDish.objects.create(name="Salad", price=Decimal('20.00'))
+        self.url = reverse('schedule-daily-menus-bulk', kwargs={'schedule_pk': self.schedule.pk})
+
+    def menus(self):
+        return {
+            menu.date: (sorted(food.name for food in menu.available_foods.all()), [s.name for s in menu.available_sides.all()])
+            for menu in DailyMenu.objects.filter(schedule=self.schedule).prefetch_related('available_foods', 'available_sides')
+        }
+
+    def test_upserts_a_month_with_a_fixed_number_of_queries(self):
+        existing = DailyMenu.objects.create(schedule=self.schedule, date=date(2030, 1, 1))
+        existing.available_foods.set([self.stew])
+        entries = [
+            {'date': (date(2030, 1, 1) + timedelta(days=day)).isoformat(),
+             'available_foods': [self.kebab.pk], 'available_sides': [self.salad.pk]}
+            for day in range(30)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'menus': entries}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data['created'], response.data['updated']), (29, 1))
+        self.assertEqual(len(response.data['menus']), 30)
+        self.assertLess(len(queries), 20)
+
+        menus = self.menus()
+        self.assertEqual(len(menus), 30)
+        self.assertEqual(menus[date(2030, 1, 1)], (["Kebab"], ["Salad"]))
+        self.assertEqual(DailyMenu.objects.get(date=date(2030, 1, 1)).pk, existing.pk)
+
+    def test_clones_a_week_template_by_weekday(self):
+        monday = date(2030, 1, 7)
+        self.client.post(self.url, {'menus': [
+            {'date': monday.isoformat(), 'available_foods': [self.kebab.pk]},
+            {'date': (monday + timedelta(days=2)).isoformat(), 'available_foods': [self.stew.pk], 'available_sides': [self.salad.pk]},
+        ]}, format='json')
+
+        response = self.client.post(self.url, {
+            'template_start': monday.isoformat(),
+            'start_date': '2030-01-14',
+            'end_date': '2030-01-27',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['created'], 4)
+
+        menus = self.menus()
+        self.assertEqual(menus[date(2030, 1, 21)], (["Kebab"], []))
+        self.assertEqual(menus[date(2030, 1, 23)], (["Stew"], ["Salad"]))
+        self.assertNotIn(date(2030, 1, 22), menus)
+
+    def test_rejects_dates_outside_the_schedule_and_unknown_items(self):
+        response = self.client.post(self.url, {'menus': [{'date': '2031-01-01'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url, {'menus': [{'date': '2030-01-01', 'available_foods': [999]}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('available_foods', response.data)
+        self.assertFalse(DailyMenu.objects.exists())
+
+        employee = User.objects.create_user(username='emp', password='password123')
+        self.client.force_authenticate(user=employee)
+        self.assertEqual(self.client.post(self.url, {'menus': []}, format='json').status_code, 403)
+
+
+class ScheduleCloneTests(APITestCase):
+    def setUp(self):
+        self.super_admin = User.objects.create_user(username='super', password='password123', role=User.Role.SUPER_ADMIN)
+        self.client.force_authenticate(user=self.super_admin)
+        self.source = Schedule.objects.create(name="Default", start_date=date(2030, 1, 1), end_date=date(2030, 6, 30))
+        self.kebab = FoodItem.objects.create(name="Kebab", description="", price=Decimal('100.00'))
+        self.salad = SideDish.objects.create(name="Salad", price=Decimal('20.00'))
+        for day in range(0, 180, 3):
+            menu = DailyMenu.objects.create(schedule=self.source, date=date(2030, 1, 1) + timedelta(days=day))
+            menu.available_foods.set([self.kebab])
+            menu.available_sides.set([self.salad])
+        self.url = reverse('schedule-clone', kwargs={'pk': self.source.pk})
+
+    def test_clones_to_many_companies_in_a_fixed_number_of_queries(self):
+        companies = [Company.objects.create(name=f"Company {i}") for i in range(5)]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {
+                'company_ids': [company.pk for company in companies],
+                'start_date': '2030-07-01',
+                'activate': True,
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertLess(len(queries), 15)
+
+        clone = Schedule.objects.get(company=companies[2])
+        self.assertEqual((clone.start_date, clone.end_date), (date(2030, 7, 1), date(2030, 12, 28)))
+        companies[2].refresh_from_db()
+        self.assertEqual(companies[2].active_schedule, clone)
+        self.assertEqual(clone.daily_menus.count(), 60)
+        first = clone.daily_menus.get(date=date(2030, 7, 1))
+        self.assertEqual(list(first.available_foods.all()), [self.kebab])
+        self.assertEqual(list(first.available_sides.all()), [self.salad])
+        self.assertEqual(DailyMenu.available_foods.through.objects.count(), 60 * 6)
+
+    def test_requires_a_new_company_or_a_shift(self):
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'company_ids': [999]}, format='json').status_code, 400)
+
+        response = self.client.post(self.url, {'shift_days': 7}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data[0]['start_date'], date(2030, 1, 8))
@@ -0,0 +1,94 @@
+# schedules/tests/test_capacity.py
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from companies.models import Company
+from menu.models import FoodItem
+from orders.models import Order
+from orders.transitions import transition
+from schedules import capacity
+from schedules.models import DailyMenu, MenuItemCapacity, Schedule
+from users.models import User
+
+
+class MenuCapacityTests(APITestCase):
+    def setUp(self):
+        today = timezone.now().date()
+        self.company = Company.objects.create(name="Company")
+        schedule = Schedule.objects.create(name="Schedule", company=self.company,
+                                           start_date=today, end_date=today + timedelta(days=30))
+        self.company.active_schedule = schedule
+        self.company.save()
+        self.kebab = FoodItem.objects.create(name="Kebab", description="", price=Decimal('100.00'))
+        self.stew = FoodItem.objects.create(name="Stew", description="", price=Decimal('100.00'))
+        self.menu = DailyMenu.objects.create(schedule=schedule, date=today + timedelta(days=5))
+        self.menu.available_foods.set([self.kebab, self.stew])
+        self.employees = [
+            User.objects.create_user(username=f'emp{i}', password='password123', company=self.company,
+                                     budget=Decimal('500.00'))
+            for i in range(3)
+        ]
+        self.super_admin = User.objects.create_user(username='super', password='password123', role=User.Role.SUPER_ADMIN)
+        self.capacities_url = reverse('schedule-daily-menus-capacities',
+                                      kwargs={'schedule_pk': schedule.pk, 'pk': self.menu.pk})
+
+    def set_limits(self, limits):
+        self.client.force_authenticate(user=self.super_admin)
+        response = self.client.put(self.capacities_url, {'limits': limits}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def place(self, user, food):
+        self.client.force_authenticate(user=user)
+        return self.client.post(reverse('order-list'), {'daily_menu': self.menu.pk, 'food_item': food.pk}, format='json')
+
+    def remaining(self):
+        self.client.force_authenticate(user=self.employees[0])
+        [schedule] = self.client.get(reverse('my-company-menu')).data
+        [menu] = schedule['daily_menus']
+        return menu['remaining_portions']
+
+    def test_orders_stop_when_the_portions_run_out(self):
+        self.set_limits({str(self.kebab.pk): 2})
+        self.assertEqual(self.place(self.employees[0], self.kebab).status_code, 201)
+        self.assertEqual(self.place(self.employees[1], self.kebab).status_code, 201)
+
+        response = self.place(self.employees[2], self.kebab)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("sold out", str(response.data))
+        self.employees[2].refresh_from_db()
+        self.assertEqual(self.employees[2].budget, Decimal('500.00'))
+        self.assertEqual(self.remaining(), {str(self.kebab.pk): 0})
+
+        # Uncapped foods are still available.
+        self.assertEqual(self.place(self.employees[2], self.stew).status_code, 201)
+
+    def test_canceling_or_deleting_gives_the_portion_back(self):
+        self.set_limits({str(self.kebab.pk): 2})
+        self.place(self.employees[0], self.kebab)
+        self.place(self.employees[1], self.kebab)
+
+        transition(Order.objects.get(user=self.employees[0]), Order.OrderStatus.CANCELED)
+        self.assertEqual(self.remaining(), {str(self.kebab.pk): 1})
+        Order.objects.get(user=self.employees[1]).delete()
+        self.assertEqual(self.remaining(), {str(self.kebab.pk): 2})
+        # Deleting the canceled order does not release its portion twice.
+        Order.objects.get(user=self.employees[0]).delete()
+        self.assertEqual(MenuItemCapacity.objects.get().remaining, 2)
+
+    def test_limits_account_for_existing_orders(self):
+        self.place(self.employees[0], self.kebab)
+        response = self.set_limits({str(self.kebab.pk): 3, str(self.stew.pk): 1})
+        self.assertEqual(response.data['remaining_portions'], {str(self.kebab.pk): 2, str(self.stew.pk): 1})
+
+        self.set_limits({str(self.stew.pk): None})
+        self.assertEqual(self.remaining(), {str(self.kebab.pk): 2})
+
+        with self.assertRaises(capacity.SoldOut):
+            capacity.set_limits(self.menu, {self.kebab.pk: 0})
+            capacity.reserve(self.menu.pk, self.kebab.pk)
@@ -13,6 +13,8 @@ router.register(r'', ScheduleViewSet, basename='schedule') # Now this will work
 # Manual URL patterns for the nested DailyMenu endpoint
 # And now this will work
 daily_menu_list = DailyMenuViewSet.as_view({'get': 'list', 'post': 'create'})
+daily_menu_bulk = DailyMenuViewSet.as_view({'post': 'bulk'})
+daily_menu_capacities = DailyMenuViewSet.as_view({'put': 'capacities'})
 daily_menu_detail = DailyMenuViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'})
 
 urlpatterns = [
@@ -22,5 +24,7 @@ urlpatterns = [
     # Admin-facing endpoints
     path('', include(router.urls)),
     path('<int:schedule_pk>/daily_menus/', daily_menu_list, name='schedule-daily-menus-list'),
+    path('<int:schedule_pk>/daily_menus/bulk/', daily_menu_bulk, name='schedule-daily-menus-bulk'),
     path('<int:schedule_pk>/daily_menus/<int:pk>/', daily_menu_detail, name='schedule-daily-menus-detail'),
+    path('<int:schedule_pk>/daily_menus/<int:pk>/capacities/', daily_menu_capacities, name='schedule-daily-menus-capacities'),
 ]
\ No newline at end of file
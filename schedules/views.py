@@ -1,6 +1,7 @@
 # backend/schedules/views.py
 
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
@@ -9,7 +10,11 @@ from .serializers import (
     ScheduleSerializer,
     DailyMenuReadSerializer,
     DailyMenuWriteSerializer,
+    DailyMenuBulkSerializer,
+    ScheduleCloneSerializer,
+    MenuCapacitySerializer,
 )
+from . import authoring, capacity
 from core.permissions import IsSuperAdminOrReadOnly
 # [NEW] Import DjangoFilterBackend
 from django_filters.rest_framework import DjangoFilterBackend
@@ -22,11 +27,47 @@ class ScheduleViewSet(viewsets.ModelViewSet):
     """
     queryset = Schedule.objects.prefetch_related(
         'daily_menus__available_foods',
-        'daily_menus__available_sides'
+        'daily_menus__available_sides',
+        'daily_menus__capacities'
     ).select_related('company').all()
     serializer_class = ScheduleSerializer
     permission_classes = [IsSuperAdminOrReadOnly]
 
+    @action(detail=True, methods=['post'])
+    def clone(self, request, pk=None):
+        """
+        Copies the schedule with all its daily menus to other companies
+        and/or another date range.
+        Accessed via /api/schedules/<pk>/clone/
+        """
+        source = get_object_or_404(Schedule, pk=pk)
+        serializer = ScheduleCloneSerializer(data=request.data, context={'schedule': source})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        schedules = authoring.clone_schedule(
+            source,
+            companies=data['companies'],
+            shift_days=data['shift_days'],
+            name=data.get('name'),
+            activate=data['activate'],
+        )
+        menu_count = source.daily_menus.count()
+        return Response(
+            [
+                {
+                    'id': schedule.pk,
+                    'name': schedule.name,
+                    'company': schedule.company_id,
+                    'start_date': schedule.start_date,
+                    'end_date': schedule.end_date,
+                    'daily_menus': menu_count,
+                }
+                for schedule in schedules
+            ],
+            status=status.HTTP_201_CREATED,
+        )
+
 
 class DailyMenuViewSet(viewsets.ModelViewSet):
     """
@@ -43,7 +84,9 @@ class DailyMenuViewSet(viewsets.ModelViewSet):
         Return only daily menus belonging to the schedule in the URL.
         """
         schedule_pk = self.kwargs['schedule_pk']
-        return DailyMenu.objects.filter(schedule_id=schedule_pk)
+        return DailyMenu.objects.filter(schedule_id=schedule_pk).prefetch_related(
+            'available_foods', 'available_sides', capacity.prefetch(self.get_schedule().company_id)
+        )
 
     def get_serializer_class(self):
         """
@@ -51,22 +94,33 @@ class DailyMenuViewSet(viewsets.ModelViewSet):
         """
         if self.action in ['create', 'update', 'partial_update']:
             return DailyMenuWriteSerializer
+        if self.action == 'bulk':
+            return DailyMenuBulkSerializer
+        if self.action == 'capacities':
+            return MenuCapacitySerializer
         return DailyMenuReadSerializer
 
+    def get_schedule(self):
+        """
+        The schedule from the URL, looked up once per request.
+        """
+        if not hasattr(self, '_schedule'):
+            self._schedule = get_object_or_404(Schedule, pk=self.kwargs['schedule_pk'])
+        return self._schedule
+
     def get_serializer_context(self):
         """
         Pass the schedule object to the serializer for validation.
         """
         context = super().get_serializer_context()
-        context['schedule'] = get_object_or_404(Schedule, pk=self.kwargs['schedule_pk'])
+        context['schedule'] = self.get_schedule()
         return context
 
     def perform_create(self, serializer):
         """
         Automatically associate the daily menu with the schedule from the URL.
         """
-        schedule = get_object_or_404(Schedule, pk=self.kwargs['schedule_pk'])
-        serializer.save(schedule=schedule)
+        serializer.save(schedule=self.get_schedule())
 
     def create(self, request, *args, **kwargs):
         """
@@ -87,4 +141,56 @@ class DailyMenuViewSet(viewsets.ModelViewSet):
         if (menu_date - today).days < 7:
             response['X-Warning'] = "Menu created for a date that is less than one week away."
 
-        return response
\ No newline at end of file
+        return response
+
+    def bulk(self, request, *args, **kwargs):
+        """
+        Creates or updates many menus of the schedule in one request, either
+        from a list of menus or by cloning a week across a date range.
+        Accessed via /api/schedules/<schedule_pk>/daily_menus/bulk/
+        """
+        schedule = self.get_schedule()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if 'menus' in data:
+            entries = {
+                entry['date']: (entry['available_foods'], entry['available_sides'])
+                for entry in data['menus']
+            }
+        else:
+            template = authoring.week_template(schedule, data['template_start'])
+            entries = authoring.expand_template(template, data['start_date'], data['end_date'])
+
+        created, updated = authoring.upsert_daily_menus(schedule, entries)
+        menus = (
+            DailyMenu.objects.filter(schedule=schedule, date__in=list(entries))
+            .prefetch_related('available_foods', 'available_sides', 'capacities')
+        )
+        response = Response(
+            {
+                "created": created,
+                "updated": updated,
+                "menus": DailyMenuReadSerializer(menus, many=True, context=self.get_serializer_context()).data,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+        today = timezone.now().date()
+        if entries and (min(entries) - today).days < 7:
+            response['X-Warning'] = "Menus written for dates that are less than one week away."
+        return response
+
+    def capacities(self, request, *args, **kwargs):
+        """
+        Sets the portion limits of a menu's foods and returns the menu with
+        its remaining portions.
+        Accessed via /api/schedules/<schedule_pk>/daily_menus/<pk>/capacities/
+        """
+        daily_menu = self.get_object()
+        serializer = MenuCapacitySerializer(data=request.data, context={'daily_menu': daily_menu})
+        serializer.is_valid(raise_exception=True)
+        capacity.set_limits(daily_menu, serializer.validated_data['limits'])
+        daily_menu = self.get_queryset().get(pk=daily_menu.pk)
+        return Response(DailyMenuReadSerializer(daily_menu, context=self.get_serializer_context()).data)
\ No newline at end of file
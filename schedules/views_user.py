@@ -3,11 +3,22 @@ from rest_framework import generics, permissions
 from .models import Schedule
 from .serializers import ScheduleSerializer
 from users.models import User # <-- Import User model
+from orders.recommendations import food_ranking
 
 class MyCompanyMenuView(generics.ListAPIView):
     serializer_class = ScheduleSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_serializer_context(self):
+        """
+        Employees see each day's foods ordered by their predicted preference.
+        """
+        context = super().get_serializer_context()
+        user = self.request.user
+        if not (user.is_superuser or user.role == User.Role.SUPER_ADMIN):
+            context['food_ranking'] = food_ranking(user)
+        return context
+
     def get_queryset(self):
         user = self.request.user
 
@@ -15,7 +26,8 @@ class MyCompanyMenuView(generics.ListAPIView):
         if user.is_superuser or user.role == User.Role.SUPER_ADMIN:
             return Schedule.objects.prefetch_related(
                 'daily_menus__available_foods',
-                'daily_menus__available_sides'
+                'daily_menus__available_sides',
+                'daily_menus__capacities'
             ).select_related('company').order_by('company__name', 'name')
             
         active_schedule = None
@@ -33,7 +45,8 @@ class MyCompanyMenuView(generics.ListAPIView):
         if active_schedule:
             return Schedule.objects.filter(pk=active_schedule.pk).prefetch_related(
                 'daily_menus__available_foods',
-                'daily_menus__available_sides'
+                'daily_menus__available_sides',
+                'daily_menus__capacities'
             )
         
         # در غیر این صورت، لیست خالی برگردان
@@ -1,10 +1,41 @@
 # users/auth_views.py
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from core import sharding
+from core.throttling import AdmissionControlMixin, IPRateBucket
 from .serializers import MyTokenObtainPairSerializer
 
-class MyTokenObtainPairView(TokenObtainPairView):
+class MyTokenObtainPairView(AdmissionControlMixin, TokenObtainPairView):
     """
     Custom view for obtaining a JWT pair.
     Adds user role and username to the token payload.
+    Throttled per client IP, since every attempt runs a password hash.
     """
-    serializer_class = MyTokenObtainPairSerializer
\ No newline at end of file
+    serializer_class = MyTokenObtainPairSerializer
+    throttle_scope = 'login'
+    throttle_classes = [IPRateBucket]
+
+    def post(self, request, *args, **kwargs):
+        if not sharding.enabled():
+            return super().post(request, *args, **kwargs)
+        # The user is authenticated against the shard that holds them.
+        alias, _ = sharding.locate_user(username=request.data.get('username'))
+        with sharding.using_shard(alias):
+            return super().post(request, *args, **kwargs)
+
+class MyTokenRefreshView(TokenRefreshView):
+    """
+    Refreshes against the shard named by the refresh token's company_id
+    claim, since the refresh looks the user up again.
+    """
+
+    def post(self, request, *args, **kwargs):
+        if not sharding.enabled():
+            return super().post(request, *args, **kwargs)
+        try:
+            company_id = RefreshToken(request.data.get('refresh')).get('company_id')
+        except TokenError:
+            company_id = None  # The serializer reports the invalid token.
+        with sharding.for_company(company_id):
+            return super().post(request, *args, **kwargs)
\ No newline at end of file
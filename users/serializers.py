@@ -4,6 +4,7 @@ from rest_framework import serializers
 from decimal import Decimal
 from .models import User
 from companies.models import Company
+from core.authz import auth_context
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -44,11 +45,11 @@ class UserSerializer(serializers.ModelSerializer):
         1. Cannot assign a user to a different company.
         2. Cannot create/assign other Admins or Super Admins.
         """
-        request_user = self.context['request'].user
+        auth = auth_context(self.context['request'])
 
-        if request_user.role == User.Role.COMPANY_ADMIN:
+        if auth.is_company_admin:
             # Rule 1: Company Admin cannot manage users for other companies
-            if 'company' in data and data['company'] != request_user.company:
+            if 'company' in data and getattr(data['company'], 'pk', None) != auth.company_id:
                 raise serializers.ValidationError(
                     "You do not have permission to manage users for another company."
                 )
@@ -103,4 +104,6 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
         # Add custom claims
         token['role'] = user.role
+        # Lets core.middleware.TenantShardMiddleware route without a query.
+        token['company_id'] = user.company_id
         return token
@@ -6,6 +6,8 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import User
 from .serializers import UserSerializer
+from core import sharding
+from core.authz import auth_context, managed_users
 from core.permissions import CanManageUsers
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -30,14 +32,10 @@ class UserViewSet(viewsets.ModelViewSet):
         """
         Dynamically filter the queryset based on the request user's role.
         """
-        user = self.request.user
-        if user.role == User.Role.SUPER_ADMIN:
-            return User.objects.all().order_by('company__name', 'last_name')
-        
-        if user.role == User.Role.COMPANY_ADMIN:
-            return User.objects.filter(company=user.company).order_by('last_name')
-        
-        return User.objects.none()
+        users = managed_users(User.objects.all(), self.request)
+        if auth_context(self.request).is_super:
+            return users.order_by('company__name', 'last_name')
+        return users.order_by('last_name')
 
     def get_serializer_context(self):
         """
@@ -54,6 +52,9 @@ class UserViewSet(viewsets.ModelViewSet):
         if user.role == User.Role.COMPANY_ADMIN:
             serializer.save(company=user.company)
         else:
-            serializer.save()
+            # A super admin's new user is created on their company's shard.
+            company = serializer.validated_data.get('company')
+            with sharding.for_company(company.pk if company else None):
+                serializer.save()
 
 # Note: The MyTokenObtainPairView and its imports have been removed from this file.
\ No newline at end of file
@@ -1,13 +1,14 @@
 # users/views_admin.py
-from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
 from .models import User
+from wallets import ledger
 from wallets.models import Wallet, Transaction
 from .serializers import AllocateBudgetSerializer
+from core.authz import auth_context
 from core.permissions import IsCompanyAdminOfTargetUser
 
 class AllocateBudgetView(APIView):
@@ -18,10 +19,11 @@ class AllocateBudgetView(APIView):
     permission_classes = [IsCompanyAdminOfTargetUser]
     serializer_class = AllocateBudgetSerializer
 
-    @transaction.atomic
+    @ledger.atomic()
     def post(self, request, user_id, *args, **kwargs):
         target_user = get_object_or_404(User, pk=user_id)
-        company_wallet = get_object_or_404(Wallet, company=request.user.company)
+        self.check_object_permissions(request, target_user)
+        company_wallet = get_object_or_404(Wallet, company_id=auth_context(request).company_id)
         
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -41,23 +43,17 @@ class AllocateBudgetView(APIView):
         target_user.budget += amount_to_allocate
         target_user.save()
 
-        # 3. Log both sides of the transaction for auditing
-        # Log the withdrawal from the company wallet
-        Transaction.objects.create(
-            wallet=company_wallet,
-            user=request.user, # The admin who performed the action
-            transaction_type=Transaction.TransactionType.BUDGET_ALLOCATION,
-            amount=-amount_to_allocate, # Negative amount for withdrawal
-            description=f"Allocation to employee {target_user.username}."
+        # 3. Log both sides of the transaction for auditing (written together at commit)
+        # Log the withdrawal from the company wallet, by the admin who performed the action
+        ledger.record(
+            company_wallet, Transaction.TransactionType.BUDGET_ALLOCATION, -amount_to_allocate,
+            'allocation_out', user=request.user, username=target_user.username,
         )
 
         # Log the "deposit" into the user's budget (for their transaction history)
-        Transaction.objects.create(
-            wallet=company_wallet,
-            user=target_user,
-            transaction_type=Transaction.TransactionType.BUDGET_ALLOCATION,
-            amount=amount_to_allocate,
-            description=f"Budget allocated by {request.user.username}."
+        ledger.record(
+            company_wallet, Transaction.TransactionType.BUDGET_ALLOCATION, amount_to_allocate,
+            'allocation_in', user=target_user, username=request.user.username,
         )
         
         return Response(
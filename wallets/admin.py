@@ -1,6 +1,6 @@
 # wallets/admin.py
 from django.contrib import admin
-from .models import Wallet, Transaction
+from .models import Wallet, Transaction, LedgerCheckpoint
 
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
@@ -14,4 +14,10 @@ class TransactionAdmin(admin.ModelAdmin):
     list_filter = ('transaction_type', 'timestamp', 'wallet__company')
     search_fields = ('wallet__company__name', 'user__username', 'description')
     list_select_related = ('wallet__company', 'user') # Optimization for performance
-    
\ No newline at end of file
+    
+
+@admin.register(LedgerCheckpoint)
+class LedgerCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('side', 'owner_id', 'total', 'covered_until', 'updated_at')
+    list_filter = ('side',)
+    readonly_fields = ('side', 'owner_id', 'total', 'covered_until', 'updated_at')
@@ -0,0 +1,104 @@
+# wallets/ledger.py
+"""
+Buffered writer for wallet Transaction rows.
+
+Financial actions run inside `ledger.atomic()` and call `ledger.record(...)`
+for each ledger entry. The entries are buffered and written with a single
+bulk_create as the last statement of the atomic block, so they commit (or roll
+back) together with the balance changes that caused them.
+
+    with ledger.atomic():
+        wallet.balance -= amount
+        wallet.save()
+        ledger.record(wallet, Transaction.TransactionType.BUDGET_ALLOCATION, -amount,
+                      'allocation_out', user=admin, username=employee.username)
+
+Nested ledger.atomic() blocks share the outermost buffer; entries recorded
+in a nested block that fails are dropped along with its savepoint.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from core import sharding
+from .models import Transaction
+
+# Description templates shared by every entry of the same kind.
+DESCRIPTIONS = {
+    'deposit': "Deposit made by Super Admin {username}.",
+    'allocation_out': "Allocation to employee {username}.",
+    'allocation_in': "Budget allocated by {username}.",
+    'order_deduction': "Deduction for Order #{order_id}",
+    'order_adjustment': "Price adjustment for updated Order #{order_id}",
+    'order_refund': "Refund for canceled Order #{order_id}",
+}
+
+_buffer = contextvars.ContextVar('wallets_ledger_buffer', default=None)
+
+
+class LedgerBuffer:
+    """Ledger entries recorded in the current ledger.atomic() block."""
+
+    def __init__(self, using=None):
+        self.using = using
+        self.entries = []
+
+    def add(self, entry):
+        self.entries.append(entry)
+
+    def flush(self):
+        if self.entries:
+            Transaction.objects.using(self.using).bulk_create(self.entries)
+            self.entries = []
+
+
+def describe(template, **params):
+    return DESCRIPTIONS[template].format(**params)
+
+
+def record(wallet, transaction_type, amount, template, user=None, **params):
+    """
+    Records a ledger entry. Inside ledger.atomic() it is buffered until the
+    block ends; outside of one it is written immediately.
+    """
+    entry = Transaction(
+        wallet=wallet,
+        user=user,
+        transaction_type=transaction_type,
+        amount=amount,
+        description=describe(template, **params),
+    )
+    buffer = _buffer.get()
+    if buffer is None:
+        entry.save()
+    else:
+        buffer.add(entry)
+    return entry
+
+
+@contextmanager
+def atomic(using=None):
+    """
+    transaction.atomic() that writes the recorded ledger entries in one
+    bulk_create right before the block commits.
+    """
+    outer = _buffer.get()
+    with transaction.atomic(using=using or sharding.current_alias()):
+        if outer is not None:
+            mark = len(outer.entries)
+            try:
+                yield outer
+            except BaseException:
+                # This block's savepoint is rolled back; so are its entries.
+                del outer.entries[mark:]
+                raise
+            return
+
+        buffer = LedgerBuffer(using)
+        token = _buffer.set(buffer)
+        try:
+            yield buffer
+            buffer.flush()
+        finally:
+            _buffer.reset(token)
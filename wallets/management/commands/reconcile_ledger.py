@@ -0,0 +1,57 @@
+# wallets/management/commands/reconcile_ledger.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wallets import reconciliation
+
+
+class Command(BaseCommand):
+    """
+    Compares company wallet balances and employee budgets with the
+    Transaction ledger. The checkpoints are advanced first, so a nightly run
+    only sums the entries recorded since the previous one. Exits with an
+    error when drift is found, unless --repair is given.
+    """
+    help = 'Reconciles wallet balances and user budgets against the transaction ledger.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, default=None, help='Only check this company ID.')
+        parser.add_argument('--repair', action='store_true',
+                            help='Set drifted balances to the ledger total instead of failing.')
+        parser.add_argument('--full', action='store_true',
+                            help='Drop the checkpoints and sum the whole ledger again.')
+        parser.add_argument('--no-checkpoint', action='store_true',
+                            help='Do not advance the checkpoints before checking.')
+
+    def handle(self, *args, **options):
+        if options['full']:
+            reconciliation.reset_checkpoints()
+        if not options['no_checkpoint']:
+            mark = reconciliation.advance_checkpoints()
+            self.stdout.write(f"Ledger checkpoints cover entries up to {mark}.")
+
+        if options['repair']:
+            report = reconciliation.repair(options['company'])
+        else:
+            report = reconciliation.reconcile(options['company'])
+        for row in report['wallets']:
+            self.stdout.write(
+                f"Wallet of {row['company_name']} (#{row['company_id']}): balance {row['balance']}, "
+                f"ledger {row['expected']}, drift {row['drift']}"
+            )
+        for row in report['users']:
+            self.stdout.write(
+                f"User {row['username']} (#{row['user_id']}): budget {row['budget']}, "
+                f"ledger {row['expected']}, drift {row['drift']}"
+            )
+        if report['consistent']:
+            self.stdout.write(self.style.SUCCESS("Wallet balances and budgets match the ledger."))
+            return
+        if not options['repair']:
+            raise CommandError(
+                f"{len(report['wallets'])} wallet(s) and {len(report['users'])} user budget(s) have drifted; "
+                "run with --repair to reset them to the ledger."
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Repaired {len(report['wallets'])} wallet(s) and {len(report['users'])} user budget(s)."
+        ))
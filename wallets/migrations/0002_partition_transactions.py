@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from core.partitioning import convert_table
+
+
+def partition_transactions(apps, schema_editor):
+    """Partitions wallets_transaction by month of timestamp (PostgreSQL with DB_PARTITIONING only)."""
+    convert_table(schema_editor.connection, 'wallets_transaction', 'timestamp')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0001_initial'),
+    ]
+
+    operations = [
+        # Migrating backwards leaves the table partitioned, which is
+        # transparent to Django.
+        migrations.RunPython(partition_transactions, migrations.RunPython.noop),
+    ]
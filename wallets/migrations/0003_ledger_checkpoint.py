@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0002_partition_transactions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('side', models.CharField(choices=[('WALLET', 'Company Wallet'), ('BUDGET', 'User Budget')], max_length=10)),
+                ('owner_id', models.PositiveBigIntegerField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('covered_until', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['timestamp'], name='wallets_tx_timestamp_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgercheckpoint',
+            constraint=models.UniqueConstraint(fields=('side', 'owner_id'), name='wallets_checkpoint_owner_uniq'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0003_ledger_checkpoint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'timestamp'], name='wallets_tx_user_ts_idx'),
+        ),
+    ]
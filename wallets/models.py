@@ -28,6 +28,30 @@ class Wallet(models.Model):
         return f"Wallet for {self.company.name} - Balance: {self.balance}"
 
 
+class TransactionQuerySet(models.QuerySet):
+    """
+    Splits the ledger into the two balances it backs. The sign of a budget
+    allocation tells the two entries apart: the negative one leaves the
+    company wallet, the positive one lands in the employee's budget.
+    """
+    def wallet_side(self):
+        """Entries that move Wallet.balance."""
+        return self.filter(
+            models.Q(transaction_type=Transaction.TransactionType.DEPOSIT)
+            | models.Q(transaction_type=Transaction.TransactionType.BUDGET_ALLOCATION, amount__lt=0)
+        )
+
+    def budget_side(self):
+        """Entries that move User.budget (owned by Transaction.user)."""
+        return self.filter(user__isnull=False).filter(
+            models.Q(transaction_type=Transaction.TransactionType.BUDGET_ALLOCATION, amount__gt=0)
+            | models.Q(transaction_type__in=[
+                Transaction.TransactionType.ORDER_DEDUCTION,
+                Transaction.TransactionType.REFUND,
+            ])
+        )
+
+
 class Transaction(models.Model):
     """
     Logs every financial transaction in the system for auditing.
@@ -68,8 +92,42 @@ class Transaction(models.Model):
         help_text="A brief description of the transaction (e.g., 'Order #123')."
     )
 
+    objects = TransactionQuerySet.as_manager()
+
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Reconciliation only reads the entries after the last checkpoint.
+            models.Index(fields=['timestamp'], name='wallets_tx_timestamp_idx'),
+            # Per-user history (see wallets.views.MyTransactionHistoryView).
+            models.Index(fields=['user', 'timestamp'], name='wallets_tx_user_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.transaction_type} of {self.amount} for {self.wallet.company.name} at {self.timestamp}"
+
+
+class LedgerCheckpoint(models.Model):
+    """
+    Running total of one wallet's or one user's ledger entries up to
+    `covered_until`. Reconciliation adds the entries after the checkpoint
+    instead of summing the whole history (see wallets/reconciliation.py).
+    """
+    class Side(models.TextChoices):
+        WALLET = "WALLET", "Company Wallet"
+        BUDGET = "BUDGET", "User Budget"
+
+    side = models.CharField(max_length=10, choices=Side.choices)
+    # Wallet id for the WALLET side, user id for the BUDGET side
+    owner_id = models.PositiveBigIntegerField()
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    covered_until = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['side', 'owner_id'], name='wallets_checkpoint_owner_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.side} #{self.owner_id}: {self.total} until {self.covered_until}"
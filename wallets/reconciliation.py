@@ -0,0 +1,227 @@
+# wallets/reconciliation.py
+"""
+Checks Wallet.balance and User.budget against the Transaction ledger.
+
+The balance an owner should have is its LedgerCheckpoint total plus the
+ledger entries recorded after the checkpoint. `advance_checkpoints()` folds
+the entries older than LEDGER_CHECKPOINT_LAG_SECONDS into the checkpoints,
+so a nightly run only reads the entries since the previous night instead of
+the whole history. The lag leaves room for transactions that were stamped
+before the cutoff but had not committed yet when the checkpoint was taken.
+
+Every checkpoint row shares the same `covered_until`; it is moved for all of
+them in the transaction that folds the entries in.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, Max, Sum, Value, When
+from django.utils import timezone
+
+from core import sharding
+from users.models import User
+from .models import LedgerCheckpoint, Transaction, Wallet
+
+Side = LedgerCheckpoint.Side
+
+# Ledger entries of each side and the Transaction column naming their owner
+SIDES = {
+    Side.WALLET: ('wallet_side', 'wallet_id'),
+    Side.BUDGET: ('budget_side', 'user_id'),
+}
+
+
+def entries(side):
+    method, _ = SIDES[side]
+    return getattr(Transaction.objects, method)()
+
+
+def watermark():
+    """The time the checkpoints cover the ledger up to (None before the first run)."""
+    return LedgerCheckpoint.objects.aggregate(mark=Max('covered_until'))['mark']
+
+
+def ledger_sums(side, after=None, until=None, owners=None):
+    """{owner id: sum of its entries} for entries in (after, until]."""
+    _, owner_field = SIDES[side]
+    queryset = entries(side)
+    if after is not None:
+        queryset = queryset.filter(timestamp__gt=after)
+    if until is not None:
+        queryset = queryset.filter(timestamp__lte=until)
+    if owners is not None:
+        queryset = queryset.filter(**{f'{owner_field}__in': owners})
+    rows = queryset.order_by().values(owner_field).annotate(total=Sum('amount')).values_list(owner_field, 'total')
+    return dict(rows)
+
+
+def advance_checkpoints(now=None):
+    """
+    Folds the entries between the current watermark and now minus the lag
+    into the checkpoints. Returns the new watermark.
+    """
+    cutoff = (now or timezone.now()) - timedelta(seconds=settings.LEDGER_CHECKPOINT_LAG_SECONDS)
+    with transaction.atomic(using=sharding.current_alias()):
+        # Serializes concurrent runs; a second one sees the moved watermark.
+        list(LedgerCheckpoint.objects.select_for_update().values_list('pk', flat=True))
+        previous = watermark()
+        if previous is not None and previous >= cutoff:
+            return previous
+
+        for side in SIDES:
+            deltas = ledger_sums(side, after=previous, until=cutoff)
+            if not deltas:
+                continue
+            existing = list(LedgerCheckpoint.objects.filter(side=side, owner_id__in=list(deltas)))
+            for checkpoint in existing:
+                checkpoint.total += deltas.pop(checkpoint.owner_id)
+            LedgerCheckpoint.objects.bulk_update(existing, ['total'], batch_size=1000)
+            LedgerCheckpoint.objects.bulk_create([
+                LedgerCheckpoint(side=side, owner_id=owner_id, total=total, covered_until=cutoff)
+                for owner_id, total in deltas.items()
+            ], batch_size=1000)
+
+        LedgerCheckpoint.objects.update(covered_until=cutoff, updated_at=timezone.now())
+    return cutoff
+
+
+def reset_checkpoints():
+    """Drops every checkpoint; the next run sums the ledger from the start."""
+    LedgerCheckpoint.objects.all().delete()
+
+
+def expected_balances(side, owners=None):
+    """{owner id: balance according to the ledger}, from the checkpoints plus the newer entries."""
+    mark = watermark()
+    checkpoints = LedgerCheckpoint.objects.filter(side=side)
+    if owners is not None:
+        checkpoints = checkpoints.filter(owner_id__in=owners)
+    expected = defaultdict(Decimal)
+    for owner_id, total in checkpoints.values_list('owner_id', 'total'):
+        expected[owner_id] += total
+    for owner_id, total in ledger_sums(side, after=mark, owners=owners).items():
+        expected[owner_id] += total
+    return expected
+
+
+def _wallets(company_id=None):
+    wallets = Wallet.objects.order_by('pk')
+    if company_id is not None:
+        wallets = wallets.filter(company_id=company_id)
+    return wallets
+
+
+def _users(company_id=None):
+    users = User.objects.order_by('pk')
+    if company_id is not None:
+        users = users.filter(company_id=company_id)
+    return users
+
+
+def reconcile(company_id=None):
+    """
+    Compares the stored balances with the ledger. Only drifted wallets and
+    users are listed; `drift` is the stored balance minus the expected one.
+    """
+    wallet_expected = expected_balances(
+        Side.WALLET, None if company_id is None else list(_wallets(company_id).values_list('pk', flat=True))
+    )
+    budget_expected = expected_balances(
+        Side.BUDGET, None if company_id is None else list(_users(company_id).values_list('pk', flat=True))
+    )
+
+    companies = {}
+
+    def company_entry(company_pk, company_name):
+        return companies.setdefault(company_pk, {
+            'company_id': company_pk,
+            'company_name': company_name,
+            'wallet_drift': Decimal('0.00'),
+            'budget_drift': Decimal('0.00'),
+            'drifted_users': 0,
+        })
+
+    wallets = []
+    wallet_rows = _wallets(company_id).values_list('pk', 'company_id', 'company__name', 'balance')
+    for wallet_id, company_pk, company_name, balance in wallet_rows.iterator():
+        expected = wallet_expected.get(wallet_id, Decimal('0.00'))
+        if balance != expected:
+            wallets.append({
+                'wallet_id': wallet_id,
+                'company_id': company_pk,
+                'company_name': company_name,
+                'balance': balance,
+                'expected': expected,
+                'drift': balance - expected,
+            })
+            company_entry(company_pk, company_name)['wallet_drift'] += balance - expected
+
+    users = []
+    user_rows = _users(company_id).values_list('pk', 'username', 'company_id', 'company__name', 'budget')
+    for user_id, username, company_pk, company_name, budget in user_rows.iterator():
+        expected = budget_expected.get(user_id, Decimal('0.00'))
+        if budget != expected:
+            users.append({
+                'user_id': user_id,
+                'username': username,
+                'company_id': company_pk,
+                'budget': budget,
+                'expected': expected,
+                'drift': budget - expected,
+            })
+            if company_pk is not None:
+                entry = company_entry(company_pk, company_name)
+                entry['budget_drift'] += budget - expected
+                entry['drifted_users'] += 1
+
+    return {
+        'covered_until': watermark(),
+        'consistent': not wallets and not users,
+        'companies': sorted(companies.values(), key=lambda entry: entry['company_id']),
+        'wallets': wallets,
+        'users': users,
+    }
+
+
+
+def merge_reports(reports):
+    """Combines reconcile() reports of several shards into one."""
+    watermarks = [report['covered_until'] for report in reports if report['covered_until'] is not None]
+    return {
+        'covered_until': min(watermarks) if watermarks else None,
+        'consistent': all(report['consistent'] for report in reports),
+        'companies': sorted((entry for report in reports for entry in report['companies']),
+                            key=lambda entry: entry['company_id']),
+        'wallets': [row for report in reports for row in report['wallets']],
+        'users': [row for report in reports for row in report['users']],
+    }
+
+def _set_balances(queryset, field, balances):
+    if balances:
+        queryset.filter(pk__in=list(balances)).update(**{field: Case(
+            *[When(pk=pk, then=Value(amount)) for pk, amount in balances.items()],
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )})
+
+
+def repair(company_id=None):
+    """
+    Sets every drifted balance to what the ledger says. The drifted rows are
+    locked and their expected balance recomputed first, so entries committed
+    in the meantime are not lost. Returns the reconcile() report it fixed.
+    """
+    report = reconcile(company_id)
+    with transaction.atomic(using=sharding.current_alias()):
+        wallet_ids = [row['wallet_id'] for row in report['wallets']]
+        user_ids = [row['user_id'] for row in report['users']]
+        list(Wallet.objects.select_for_update().filter(pk__in=wallet_ids).values_list('pk', flat=True))
+        list(User.objects.select_for_update().filter(pk__in=user_ids).values_list('pk', flat=True))
+
+        wallet_expected = expected_balances(Side.WALLET, wallet_ids)
+        budget_expected = expected_balances(Side.BUDGET, user_ids)
+        _set_balances(Wallet.objects, 'balance', {pk: wallet_expected.get(pk, Decimal('0.00')) for pk in wallet_ids})
+        _set_balances(User.objects, 'budget', {pk: budget_expected.get(pk, Decimal('0.00')) for pk in user_ids})
+    return report
@@ -30,6 +30,21 @@ class TransactionSerializer(serializers.ModelSerializer):
         ]
 
 
+class TransactionHistorySerializer(serializers.ModelSerializer):
+    """
+    Serializer for a user's own budget history. `balance_after` is the
+    budget right after the transaction, computed in the database.
+    """
+    balance_after = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = Transaction
+        fields = [
+            'id', 'transaction_type', 'amount', 'timestamp',
+            'description', 'balance_after'
+        ]
+
+
 class WalletSerializer(serializers.ModelSerializer):
     """
     Serializer for providing a detailed view of a company's wallet.
@@ -43,4 +58,40 @@ class WalletSerializer(serializers.ModelSerializer):
         model = Wallet
         fields = [
             'id', 'company_name', 'balance', 'updated_at', 'transactions'
-        ]
\ No newline at end of file
+        ]
+
+class WalletDriftSerializer(serializers.Serializer):
+    wallet_id = serializers.IntegerField()
+    company_id = serializers.IntegerField()
+    company_name = serializers.CharField()
+    balance = serializers.DecimalField(max_digits=14, decimal_places=2)
+    expected = serializers.DecimalField(max_digits=14, decimal_places=2)
+    drift = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class BudgetDriftSerializer(serializers.Serializer):
+    user_id = serializers.IntegerField()
+    username = serializers.CharField()
+    company_id = serializers.IntegerField(allow_null=True)
+    budget = serializers.DecimalField(max_digits=14, decimal_places=2)
+    expected = serializers.DecimalField(max_digits=14, decimal_places=2)
+    drift = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class CompanyDriftSerializer(serializers.Serializer):
+    company_id = serializers.IntegerField()
+    company_name = serializers.CharField()
+    wallet_drift = serializers.DecimalField(max_digits=14, decimal_places=2)
+    budget_drift = serializers.DecimalField(max_digits=14, decimal_places=2)
+    drifted_users = serializers.IntegerField()
+
+
+class ReconciliationSerializer(serializers.Serializer):
+    """
+    Serializer for the ledger reconciliation report (see wallets/reconciliation.py).
+    """
+    covered_until = serializers.DateTimeField(allow_null=True)
+    consistent = serializers.BooleanField()
+    companies = CompanyDriftSerializer(many=True)
+    wallets = WalletDriftSerializer(many=True)
+    users = BudgetDriftSerializer(many=True)
@@ -0,0 +1,55 @@
+# wallets/tests/test_history.py
+
+from decimal import Decimal
+
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from companies.models import Company
+from users.models import User
+from wallets import ledger
+from wallets.models import Transaction, Wallet
+
+
+class TransactionHistoryTests(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Company")
+        self.wallet = Wallet.objects.get(company=self.company)
+        self.admin = User.objects.create_user(username='admin', password='password123', company=self.company,
+                                              role=User.Role.COMPANY_ADMIN)
+        self.employee = User.objects.create_user(username='emp', password='password123', company=self.company)
+        self.url = reverse('my-transactions')
+
+        with ledger.atomic():
+            ledger.record(self.wallet, Transaction.TransactionType.BUDGET_ALLOCATION, Decimal('-100.00'),
+                          'allocation_out', user=self.admin, username='emp')
+            ledger.record(self.wallet, Transaction.TransactionType.BUDGET_ALLOCATION, Decimal('100.00'),
+                          'allocation_in', user=self.employee, username='admin')
+        for order_id in range(1, 6):
+            ledger.record(self.wallet, Transaction.TransactionType.ORDER_DEDUCTION, Decimal('-10.00'),
+                          'order_deduction', user=self.employee, order_id=order_id)
+        ledger.record(self.wallet, Transaction.TransactionType.REFUND, Decimal('10.00'),
+                      'order_refund', user=self.employee, order_id=5)
+
+    def test_pages_carry_the_running_balance_of_the_whole_ledger(self):
+        self.client.force_authenticate(user=self.employee)
+
+        first = self.client.get(self.url, {'page_size': 3})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([row['balance_after'] for row in first.data['results']], ['60.00', '50.00', '60.00'])
+        self.assertEqual(first.data['results'][0]['description'], "Refund for canceled Order #5")
+
+        second = self.client.get(first.data['next'])
+        self.assertEqual([row['balance_after'] for row in second.data['results']], ['70.00', '80.00', '90.00'])
+        third = self.client.get(second.data['next'])
+        self.assertEqual([row['balance_after'] for row in third.data['results']], ['100.00'])
+        self.assertIsNone(third.data['next'])
+
+    def test_only_the_users_own_budget_entries_are_listed(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
@@ -0,0 +1,87 @@
+# wallets/tests/test_ledger.py
+
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from companies.models import Company
+from users.models import User
+from wallets import ledger
+from wallets.models import Transaction
+
+
+def ledger_inserts(queries):
+    return [q for q in queries if q['sql'].startswith('INSERT INTO "wallets_transaction"')]
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Company")
+        self.wallet = self.company.wallet
+        self.employee = User.objects.create_user(username='emp', password='password123', company=self.company)
+
+    def test_entries_are_written_in_one_insert_at_the_end_of_the_block(self):
+        with CaptureQueriesContext(connection) as queries:
+            with ledger.atomic():
+                ledger.record(self.wallet, Transaction.TransactionType.DEPOSIT, Decimal('10'), 'deposit', username='root')
+                ledger.record(self.wallet, Transaction.TransactionType.REFUND, Decimal('5'), 'order_refund',
+                              user=self.employee, order_id=7)
+                self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(len(ledger_inserts(queries)), 1)
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('description', flat=True)),
+            ["Deposit made by Super Admin root.", "Refund for canceled Order #7"],
+        )
+
+    def test_entries_roll_back_with_the_business_change(self):
+        with self.assertRaises(RuntimeError):
+            with ledger.atomic():
+                self.wallet.balance = Decimal('100')
+                self.wallet.save()
+                ledger.record(self.wallet, Transaction.TransactionType.DEPOSIT, Decimal('100'), 'deposit', username='root')
+                raise RuntimeError
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('0'))
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_failed_nested_block_drops_only_its_entries(self):
+        with ledger.atomic():
+            ledger.record(self.wallet, Transaction.TransactionType.DEPOSIT, Decimal('1'), 'deposit', username='a')
+            try:
+                with ledger.atomic():
+                    ledger.record(self.wallet, Transaction.TransactionType.DEPOSIT, Decimal('2'), 'deposit', username='b')
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(list(Transaction.objects.values_list('amount', flat=True)), [Decimal('1.00')])
+
+    def test_record_outside_a_block_writes_immediately(self):
+        ledger.record(self.wallet, Transaction.TransactionType.DEPOSIT, Decimal('3'), 'deposit', username='root')
+        self.assertEqual(Transaction.objects.count(), 1)
+
+
+class AllocateBudgetLedgerTests(APITestCase):
+    def test_allocation_logs_both_sides_in_one_insert(self):
+        company = Company.objects.create(name="Company")
+        company.wallet.balance = Decimal('1000')
+        company.wallet.save()
+        admin = User.objects.create_user(
+            username='admin', password='password123', role=User.Role.COMPANY_ADMIN, company=company
+        )
+        employee = User.objects.create_user(username='emp', password='password123', company=company)
+        self.client.force_authenticate(user=admin)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('admin-allocate-budget', args=[employee.pk]), {'amount': '250.00'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ledger_inserts(queries)), 1)
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('amount', 'description')),
+            [(Decimal('-250.00'), "Allocation to employee emp."), (Decimal('250.00'), "Budget allocated by admin.")],
+        )
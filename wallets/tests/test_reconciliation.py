@@ -0,0 +1,137 @@
+# wallets/tests/test_reconciliation.py
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from companies.models import Company
+from users.models import User
+from wallets import ledger, reconciliation
+from wallets.models import LedgerCheckpoint, Transaction, Wallet
+
+
+class ReconciliationMixin:
+    def setUp(self):
+        self.company = Company.objects.create(name="Company")
+        self.wallet = Wallet.objects.get(company=self.company)
+        self.admin = User.objects.create_user(username='admin', password='password123', company=self.company,
+                                              role=User.Role.COMPANY_ADMIN)
+        self.employee = User.objects.create_user(username='emp', password='password123', company=self.company)
+
+    def deposit_and_allocate(self, deposit, allocation):
+        """Mirrors WalletDepositView and AllocateBudgetView."""
+        with ledger.atomic():
+            self.wallet.balance += deposit - allocation
+            self.wallet.save()
+            self.employee.budget += allocation
+            self.employee.save()
+            ledger.record(self.wallet, Transaction.TransactionType.DEPOSIT, deposit, 'deposit', username='root')
+            ledger.record(self.wallet, Transaction.TransactionType.BUDGET_ALLOCATION, -allocation,
+                          'allocation_out', user=self.admin, username='emp')
+            ledger.record(self.wallet, Transaction.TransactionType.BUDGET_ALLOCATION, allocation,
+                          'allocation_in', user=self.employee, username='admin')
+
+    def spend(self, amount):
+        """Mirrors OrderViewSet.perform_create."""
+        with ledger.atomic():
+            self.employee.budget -= amount
+            self.employee.save()
+            ledger.record(self.wallet, Transaction.TransactionType.ORDER_DEDUCTION, -amount,
+                          'order_deduction', user=self.employee, order_id=1)
+
+
+class ReconciliationTests(ReconciliationMixin, TestCase):
+    def test_balances_written_through_the_ledger_are_consistent(self):
+        self.deposit_and_allocate(Decimal('500.00'), Decimal('120.00'))
+        self.spend(Decimal('45.50'))
+
+        report = reconciliation.reconcile()
+        self.assertTrue(report['consistent'])
+        self.assertEqual(reconciliation.expected_balances(LedgerCheckpoint.Side.WALLET)[self.wallet.pk], Decimal('380.00'))
+        self.assertEqual(reconciliation.expected_balances(LedgerCheckpoint.Side.BUDGET)[self.employee.pk], Decimal('74.50'))
+        self.assertNotIn(self.admin.pk, reconciliation.expected_balances(LedgerCheckpoint.Side.BUDGET))
+
+    def test_reports_and_repairs_drift_per_company_and_user(self):
+        self.deposit_and_allocate(Decimal('500.00'), Decimal('120.00'))
+        User.objects.filter(pk=self.employee.pk).update(budget=Decimal('200.00'))
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal('370.00'))
+
+        report = reconciliation.reconcile()
+        self.assertFalse(report['consistent'])
+        self.assertEqual([row['drift'] for row in report['wallets']], [Decimal('-10.00')])
+        self.assertEqual([(row['username'], row['drift']) for row in report['users']], [('emp', Decimal('80.00'))])
+        self.assertEqual(report['companies'], [{
+            'company_id': self.company.pk,
+            'company_name': "Company",
+            'wallet_drift': Decimal('-10.00'),
+            'budget_drift': Decimal('80.00'),
+            'drifted_users': 1,
+        }])
+
+        other = Company.objects.create(name="Other")
+        self.assertTrue(reconciliation.reconcile(other.pk)['consistent'])
+
+        reconciliation.repair()
+        self.wallet.refresh_from_db()
+        self.employee.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('380.00'))
+        self.assertEqual(self.employee.budget, Decimal('120.00'))
+        self.assertTrue(reconciliation.reconcile()['consistent'])
+
+    def test_checkpoints_fold_old_entries_and_keep_recent_ones_out(self):
+        self.deposit_and_allocate(Decimal('500.00'), Decimal('120.00'))
+        Transaction.objects.update(timestamp=timezone.now() - timedelta(days=2))
+        self.spend(Decimal('20.00'))
+
+        mark = reconciliation.advance_checkpoints()
+        self.assertEqual(reconciliation.watermark(), mark)
+        checkpoints = dict(LedgerCheckpoint.objects.values_list('side', 'total').filter(owner_id=self.employee.pk))
+        # The recent deduction is younger than the lag and not folded in yet.
+        self.assertEqual(checkpoints[LedgerCheckpoint.Side.BUDGET], Decimal('120.00'))
+
+        # Entries behind the watermark are no longer read.
+        Transaction.objects.filter(timestamp__lte=mark).delete()
+        self.assertTrue(reconciliation.reconcile()['consistent'])
+
+        later = reconciliation.advance_checkpoints(now=timezone.now() + timedelta(days=1))
+        self.assertGreater(later, mark)
+        budget = LedgerCheckpoint.objects.get(side=LedgerCheckpoint.Side.BUDGET, owner_id=self.employee.pk)
+        self.assertEqual(budget.total, Decimal('100.00'))
+        self.assertEqual(set(LedgerCheckpoint.objects.values_list('covered_until', flat=True)), {later})
+
+    def test_command_fails_on_drift_unless_repairing(self):
+        self.deposit_and_allocate(Decimal('100.00'), Decimal('40.00'))
+        User.objects.filter(pk=self.employee.pk).update(budget=Decimal('0.00'))
+
+        with self.assertRaises(CommandError):
+            call_command('reconcile_ledger', stdout=StringIO())
+        call_command('reconcile_ledger', '--repair', stdout=StringIO())
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.budget, Decimal('40.00'))
+        call_command('reconcile_ledger', '--full', stdout=StringIO())
+
+
+class ReconciliationAPITests(ReconciliationMixin, APITestCase):
+    def test_super_admin_can_report_and_repair(self):
+        super_admin = User.objects.create_user(username='super', password='password123', role=User.Role.SUPER_ADMIN)
+        self.deposit_and_allocate(Decimal('100.00'), Decimal('40.00'))
+        User.objects.filter(pk=self.employee.pk).update(budget=Decimal('55.00'))
+        url = reverse('ledger-reconciliation')
+
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_authenticate(user=super_admin)
+        response = self.client.get(url, {'company_id': self.company.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['consistent'])
+        self.assertEqual(response.data['users'][0]['drift'], '15.00')
+
+        self.assertEqual(self.client.post(url, {'company_id': self.company.pk}, format='json').status_code, 200)
+        self.assertTrue(self.client.get(url).data['consistent'])
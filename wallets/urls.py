@@ -1,7 +1,7 @@
 # wallets/urls.py
 from django.urls import path
 # [MODIFIED] Import the new view
-from .views import WalletDepositView, MyCompanyWalletView
+from .views import WalletDepositView, MyCompanyWalletView, LedgerReconciliationView
 
 urlpatterns = [
     # URL for Super Admins to deposit funds into any company wallet
@@ -9,4 +9,7 @@ urlpatterns = [
 
     # [NEW] URL for Company Admins to view their own company wallet
     path('my-company/', MyCompanyWalletView.as_view(), name='my-company-wallet'),
+
+    # Ledger reconciliation for Super Admins (report with GET, repair with POST)
+    path('reconciliation/', LedgerReconciliationView.as_view(), name='ledger-reconciliation'),
 ]
\ No newline at end of file
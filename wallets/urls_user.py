@@ -0,0 +1,8 @@
+# wallets/urls_user.py
+from django.urls import path
+from .views import MyTransactionHistoryView
+
+urlpatterns = [
+    # URL for any user to page through their own budget transactions
+    path('my-transactions/', MyTransactionHistoryView.as_view(), name='my-transactions'),
+]
@@ -1,14 +1,22 @@
 # wallets/views.py
-from django.db import transaction
-from django.db.models import F
+from django.db.models import F, Sum, Window
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework import generics, status 
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
 
 from companies.models import Company
+from . import ledger, reconciliation
 from .models import Wallet, Transaction
-from .serializers import DepositSerializer, WalletSerializer 
+from .serializers import (
+    DepositSerializer, WalletSerializer, ReconciliationSerializer, TransactionHistorySerializer,
+)
+from core.authz import auth_context
+from core import sharding
+from core.idempotency import idempotent
 from core.permissions import IsSuperAdmin, IsCompanyAdmin
 
 class MyCompanyWalletView(generics.RetrieveAPIView):
@@ -20,22 +28,27 @@ class MyCompanyWalletView(generics.RetrieveAPIView):
     permission_classes = [IsCompanyAdmin]
 
     def get_object(self):
-        user = self.request.user
         wallet = get_object_or_404(
             Wallet.objects.prefetch_related('transactions__user'),
-            company=user.company
+            company_id=auth_context(self.request).company_id
         )
         return wallet
 
 class WalletDepositView(APIView):
     """
     Allows a Super Admin to deposit funds into a company's wallet.
+    Retries with the same Idempotency-Key replay the first response.
     """
     permission_classes = [IsSuperAdmin]
     serializer_class = DepositSerializer
 
-    @transaction.atomic
+    @idempotent('wallets.deposit')
     def post(self, request, company_id, *args, **kwargs):
+        # The wallet and its ledger live on the company's shard.
+        with sharding.for_company(company_id), ledger.atomic():
+            return self.deposit(request, company_id)
+
+    def deposit(self, request, company_id):
         company = get_object_or_404(Company, pk=company_id)
         wallet = get_object_or_404(Wallet, company=company)
 
@@ -48,14 +61,82 @@ class WalletDepositView(APIView):
         wallet.save(update_fields=['balance'])
         wallet.refresh_from_db()
 
-        Transaction.objects.create(
-            wallet=wallet,
-            transaction_type=Transaction.TransactionType.DEPOSIT,
-            amount=amount_to_deposit,
-            description=f"Deposit made by Super Admin {request.user.username}."
+        ledger.record(
+            wallet, Transaction.TransactionType.DEPOSIT, amount_to_deposit,
+            'deposit', username=request.user.username,
         )
 
         return Response(
             {"message": "Deposit successful.", "new_balance": wallet.balance},
             status=status.HTTP_200_OK
+        )
+
+
+class LedgerReconciliationView(APIView):
+    """
+    Compares wallet balances and employee budgets with the transaction ledger.
+    GET reports the drift (optionally for one `company_id`); POST also resets
+    the drifted balances to the ledger total.
+    """
+    permission_classes = [IsSuperAdmin]
+
+    def _company_id(self, value):
+        if value in (None, ''):
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValidationError({"company_id": "A valid integer is required."})
+
+    def _run(self, function, company_id):
+        """Runs on the company's shard, or on every shard when no company is given."""
+        if company_id is not None:
+            with sharding.for_company(company_id):
+                return function(company_id)
+        return reconciliation.merge_reports(sharding.fan_out(function))
+
+    def get(self, request, *args, **kwargs):
+        report = self._run(reconciliation.reconcile, self._company_id(request.query_params.get('company_id')))
+        return Response(ReconciliationSerializer(report).data)
+
+    def post(self, request, *args, **kwargs):
+        report = self._run(reconciliation.repair, self._company_id(request.data.get('company_id')))
+        return Response(ReconciliationSerializer(report).data, status=status.HTTP_200_OK)
+
+
+class TransactionHistoryPagination(CursorPagination):
+    """
+    Newest first. The cursor is the transaction's position in the user's
+    ledger, so pages stay stable while new transactions arrive. Each page
+    still numbers and sums the user's whole ledger (see
+    MyTransactionHistoryView), so its cost grows with the ledger, not the
+    page depth.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = '-sequence'
+
+
+class MyTransactionHistoryView(generics.ListAPIView):
+    """
+    Lists the requesting user's budget movements with the balance after each
+    one. Both the position and the running balance are window functions over
+    the user's ledger (served by the user/timestamp index); the cursor filter
+    on `sequence` is applied outside of them, so later pages keep the totals
+    of everything before them. That means every request scans all of the
+    user's budget transactions, whichever page it asks for.
+    """
+    serializer_class = TransactionHistorySerializer
+    pagination_class = TransactionHistoryPagination
+
+    def get_queryset(self):
+        order = [F('timestamp').asc(), F('id').asc()]
+        return (
+            Transaction.objects.budget_side()
+            .filter(user=self.request.user)
+            .annotate(
+                sequence=Window(RowNumber(), order_by=order),
+                balance_after=Window(Sum('amount'), order_by=order),
+            )
         )
\ No newline at end of file